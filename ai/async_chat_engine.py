@@ -0,0 +1,177 @@
+# ai/async_chat_engine.py
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import httpx
+from openai import AsyncOpenAI
+
+from ai.chat_engine import (
+    resolve_model_name,
+    resolve_reasoning,
+    _normalize_messages,
+    _total_tokens,
+    _calibrate,
+    _build_request_args,
+    _process_response,
+    _read_api_key,
+)
+from ai.rate_limiter import RateLimiter
+from ai.response_cache import ResponseCache
+from ai.token_estimator import estimate_messages_tokens
+from infra.logging import get_logger
+
+
+log = get_logger("AsyncChatEngine")
+
+# HTTP コネクションプールの既定値（同時に重ねる呼び出しは多くても数本）
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_MAX_KEEPALIVE = 8
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+
+class AsyncChatEngine:
+    """
+    AsyncOpenAI ベースの非同期エンジン（ChatEngine.chat と同じ引数で await engine.chat(...)）
+    - httpx.AsyncClient をサイズ指定・keep-alive 付きで1つだけ持ち、全呼び出しで共有する
+    - httpx の非同期クライアントはイベントループに紐づくため、
+      ゲームループ（同期スレッド）からは submit()/run() 経由で専用ループに投げる
+    """
+
+    def __init__(
+        self,
+        api_key_path: str,
+        debug: bool = False,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        api_key = _read_api_key(api_key_path)
+
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=timeout,
+        )
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self.http_client)
+        self.debug = debug
+        self.cache = cache  # ChatEngine と同じ ResponseCache を共有してよい
+        self.rate_limiter = rate_limiter or RateLimiter()  # 同じ API キーなら ChatEngine と共有する
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._loop_lock = threading.Lock()
+        log.info(f"AsyncChatEngine: 初期化完了（pool={max_connections}, keepalive={max_keepalive_connections}）")
+
+    async def chat(
+        self,
+        prompt: str | list[dict] = None,
+        messages: list[dict] | None = None,
+        caller_name: str = "",
+        max_tokens: int = 2048,
+        model_level: str | None = None,
+        schema: dict | None = None,
+    ) -> str | dict:
+        """ChatEngine.chat の非同期版（引数・返却値は同一）"""
+        retries = 6
+        msgs = _normalize_messages(prompt, messages, "AsyncChatEngine.chat")
+
+        model = resolve_model_name(model_level)
+        log.info(f"[{caller_name}] Responses API 送信 (model={model}, async)")
+
+        reasoning = resolve_reasoning(model_level)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key, cached = self.cache.lookup(caller_name, model, reasoning, schema, msgs, max_tokens)
+            if cached is not None:
+                return cached
+
+        estimated_input = estimate_messages_tokens(msgs)
+        estimated = estimated_input + max_tokens
+        for attempt in range(1, retries + 1):
+            reserved = False
+            try:
+                await self.rate_limiter.acquire_async(model, estimated, caller_name)
+                reserved = True
+                req_args = _build_request_args(model, msgs, max_tokens, reasoning, schema)
+                raw = await self.client.responses.with_raw_response.create(**req_args)
+                resp = raw.parse()
+                reserved = False
+                # 見積もりとの差分を返してから、ヘッダの残量で上書きする（逆順だと差分を二重に返してしまう）
+                self.rate_limiter.settle(model, estimated, _total_tokens(resp))
+                self.rate_limiter.update_from_headers(model, raw.headers)
+                _calibrate(estimated_input, getattr(resp, "usage", None))
+                result = _process_response(
+                    resp,
+                    caller_name=caller_name,
+                    model=model,
+                    model_level=model_level,
+                    max_tokens=max_tokens,
+                    msgs=msgs,
+                    schema=schema,
+                    debug=self.debug,
+                )
+                if self.cache is not None:
+                    self.cache.store(cache_key, caller_name, schema, result)
+                return result
+
+            except asyncio.CancelledError:
+                if reserved:
+                    self.rate_limiter.refund(model, estimated)
+                log.info(f"[{caller_name}] 呼び出しがキャンセルされました")
+                raise
+            except Exception as e:
+                if reserved:
+                    self.rate_limiter.refund(model, estimated)  # 失敗した分の予約を返す（リトライは改めて予約する）
+                delay = self.rate_limiter.retry_delay(model, e, attempt)
+                if delay is not None and attempt < retries:
+                    log.warning(f"[{caller_name}] {type(e).__name__}: {e} / {attempt}/{retries}回目 → {delay:.1f}秒待機")
+                    await asyncio.sleep(delay)
+                    continue
+                log.exception(f"[{caller_name}] Responses API 応答エラー: {e}")
+                raise
+
+    # ---- 同期コードからの利用 ----
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="AsyncChatEngineLoop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def submit(self, coro) -> Future:
+        """コルーチンを専用ループで開始し、concurrent.futures.Future を返す（待たずに戻る）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro):
+        """コルーチンを専用ループで実行し、完了まで待って結果を返す"""
+        return self.submit(coro).result()
+
+    def gather(self, *coros, return_exceptions: bool = False) -> list:
+        """複数の呼び出しを同時に走らせ、全て揃ってから結果を並び順で返す"""
+        async def _all():
+            return await asyncio.gather(*coros, return_exceptions=return_exceptions)
+        return self.run(_all())
+
+    async def aclose(self):
+        await self.client.close()
+
+    def close(self):
+        """コネクションプールを閉じて専用ループを止める"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self.run(self.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
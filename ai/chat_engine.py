@@ -4,9 +4,14 @@ import json
 import re
 import os
 import uuid
+import threading
 from datetime import datetime
+from pathlib import Path
 from openai import OpenAI
 
+from ai.rate_limiter import RateLimiter
+from ai.response_cache import ResponseCache
+from ai.token_estimator import estimate_messages_tokens, estimate_tokens, observe_actual
 from infra.logging import get_logger
 
 
@@ -191,6 +196,187 @@ def resolve_model_name(model_input: str | None) -> str:
     return level_map[key]
 
 
+def resolve_reasoning(model_level: str | None) -> dict | None:
+    """model_level に対応する reasoning 努力度（未指定なら None）"""
+    effort_map = {
+        "low": "minimal",
+        "medium": "minimal",
+        "high": "low",
+        "very_high": "minimal",
+    }
+    effort = effort_map.get(model_level or "")
+    return {"effort": effort} if effort else None
+
+def _normalize_messages(prompt, messages, where: str) -> list[dict]:
+    """prompt / messages のどちらで渡されても Responses API の input 形式に揃える"""
+    payload = messages if messages is not None else prompt
+    if payload is None:
+        raise ValueError(f"{where}: prompt または messages のいずれかを指定してください。")
+    if isinstance(payload, list):
+        return payload
+    return [{"role": "user", "content": payload}]
+
+def _total_tokens(resp) -> int | None:
+    usage = getattr(resp, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def _calibrate(estimated_input: int, usage) -> None:
+    """概算した入力トークン数を実測で答え合わせし、token_estimator の補正係数を更新"""
+    if usage is not None:
+        observe_actual(estimated_input, getattr(usage, "input_tokens", None))
+
+
+# caller ごとの累計トークン使用量（cached_tokens = プロバイダ側 prompt cache に載った入力）
+_usage_stats: dict[str, dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+def _record_usage(caller_name: str, usage) -> None:
+    inp = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None)
+    out = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None)
+    tot = getattr(usage, "total_tokens", None)
+    details = getattr(usage, "input_tokens_details", None) or getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+
+    with _usage_lock:
+        st = _usage_stats.setdefault(caller_name, {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0})
+        st["calls"] += 1
+        st["input_tokens"] += inp or 0
+        st["cached_tokens"] += cached
+        st["output_tokens"] += out or 0
+        ratio = st["cached_tokens"] / st["input_tokens"] if st["input_tokens"] else 0.0
+
+    log.info(
+        f"[{caller_name}] トークン使用量: input={inp} (cached={cached}) / output={out} / total={tot}"
+        f" | 累計キャッシュ率 {ratio:.0%}"
+    )
+
+def get_usage_stats() -> dict[str, dict[str, int]]:
+    """caller ごとの累計（calls / input_tokens / cached_tokens / output_tokens）のコピーを返す"""
+    with _usage_lock:
+        return {k: dict(v) for k, v in _usage_stats.items()}
+
+
+def _build_request_args(model: str, msgs: list[dict], max_tokens: int,
+                        reasoning: dict | None, schema: dict | None) -> dict:
+    req_args = {
+        "model": model,
+        "input": msgs,
+        "max_output_tokens": max_tokens,
+        **({"reasoning": reasoning} if reasoning else {}),
+    }
+
+    # スキーマ指定があれば構造化出力モードに
+    if schema:
+        req_args["text"] = {"format": schema}
+    return req_args
+
+def _process_response(
+    resp,
+    *,
+    caller_name: str,
+    model: str,
+    model_level: str | None,
+    max_tokens: int,
+    msgs: list[dict],
+    schema: dict | None,
+    debug: bool,
+) -> str | dict:
+    """Responses API の応答から usage ログ・chatlog 保存・返却値の整形までを行う（同期/非同期共通）"""
+    # --- usage 全量ログ出力 ---
+    usage_all = None
+    usage = getattr(resp, "usage", None)
+    if usage is not None:
+        try:
+            usage_all = _usage_to_jsonable(usage)
+            log.info(f"[{caller_name}] Usage (ALL): {json.dumps(usage_all, ensure_ascii=False)}")
+        except Exception as e:
+            log.warning(f"[{caller_name}] usage のJSON化に失敗: {e}")
+
+
+    text = getattr(resp, "output_text", None)
+
+    if not text or not text.strip():
+        # 空応答なら例外として扱う
+        raise RuntimeError(f"[{caller_name}] API応答が空でした")
+
+    # usage ログ（ある場合のみ）
+    if usage:
+        _record_usage(caller_name, usage)
+
+    log.info(f"[{caller_name}] Responses API 受信")
+    #log.info(f"[{caller_name}] 応答テキスト: {text[:500]}{'...' if len(text) > 500 else ''}")
+
+    # ▼▼▼ 保存と返却処理を分離 ▼▼▼
+    if schema:
+        parsed = None
+        try:
+            parsed = json.loads(text)
+        except Exception:
+            log.warning(f"[{caller_name}] JSONパース失敗: {text[:200]}")
+
+        # デバッグ時だけ保存
+        if debug:
+            try:
+                jpath, tpath = _dump_chatlog(
+                    caller_name=caller_name,
+                    model=model,
+                    model_level=model_level,
+                    max_tokens=max_tokens,
+                    messages=msgs,
+                    raw_text=text,
+                    stripped_text=None if text is None else _strip_think(text),
+                    usage_all=usage_all,
+                    schema_used=True,
+                    parsed_object=parsed,
+                )
+                log.info(f"[{caller_name}] chatlog saved: {jpath} / {tpath}")
+            except Exception as e:
+                log.warning(f"[{caller_name}] chatlog 保存失敗: {e}")
+
+        # 返却は常に
+        return parsed if parsed is not None else text
+
+    else:
+        stripped = None if text is None else _strip_think(text)
+
+        # デバッグ時だけ保存
+        if debug:
+            try:
+                jpath, tpath = _dump_chatlog(
+                    caller_name=caller_name,
+                    model=model,
+                    model_level=model_level,
+                    max_tokens=max_tokens,
+                    messages=msgs,
+                    raw_text=text,
+                    stripped_text=stripped,
+                    usage_all=usage_all,
+                    schema_used=False,
+                    parsed_object=None,
+                )
+                log.info(f"[{caller_name}] chatlog saved: {jpath} / {tpath}")
+            except Exception as e:
+                log.warning(f"[{caller_name}] chatlog 保存失敗: {e}")
+
+        # 常に返却
+        return stripped
+
+def _read_api_key(api_key_path) -> str:
+    if not api_key_path:
+        raise ValueError("[致命的エラー] APIキーのパスが指定されていません。")
+
+    with open(api_key_path, "r", encoding="utf-8") as f:
+        api_key = f.read().strip()
+
+    if not api_key:
+        raise ValueError("[致命的エラー] APIキーが空です。resources/api_key.txt を確認してください。")
+
+    if not api_key.startswith("sk-"):
+        raise ValueError("[致命的エラー] APIキーの形式が正しくありません。: " + api_key[:8] + "...")
+    return api_key
+
+
 class ChatEngine:
     """
     OpenAI Responses API 専用エンジン
@@ -199,18 +385,9 @@ class ChatEngine:
     """
 # chat_engine.py 抜粋
 class ChatEngine:
-    def __init__(self, api_key_path: str, debug: bool = False):
-        if not api_key_path:
-            raise ValueError("[致命的エラー] APIキーのパスが指定されていません。")
-
-        with open(api_key_path, "r", encoding="utf-8") as f:
-            api_key = f.read().strip()
-
-        if not api_key:
-            raise ValueError("[致命的エラー] APIキーが空です。resources/api_key.txt を確認してください。")
-
-        if not api_key.startswith("sk-"):
-            raise ValueError("[致命的エラー] APIキーの形式が正しくありません。: " + api_key[:8] + "...")
+    def __init__(self, api_key_path: str, debug: bool = False, cache: ResponseCache | None = None,
+                 rate_limiter: RateLimiter | None = None):
+        api_key = _read_api_key(api_key_path)
 
         try:
             self.client = OpenAI(api_key=api_key)
@@ -220,6 +397,8 @@ class ChatEngine:
             raise RuntimeError(f"[致命的エラー] APIキーの検証に失敗しました: {e}")
 
         self.debug = debug
+        self.cache = cache  # opt-in（--response-cache）：caller ごとの TTL を持つ ResponseCache
+        self.rate_limiter = rate_limiter or RateLimiter()
         log.info("ChatEngine: 初期化完了（APIキー検証済み）")
 
 
@@ -238,143 +417,161 @@ class ChatEngine:
         - messages: [{"role": "...", "content": "..."}] 形式でもOK
         """
         retries = 6
-        wait_sec = 10
-        payload = messages if messages is not None else prompt
-        if payload is None:
-            raise ValueError("ChatEngine.chat: prompt または messages のいずれかを指定してください。")
-
-        # メッセージ正規化
-        msgs: list[dict]
-        if isinstance(payload, list):
-            msgs = payload
-        else:
-            msgs = [{"role": "user", "content": payload}]
+        msgs = _normalize_messages(prompt, messages, "ChatEngine.chat")
 
         model = resolve_model_name(model_level)
         log.info(f"[{caller_name}] Responses API 送信 (model={model})")
         #log.info(f"[{caller_name}] 送信メッセージ全体: {json.dumps(msgs, ensure_ascii=False, indent=2)}")
 
         # reasoning 努力度（任意）
-        reasoning = None
-        if model_level == "low":
-            reasoning = {"effort": "minimal"}
-        elif model_level == "medium":
-            reasoning = {"effort": "minimal"}
-        elif model_level == "high":
-            reasoning = {"effort": "low"}
-        elif model_level == "very_high":
-            reasoning = {"effort": "minimal"}
+        reasoning = resolve_reasoning(model_level)
+
+        # 応答キャッシュ（対象 caller のみ）
+        cache_key = None
+        if self.cache is not None:
+            cache_key, cached = self.cache.lookup(caller_name, model, reasoning, schema, msgs, max_tokens)
+            if cached is not None:
+                return cached
+
+        # 送信前の見積もり（入力の概算 + 出力上限）でレート制御の予約を行う
+        estimated_input = estimate_messages_tokens(msgs)
+        estimated = estimated_input + max_tokens
         for attempt in range(1, retries + 1):
+            reserved = False
             try:
-                req_args = {
-                    "model": model,
-                    "input": msgs,
-                    "max_output_tokens": max_tokens,
-                    **({"reasoning": reasoning} if reasoning else {}),
-                }
-
-                # スキーマ指定があれば構造化出力モードに
-                if schema:
-                    req_args["text"] = {"format": schema}
-
-                resp = self.client.responses.create(**req_args)      
-                # --- usage 全量ログ出力 ---
-                usage = getattr(resp, "usage", None)
-                if usage is not None:
-                    try:
-                        usage_all = _usage_to_jsonable(usage)
-                        log.info(f"[{caller_name}] Usage (ALL): {json.dumps(usage_all, ensure_ascii=False)}")
-                    except Exception as e:
-                        log.warning(f"[{caller_name}] usage のJSON化に失敗: {e}")
+                self.rate_limiter.acquire(model, estimated, caller_name)
+                reserved = True
+                req_args = _build_request_args(model, msgs, max_tokens, reasoning, schema)
+                raw = self.client.responses.with_raw_response.create(**req_args)
+                resp = raw.parse()
+                reserved = False
+                # 見積もりとの差分を返してから、ヘッダの残量で上書きする（逆順だと差分を二重に返してしまう）
+                self.rate_limiter.settle(model, estimated, _total_tokens(resp))
+                self.rate_limiter.update_from_headers(model, raw.headers)
+                _calibrate(estimated_input, getattr(resp, "usage", None))
+                result = _process_response(
+                    resp,
+                    caller_name=caller_name,
+                    model=model,
+                    model_level=model_level,
+                    max_tokens=max_tokens,
+                    msgs=msgs,
+                    schema=schema,
+                    debug=self.debug,
+                )
+                if self.cache is not None:
+                    self.cache.store(cache_key, caller_name, schema, result)
+                return result
 
+            except Exception as e:
+                if reserved:
+                    self.rate_limiter.refund(model, estimated)  # 失敗した分の予約を返す（リトライは改めて予約する）
+                delay = self.rate_limiter.retry_delay(model, e, attempt)
+                if delay is not None and attempt < retries:
+                    log.warning(f"[{caller_name}] {type(e).__name__}: {e} / {attempt}/{retries}回目 → {delay:.1f}秒待機")
+                    time.sleep(delay)
+                    continue
+                # それ以外 or リトライ尽きた場合
+                log.exception(f"[{caller_name}] Responses API 応答エラー: {e}")
+                raise
 
-                text = getattr(resp, "output_text", None)
+    def chat_stream(
+        self,
+        prompt: str | list[dict] = None,
+        messages: list[dict] | None = None,
+        caller_name: str = "",
+        max_tokens: int = 2048,
+        model_level: str | None = None,
+    ):
+        """
+        chat() のストリーミング版。応答テキストの差分(delta)を届いた順に yield する。
+        - 構造化出力（schema）には対応しない（文章出力専用）
+        - 全文・usage はストリーム完了後にログ／chatlog へ記録される
+        - 1文字でも yield した後のエラーはリトライせずに送出する（二重表示防止）
+        """
+        retries = 6
+        msgs = _normalize_messages(prompt, messages, "ChatEngine.chat_stream")
 
-                if not text or not text.strip():
-                    # 空応答なら例外として扱う
-                    raise RuntimeError(f"[{caller_name}] API応答が空でした")
+        model = resolve_model_name(model_level)
+        log.info(f"[{caller_name}] Responses API 送信 (model={model}, stream)")
 
-                # usage ログ（ある場合のみ）
-                usage = getattr(resp, "usage", None)
-                if usage:
-                    inp = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None)
-                    out = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None)
-                    tot = getattr(usage, "total_tokens", None)
-                    log.info(f"[{caller_name}] トークン使用量: input={inp} / output={out} / total={tot}")
+        reasoning = resolve_reasoning(model_level)
+        estimated_input = estimate_messages_tokens(msgs)
+        estimated = estimated_input + max_tokens
+        for attempt in range(1, retries + 1):
+            chunks: list[str] = []
+            reserved = False
+            try:
+                self.rate_limiter.acquire(model, estimated, caller_name)
+                reserved = True
+                req_args = _build_request_args(model, msgs, max_tokens, reasoning, None)
+                req_args["stream"] = True
+
+                usage_all = None
+                raw = self.client.responses.with_raw_response.create(**req_args)
+                # ヘッダで残量を補正できたら、完了時の差分返却・失敗時の返却はしない（ヘッダの残量が正）
+                synced = self.rate_limiter.update_from_headers(model, raw.headers)
+                if synced:
+                    reserved = False
+                stream = raw.parse()
+                for event in stream:
+                    etype = getattr(event, "type", "")
+                    if etype == "response.output_text.delta":
+                        delta = getattr(event, "delta", "") or ""
+                        if delta:
+                            chunks.append(delta)
+                            yield delta
+                    elif etype in ("response.completed", "response.incomplete"):
+                        usage = getattr(getattr(event, "response", None), "usage", None)
+                        if usage is not None:
+                            try:
+                                usage_all = _usage_to_jsonable(usage)
+                                log.info(f"[{caller_name}] Usage (ALL): {json.dumps(usage_all, ensure_ascii=False)}")
+                            except Exception as e:
+                                log.warning(f"[{caller_name}] usage のJSON化に失敗: {e}")
+                            _record_usage(caller_name, usage)
+                            if reserved:
+                                reserved = False
+                                self.rate_limiter.settle(model, estimated, getattr(usage, "total_tokens", None))
+                            _calibrate(estimated_input, usage)
+                    elif etype in ("response.failed", "error"):
+                        raise RuntimeError(f"[{caller_name}] ストリーム中にエラー: {event}")
+
+                text = "".join(chunks)
+                if not text.strip():
+                    raise RuntimeError(f"[{caller_name}] API応答が空でした")
 
-                log.info(f"[{caller_name}] Responses API 受信")
-                #log.info(f"[{caller_name}] 応答テキスト: {text[:500]}{'...' if len(text) > 500 else ''}")
+                log.info(f"[{caller_name}] Responses API 受信 (stream, {len(chunks)} chunks)")
 
-                # ▼▼▼ 保存と返却処理を分離 ▼▼▼
-                if schema:
-                    parsed = None
+                # デバッグ時だけ保存
+                if self.debug:
                     try:
-                        parsed = json.loads(text)
-                    except Exception:
-                        log.warning(f"[{caller_name}] JSONパース失敗: {text[:200]}")
-
-                    # デバッグ時だけ保存
-                    if self.debug:
-                        try:
-                            jpath, tpath = _dump_chatlog(
-                                caller_name=caller_name,
-                                model=model,
-                                model_level=model_level,
-                                max_tokens=max_tokens,
-                                messages=msgs,
-                                raw_text=text,
-                                stripped_text=None if text is None else _strip_think(text),
-                                usage_all=usage_all,
-                                schema_used=True,
-                                parsed_object=parsed,
-                            )
-                            log.info(f"[{caller_name}] chatlog saved: {jpath} / {tpath}")
-                        except Exception as e:
-                            log.warning(f"[{caller_name}] chatlog 保存失敗: {e}")
-
-                    # 返却は常に
-                    return parsed if parsed is not None else text
-
-                else:
-                    stripped = None if text is None else _strip_think(text)
-
-                    # デバッグ時だけ保存
-                    if self.debug:
-                        try:
-                            jpath, tpath = _dump_chatlog(
-                                caller_name=caller_name,
-                                model=model,
-                                model_level=model_level,
-                                max_tokens=max_tokens,
-                                messages=msgs,
-                                raw_text=text,
-                                stripped_text=stripped,
-                                usage_all=usage_all,
-                                schema_used=False,
-                                parsed_object=None,
-                            )
-                            log.info(f"[{caller_name}] chatlog saved: {jpath} / {tpath}")
-                        except Exception as e:
-                            log.warning(f"[{caller_name}] chatlog 保存失敗: {e}")
-
-                    # 常に返却
-                    return stripped
+                        jpath, tpath = _dump_chatlog(
+                            caller_name=caller_name,
+                            model=model,
+                            model_level=model_level,
+                            max_tokens=max_tokens,
+                            messages=msgs,
+                            raw_text=text,
+                            stripped_text=_strip_think(text),
+                            usage_all=usage_all,
+                            schema_used=False,
+                            parsed_object=None,
+                        )
+                        log.info(f"[{caller_name}] chatlog saved: {jpath} / {tpath}")
+                    except Exception as e:
+                        log.warning(f"[{caller_name}] chatlog 保存失敗: {e}")
+                return
 
             except Exception as e:
-                msg = str(e)
-                rate_limit_keywords = [
-                    "rate limit",
-                    "ratelimiterror",
-                    "tokens per minute",
-                    "tokens_per_minute",
-                    "requests per minute",
-                    "requests_per_minute",
-                ]
-                if any(key in msg.lower() for key in rate_limit_keywords):
-                    log.warning(f"[{caller_name}] Rate limit 超過: {msg} / {attempt}/{retries}回目 → {wait_sec}秒待機")
-                    if attempt < retries:
-                        time.sleep(wait_sec)
-                        continue
-                # それ以外 or リトライ尽きた場合
-                log.exception(f"[{caller_name}] Responses API 応答エラー: {e}")
+                if reserved:
+                    # 途中まで生成した分は消費済みと見なす
+                    used = estimated_input + estimate_tokens("".join(chunks)) if chunks else 0
+                    self.rate_limiter.refund(model, estimated, used)
+                delay = None if chunks else self.rate_limiter.retry_delay(model, e, attempt)
+                if delay is not None and attempt < retries:
+                    log.warning(f"[{caller_name}] {type(e).__name__}: {e} / {attempt}/{retries}回目 → {delay:.1f}秒待機")
+                    time.sleep(delay)
+                    continue
+                log.exception(f"[{caller_name}] Responses API ストリーム応答エラー: {e}")
                 raise
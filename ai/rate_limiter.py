@@ -0,0 +1,218 @@
+# ai/rate_limiter.py
+import asyncio
+import random
+import re
+import threading
+import time
+
+import openai
+
+from infra.logging import get_logger
+
+
+log = get_logger("RateLimiter")
+
+# ヘッダを受け取るまでの仮の上限（受信後は x-ratelimit-limit-* で上書きされる）
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+
+# 指数バックオフ
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNIT = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str | None) -> float | None:
+    """'1s' / '6m0s' / '20ms' / '59.6s' 形式のリセット時間を秒に変換"""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(str(value))
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(n) * _DURATION_UNIT[u] for n, u in parts)
+
+
+def _to_float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """1分窓のトークンバケット（requests / tokens のどちらにも使う）"""
+
+    def __init__(self, capacity: float, window_sec: float = 60.0):
+        self.capacity = float(capacity)
+        self.window_sec = window_sec
+        self.rate = self.capacity / window_sec
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount を取り出せるまでの待ち秒数（0 なら即時）"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: float | None, remaining: float | None, reset_sec: float | None, now: float):
+        """レスポンスヘッダの値でバケットを補正する"""
+        if limit and limit > 0:
+            self.capacity = limit
+            self.rate = limit / self.window_sec
+        if remaining is not None:
+            self._refill(now)
+            self.level = min(self.capacity, max(0.0, remaining))
+            # reset までに満タンへ戻る速度の方が遅ければそちらに合わせる
+            if reset_sec and reset_sec > 0 and self.capacity > remaining:
+                self.rate = min(self.rate, (self.capacity - remaining) / reset_sec)
+
+
+class RateLimiter:
+    """
+    クライアント側のレート制御（モデルごとに RPM / TPM の2バケット）
+    - 送信前に見積もりトークン数ぶんを予約し、足りなければ待つ（失敗した呼び出しの予約は refund で返す）
+    - 応答（429 含む）の x-ratelimit-* ヘッダで残量・上限を補正する
+    - リトライ待ちは例外の型で判定し、retry-after があればそれに従う（なければジッタ付き指数バックオフ）
+    """
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM):
+        self.default_rpm = rpm
+        self.default_tpm = tpm
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+
+    def _get(self, model: str) -> tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            self._buckets[model] = (TokenBucket(self.default_rpm), TokenBucket(self.default_tpm))
+        return self._buckets[model]
+
+    def _try_reserve(self, model: str, cost: int) -> float:
+        with self._lock:
+            req_bucket, tok_bucket = self._get(model)
+            now = time.monotonic()
+            wait = max(req_bucket.wait_time(1, now), tok_bucket.wait_time(cost, now))
+            if wait <= 0:
+                req_bucket.take(1)
+                tok_bucket.take(cost)
+            return wait
+
+    def acquire(self, model: str, cost: int, caller_name: str = ""):
+        """予約できるまでブロックする（同期エンジン用）"""
+        while True:
+            wait = self._try_reserve(model, cost)
+            if wait <= 0:
+                return
+            log.info(f"[{caller_name}] レート制御で待機: {wait:.2f}秒 (model={model}, 見積={cost}tok)")
+            time.sleep(wait)
+
+    async def acquire_async(self, model: str, cost: int, caller_name: str = ""):
+        """予約できるまで待つ（非同期エンジン用）"""
+        while True:
+            wait = self._try_reserve(model, cost)
+            if wait <= 0:
+                return
+            log.info(f"[{caller_name}] レート制御で待機: {wait:.2f}秒 (model={model}, 見積={cost}tok)")
+            await asyncio.sleep(wait)
+
+    def settle(self, model: str, estimated: int, actual: int | None):
+        """実際の使用量が見積もりより少なければ差分を返却する"""
+        if actual is None or actual >= estimated:
+            return
+        with self._lock:
+            self._get(model)[1].give_back(estimated - actual)
+
+    def refund(self, model: str, reserved: int, used: int = 0):
+        """
+        失敗・キャンセルした呼び出しの予約を返却する（used は消費済みと見なす分）。
+        429 のヘッダ補正（retry_delay）より先に呼ぶこと（ヘッダの残量を正とするため）
+        """
+        self.settle(model, reserved, used)
+
+    def update_from_headers(self, model: str, headers) -> bool:
+        """x-ratelimit-* ヘッダで補正する。トークンの残量を反映できたら True"""
+        if not headers:
+            return False
+        get = headers.get
+        with self._lock:
+            req_bucket, tok_bucket = self._get(model)
+            now = time.monotonic()
+            req_bucket.sync(
+                _to_float(get("x-ratelimit-limit-requests")),
+                _to_float(get("x-ratelimit-remaining-requests")),
+                parse_reset_duration(get("x-ratelimit-reset-requests")),
+                now,
+            )
+            remaining_tokens = _to_float(get("x-ratelimit-remaining-tokens"))
+            tok_bucket.sync(
+                _to_float(get("x-ratelimit-limit-tokens")),
+                remaining_tokens,
+                parse_reset_duration(get("x-ratelimit-reset-tokens")),
+                now,
+            )
+        return remaining_tokens is not None
+
+    def retry_delay(self, model: str, e: Exception, attempt: int) -> float | None:
+        """
+        リトライすべき例外なら待ち秒数、そうでなければ None。
+        - RateLimitError(429): retry-after / retry-after-ms / x-ratelimit-reset-* を優先
+        - 接続エラー・タイムアウト・5xx: ジッタ付き指数バックオフ
+        - insufficient_quota（課金上限）などは待っても直らないので None
+        """
+        response = getattr(e, "response", None)
+        headers = getattr(response, "headers", None)
+
+        if isinstance(e, openai.RateLimitError):
+            if getattr(e, "code", None) == "insufficient_quota":
+                return None
+            self.update_from_headers(model, headers)
+            hinted = self._retry_after(headers)
+            if hinted is not None:
+                return hinted + random.uniform(0, 0.5)
+            return self._backoff(attempt)
+
+        if isinstance(e, (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)):
+            return self._backoff(attempt)
+
+        return None
+
+    @staticmethod
+    def _retry_after(headers) -> float | None:
+        if not headers:
+            return None
+        ms = _to_float(headers.get("retry-after-ms"))
+        if ms is not None:
+            return ms / 1000.0
+        sec = _to_float(headers.get("retry-after"))
+        if sec is not None:
+            return sec
+        resets = [
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")),
+        ]
+        resets = [r for r in resets if r is not None]
+        return max(resets) if resets else None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # equal jitter: [cap/2, cap]（cap = min(max, base * 2^(n-1))）
+        cap = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** (attempt - 1)))
+        return random.uniform(cap / 2, cap)
@@ -0,0 +1,159 @@
+# ai/response_cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from infra.jsonl_journal import atomic_write_text
+from infra.logging import get_logger
+
+
+log = get_logger("ResponseCache")
+
+# 応答キャッシュを使う caller と TTL（秒）。ここに無い caller はキャッシュしない
+DEFAULT_CACHE_TTLS = {
+    "IntentRouter": 10 * 60,          # 同一履歴＋同一入力の再分類
+    "ClassifyResponse": 24 * 60 * 60,  # 「はい」等の短い返答の yes/no 分類（履歴に依存しない）
+}
+
+# キャッシュしない構造化出力（caller → [(キー, 値)]）。
+# invalid は同じ文面を送り直したときに改めて分類させたいので保存しない
+UNCACHED_RESULTS = {
+    "IntentRouter": [("category", "invalid")],
+}
+
+
+class ResponseCache:
+    """
+    内容アドレス方式の応答キャッシュ（ディスク保存・LRU 追い出し）
+    - キー: model / reasoning / schema / max_tokens / 正規化済みメッセージ の sha256
+    - 値: <key>.json に {"caller", "created", "result"} を保存
+    - 合計サイズが max_bytes を超えたら、最後に使われたのが古い順に削除
+    - TTL は caller ごと（"Narrator.action" のような派生名は "Narrator" でも引ける）
+    """
+
+    def __init__(self, ttls: dict[str, float], base_dir: str | Path | None = None, max_bytes: int = 20_000_000):
+        if base_dir is None:
+            from infra.path_helper import get_data_path
+            base_dir = get_data_path("cache/responses")
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.ttls = dict(ttls)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] = OrderedDict()  # key -> バイト数（古い順）
+        self._total = 0
+        self._scan()
+
+    def _scan(self):
+        files = []
+        for p in self.base_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, p.stem, st.st_size))
+        for _, key, size in sorted(files):
+            self._index[key] = size
+            self._total += size
+
+    def ttl_for(self, caller_name: str) -> float | None:
+        if caller_name in self.ttls:
+            return self.ttls[caller_name]
+        base = re.split(r"[.:]", caller_name or "", maxsplit=1)[0]
+        return self.ttls.get(base)
+
+    @staticmethod
+    def make_key(model: str, reasoning: dict | None, schema: dict | None, msgs: list[dict], max_tokens: int) -> str:
+        normalized = [
+            {"role": m.get("role", ""), "content": m.get("content", "").strip() if isinstance(m.get("content"), str) else m.get("content")}
+            for m in msgs
+        ]
+        blob = json.dumps(
+            {"model": model, "reasoning": reasoning, "schema": schema, "max_tokens": max_tokens, "messages": normalized},
+            ensure_ascii=False, sort_keys=True,
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.base_dir / f"{key}.json"
+
+    def _drop(self, key: str):
+        size = self._index.pop(key, 0)
+        self._total -= size
+        try:
+            self._path(key).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def get(self, key: str, caller_name: str):
+        """命中すれば保存済みの結果、なければ None"""
+        ttl = self.ttl_for(caller_name)
+        with self._lock:
+            if ttl is None or key not in self._index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                record = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                self._drop(key)
+                self.misses += 1
+                return None
+            if time.time() - record.get("created", 0) > ttl:
+                self._drop(key)
+                self.misses += 1
+                return None
+
+            # LRU: 最終利用時刻を更新して末尾へ
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            self._index.move_to_end(key)
+            self.hits += 1
+            return record.get("result")
+
+    def put(self, key: str, caller_name: str, result):
+        record = {"caller": caller_name, "created": time.time(), "result": result}
+        data = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            try:
+                atomic_write_text(self._path(key), data, fsync=False)
+            except Exception as e:
+                log.warning(f"[{caller_name}] 応答キャッシュ保存失敗: {e}")
+                return
+            size = len(data.encode("utf-8"))
+            self._total += size - self._index.pop(key, 0)
+            self._index[key] = size
+
+            while self._total > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._drop(oldest)
+
+    def lookup(self, caller_name: str, model: str, reasoning: dict | None, schema: dict | None,
+               msgs: list[dict], max_tokens: int) -> tuple[str | None, object]:
+        """caller がキャッシュ対象ならキーと命中結果（なければ None）を返す"""
+        if self.ttl_for(caller_name) is None:
+            return None, None
+        key = self.make_key(model, reasoning, schema, msgs, max_tokens)
+        cached = self.get(key, caller_name)
+        if cached is not None:
+            log.info(f"[{caller_name}] 応答キャッシュ命中 (hits={self.hits}, misses={self.misses})")
+        return key, cached
+
+    def store(self, key: str | None, caller_name: str, schema: dict | None, result):
+        # 構造化出力でパースに失敗した応答（文字列）は保存しない
+        if key is None or result is None or (schema and not isinstance(result, dict)):
+            return
+        base = re.split(r"[.:]", caller_name or "", maxsplit=1)[0]
+        if isinstance(result, dict) and any(result.get(k) == v for k, v in UNCACHED_RESULTS.get(base, [])):
+            return
+        self.put(key, caller_name, result)
@@ -0,0 +1,60 @@
+# ai/token_estimator.py
+import json
+import threading
+import unicodedata
+
+
+# 1トークンあたりの文字数（o200k 系トークナイザの実測に基づくおおよその値）
+#  - かな・漢字などの全角文字はおおむね 1文字 ≒ 1トークン弱
+#  - 英数字・記号は 4文字 ≒ 1トークン
+CJK_CHARS_PER_TOKEN = 1.1
+ASCII_CHARS_PER_TOKEN = 4.0
+# メッセージ1件ごとに付く role 等のオーバーヘッド
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 実測（API の usage.input_tokens）との比で概算を補正する係数（指数移動平均）
+CALIBRATION_ALPHA = 0.2
+CALIBRATION_MIN = 0.5
+CALIBRATION_MAX = 2.0
+_calibration = 1.0
+_calibration_lock = threading.Lock()
+
+
+def observe_actual(estimated: int, actual: int | None) -> None:
+    """送信前の概算と実測入力トークン数を渡し、以後の概算を補正する"""
+    global _calibration
+    if not actual or not estimated or estimated <= 0:
+        return
+    with _calibration_lock:
+        raw_estimate = estimated / _calibration  # 補正前の値に戻してから比を取る
+        ratio = min(CALIBRATION_MAX, max(CALIBRATION_MIN, actual / raw_estimate))
+        _calibration += CALIBRATION_ALPHA * (ratio - _calibration)
+
+
+def get_calibration() -> float:
+    return _calibration
+
+
+def estimate_tokens(text: str | None) -> int:
+    """ローカルでのトークン数概算（API を呼ばずに送信前の見積もりに使う。実測で補正済み）"""
+    if not text:
+        return 0
+    wide = 0
+    narrow = 0
+    for c in text:
+        if unicodedata.east_asian_width(c) in "WFA":
+            wide += 1
+        else:
+            narrow += 1
+    return int((wide / CJK_CHARS_PER_TOKEN + narrow / ASCII_CHARS_PER_TOKEN) * _calibration) + 1
+
+
+def estimate_messages_tokens(messages: list[dict]) -> int:
+    """[{"role", "content"}] 形式のメッセージ列全体の概算トークン数"""
+    total = 0
+    for m in messages:
+        content = m.get("content", "")
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False)
+        total += estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    return total
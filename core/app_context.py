@@ -1,10 +1,16 @@
 # core/app_context.py
+import threading
+
 
 class AppContext:
-    def __init__(self, engine, ui, state, worldview_mgr, session_mgr, nouns_mgr, character_mgr=None, canon_mgr=None):
+    def __init__(self, engine, ui, state, worldview_mgr, session_mgr, nouns_mgr, character_mgr=None, canon_mgr=None,
+                 async_engine=None, options: dict | None = None, async_engine_factory=None):
 
 
         self.engine = engine
+        self._async_engine = async_engine
+        self._async_engine_factory = async_engine_factory  # 初回参照時に async_engine を作る関数
+        self._async_lock = threading.Lock()
         self.ui = ui
         self.worldview_mgr = worldview_mgr
         self.session_mgr = session_mgr
@@ -12,3 +18,21 @@ class AppContext:
         self.nouns_mgr = nouns_mgr
         self.canon_mgr = canon_mgr
         self.state = state
+        self.options = options or {}  # 実行時オプション（combined_intent 等）
+
+    @property
+    def async_engine(self):
+        """独立した呼び出しを重ねたい時用（AsyncChatEngine）。先行生成・要約などで初めて必要になった時に作る"""
+        if self._async_engine is None and self._async_engine_factory is not None:
+            with self._async_lock:
+                if self._async_engine is None and self._async_engine_factory is not None:
+                    self._async_engine = self._async_engine_factory()
+        return self._async_engine
+
+    def close(self):
+        """作成済みの非同期エンジンを閉じる（終了時用。以後は作り直さない）"""
+        with self._async_lock:
+            engine, self._async_engine = self._async_engine, None
+            self._async_engine_factory = None
+        if engine is not None:
+            engine.close()
@@ -1,6 +1,6 @@
 # core/base_manager.py
 
-import json
+from core.storage import get_storage
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
 
@@ -12,15 +12,82 @@ class BaseManager:
         self.index_file.parent.mkdir(parents=True, exist_ok=True)
         self.entries = self._load_index()
 
+    # ---- entries と id → entry の索引を常に一致させる ----
+    @property
+    def entries(self) -> list:
+        return self._entries
+
+    @entries.setter
+    def entries(self, value: list):
+        self._entries = value
+        self._reindex()
+
+    def _reindex(self):
+        by_id = {}
+        for e in self._entries:
+            by_id.setdefault(e.get("id"), e)  # 重複時は先頭を優先（従来の線形探索と同じ）
+        self._by_id = by_id
+        self._indexed_len = len(self._entries)
+        self._rebuild_secondary()
+
+    # 二次索引を持つサブクラスが上書きする（entries 全体の差し替え時 / 1件の追加・削除時）
+    def _rebuild_secondary(self):
+        pass
+
+    def _index_secondary(self, entry: dict):
+        pass
+
+    def _unindex_secondary(self, entry: dict):
+        pass
+
+    def _add_entry(self, entry: dict):
+        """エントリを追加し、索引にも登録する"""
+        self._entries.append(entry)
+        self._by_id.setdefault(entry.get("id"), entry)
+        self._indexed_len += 1
+        self._index_secondary(entry)
+
     def _load_index(self) -> list:
-        if self.index_file.exists():
-            with self.index_file.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        return []
+        return get_storage().load_index(self.index_file)
 
-    def _save_index(self):
-        with self.index_file.open("w", encoding="utf-8") as f:
-            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+    def _save_index(self, changed: list | None = None, deleted: list | None = None):
+        """
+        索引を保存する。changed（追加・更新したエントリ）/ deleted（削除した id）を渡すと、
+        対応するストレージ（SQLite）ではその行だけを書き込む。JSON では常に全体を書く。
+        """
+        get_storage().save_index(self.index_file, self.entries, changed=changed, deleted=deleted)
+        self._remember_index()
+
+    # ---- コンテキスト（wid / sid）ごとの索引キャッシュ ----
+    def index_stamp(self) -> tuple | None:
+        """索引の版数（保存のたびに変わる）。索引から派生したデータのキャッシュ判定に使う"""
+        return get_storage().stamp(self.index_file)
+
+    @property
+    def _index_cache(self) -> dict:
+        # サブクラスは super().__init__ を呼ばないため遅延生成
+        cache = self.__dict__.get("_index_cache_store")
+        if cache is None:
+            cache = self.__dict__["_index_cache_store"] = {}
+        return cache
+
+    def _remember_index(self):
+        """自分で書いた直後の内容と版数を覚えておく（書き込み待ちが flush されても同じ版数なので再読込しない）"""
+        self._index_cache[self.index_file] = (self.index_stamp(), self._entries)
+
+    def _switch_index(self):
+        """
+        index_file に対応する entries へ切り替える。
+        前回読み込み（または自分の書き込み）からスタンプ（版数 or mtime/size）が変わっていなければ、パース済みの一覧をそのまま使う。
+        """
+        stamp = self.index_stamp()
+        hit = self._index_cache.get(self.index_file)
+        if hit is not None and hit[0] == stamp:
+            if hit[1] is not self.entries:
+                self.entries = hit[1]
+            return
+        self.entries = self._load_index()
+        self._index_cache[self.index_file] = (stamp, self._entries)
 
     def list_entries(self) -> list:
         """全エントリを返す"""
@@ -28,14 +95,20 @@ class BaseManager:
 
     def get_entry_by_id(self, entry_id: str) -> dict | None:
         """指定IDのエントリを返す（なければNone）"""
-        return next((e for e in self.entries if e.get("id") == entry_id), None)
+        if self._indexed_len != len(self._entries):
+            self._reindex()  # 外部で entries を直接増減された場合の保険
+        return self._by_id.get(entry_id)
 
     def delete_entry_by_id(self, entry_id: str) -> bool:
         """指定IDのエントリを削除する"""
-        index = next((i for i, e in enumerate(self.entries) if e.get("id") == entry_id), None)
-        if index is not None:
-            del self.entries[index]
-            self._save_index()
+        entry = self.get_entry_by_id(entry_id)
+        if entry is not None:
+            index = next(i for i, e in enumerate(self._entries) if e is entry)
+            del self._entries[index]
+            self._unindex_secondary(entry)
+            del self._by_id[entry_id]
+            self._indexed_len -= 1
+            self._save_index(deleted=[entry_id])
             self.log.info(f"エントリ削除: {entry_id}")
             return True
         self.log.warning(f"削除対象のエントリが見つかりません: {entry_id}")
@@ -45,8 +118,14 @@ class BaseManager:
         """指定IDのエントリに updates を適用する"""
         entry = self.get_entry_by_id(entry_id)
         if entry:
+            self._unindex_secondary(entry)
             entry.update(updates)
-            self._save_index()
+            self._index_secondary(entry)
+            if "id" in updates:
+                self._reindex()
+                self._save_index(changed=[entry], deleted=[entry_id])
+            else:
+                self._save_index(changed=[entry])
             self.log.info(f"エントリ更新: {entry_id} -> {updates}")
             return True
         self.log.warning(f"更新対象のエントリが見つかりません: {entry_id}")
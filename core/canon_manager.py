@@ -1,10 +1,40 @@
 # core/canon_manager.py
 import uuid
 from datetime import datetime
+from ai.token_estimator import estimate_tokens
 from core.base_manager import BaseManager
+from infra.jsonl_journal import JsonlJournal
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
 
+# history がこのトークン数を超えたら、古い履歴を経緯（history_digest）へ畳み込んでアーカイブへ移す
+HISTORY_COMPACT_TOKENS = 300
+# 畳み込み後も history に残す直近の件数
+KEEP_RECENT_HISTORY = 3
+# 経緯の最大文字数（超えたら古い側から切り詰める。全文はアーカイブに残る）
+DIGEST_MAX_CHARS = 400
+
+
+def _history_label(chapter) -> str:
+    return "初期設定" if (isinstance(chapter, int) and chapter == 0) else f"第{chapter}章"
+
+
+def _entry_tokens(entry: dict) -> int:
+    """プロンプトに載せたときの概算トークン数"""
+    parts = [entry.get("name", ""), entry.get("type", ""), entry.get("notes", ""), entry.get("history_digest", "")]
+    parts += [h.get("text", "") for h in entry.get("history", [])]
+    return sum(estimate_tokens(p) for p in parts)
+
+
+def _pinned_count(history: list[dict]) -> int:
+    """畳み込まずに残す先頭の件数（初期設定＝第0章の履歴。無ければ最初の1件）"""
+    setup = 0
+    for h in history:
+        if h.get("chapter") != 0:
+            break
+        setup += 1
+    return max(setup, 1) if history else 0
+
 
 class CanonManager(BaseManager):
     def __init__(self):
@@ -14,18 +44,25 @@ class CanonManager(BaseManager):
         self.entries = []
         self.base_dir = None
         self.index_file = None
+        self.archive = None
 
     def set_context(self, worldview_id: str, session_id: str):
+        changed = (worldview_id, session_id) != (self.wid, self.sid)
         self.wid = worldview_id
         self.sid = session_id
         self.base_dir = get_data_path(f"worlds/{worldview_id}/sessions/{session_id}/canon")
         self.index_file = self.base_dir / "canon_index.json"
+        if changed or self.archive is None:
+            if self.archive is not None:
+                self.archive.close()
+            self.archive = JsonlJournal(self.base_dir / "canon_archive.jsonl")
         
         # 📌 親ディレクトリがなければ作成
         self.index_file.parent.mkdir(parents=True, exist_ok=True)
 
-        self.entries = self._load_index()
-        self.log.info(f"CanonManager: context set to worldview={worldview_id}, session={session_id}")
+        self._switch_index()
+        if changed:
+            self.log.info(f"CanonManager: context set to worldview={worldview_id}, session={session_id}")
 
 
     def create_fact(self, name: str, type: str, notes: str, chapter: int = 0) -> str:
@@ -40,9 +77,10 @@ class CanonManager(BaseManager):
             "notes": notes,
             "created": created
         }
+        entry["tokens"] = _entry_tokens(entry)
 
-        self.entries.append(entry)
-        self._save_index()
+        self._add_entry(entry)
+        self._save_index(changed=[entry])
         self.log.info(f"カノン作成: {name} (id={canon_id}, type={type})")
         return canon_id
 
@@ -55,6 +93,61 @@ class CanonManager(BaseManager):
             "chapter": chapter,
             "text": text
         })
-        self._save_index()
+        self._compact_entry(entry)
+        entry["tokens"] = _entry_tokens(entry)
+        self._save_index(changed=[entry])
         self.log.info(f"カノン {canon_id} に履歴を追加: ch{chapter}")
         return True
+
+    # ---- 履歴の畳み込み ----
+    def _compact_entry(self, entry: dict) -> bool:
+        """
+        history が HISTORY_COMPACT_TOKENS を超えていれば、直近 KEEP_RECENT_HISTORY 件を残して
+        古い履歴をアーカイブ（canon_archive.jsonl）へ移し、history_digest に要点として連結する。
+        先頭の履歴（初期設定）は畳み込まず常に history に残す（digest の切り詰めで消えないように）。
+        """
+        history = entry.get("history", [])
+        pinned = _pinned_count(history)
+        if len(history) - pinned <= KEEP_RECENT_HISTORY:
+            return False
+        if sum(estimate_tokens(h.get("text", "")) for h in history) <= HISTORY_COMPACT_TOKENS:
+            return False
+
+        old = history[pinned:-KEEP_RECENT_HISTORY]
+        entry["history"] = history[:pinned] + history[-KEEP_RECENT_HISTORY:]
+        self.archive.append({"id": entry["id"], "history": old})
+
+        folded = " / ".join(f"{_history_label(h.get('chapter', '?'))}: {h.get('text', '')}" for h in old)
+        digest = f"{entry['history_digest']} / {folded}" if entry.get("history_digest") else folded
+        if len(digest) > DIGEST_MAX_CHARS:
+            digest = "…" + digest[-(DIGEST_MAX_CHARS - 1):]
+        entry["history_digest"] = digest
+        self.log.info(f"カノン {entry['id']} の履歴を畳み込み: {len(old)}件をアーカイブへ")
+        return True
+
+    def compact_all(self) -> int:
+        """全エントリの畳み込みとトークン数の更新（既存データ向け）。畳み込んだ件数を返す"""
+        changed = []
+        compacted = 0
+        for entry in self.entries:
+            folded = self._compact_entry(entry)
+            compacted += folded
+            tokens = _entry_tokens(entry)
+            if folded or entry.get("tokens") != tokens:
+                entry["tokens"] = tokens
+                changed.append(entry)
+        if changed:
+            self._save_index(changed=changed)
+            self.archive.sync()
+        return compacted
+
+    def get_full_history(self, canon_id: str) -> list[dict]:
+        """アーカイブ済みの分も含めた全履歴（古い順）"""
+        entry = self.get_entry_by_id(canon_id) or {}
+        archived = [h for rec in self.archive.read() if rec.get("id") == canon_id for h in rec.get("history", [])]
+        history = list(entry.get("history", []))
+        pinned = _pinned_count(history)  # 初期設定は畳み込まれないため、アーカイブより前に置く
+        return history[:pinned] + archived + history[pinned:]
+
+    def total_tokens(self) -> int:
+        return sum(e.get("tokens", 0) for e in self.entries)
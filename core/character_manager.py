@@ -1,10 +1,24 @@
 # core/character_manager.py
-import json
+import atexit
+import copy
 import uuid
+import weakref
 from datetime import datetime
+from types import MappingProxyType
 from core.base_manager import BaseManager
+from core.storage import get_storage
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
+from infra.write_behind import get_write_behind
+
+# 終了時に未保存のキャラクターを書き出す対象（フックは1回だけ登録し、マネージャは弱参照で持つ）
+_managers: "weakref.WeakSet[CharacterManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_characters():
+    for mgr in list(_managers):
+        mgr.flush_characters(sync=True)
 
 
 class CharacterManager(BaseManager):
@@ -14,16 +28,23 @@ class CharacterManager(BaseManager):
         self.index_file = None
         self.entries = []
         self.log = get_logger("CharacterManager")
+        # キャラクターファイルのキャッシュ（パス → 正規化済みデータ）と未保存のパス
+        self._char_cache: dict = {}
+        self._char_versions: dict = {}
+        self._dirty: set = set()
+        _managers.add(self)
 
 
     def set_worldview_id(self, wid: str):
         """worldview_id を切り替えて再初期化"""
+        changed = wid != self.worldview_id
         self.worldview_id = wid
         self.base_dir = get_data_path(f"worlds/{wid}/characters")
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.index_file = self.base_dir / "character_index.json"
-        self.entries = self._load_index()
-        self.log.info(f"CharacterManager: worldview_id を {wid} に切り替えました")
+        self._switch_index()
+        if changed:
+            self.log.info(f"CharacterManager: worldview_id を {wid} に切り替えました")
 
 
     def create_character(self, name: str, data: dict, tags: list[str] = None, notes: str = "") -> str:
@@ -35,6 +56,7 @@ class CharacterManager(BaseManager):
 
         data["id"] = char_id
         self.save_character_file(char_id, data)
+        self.flush_characters(sync=True)
 
         entry = {
             "id": char_id,
@@ -45,33 +67,70 @@ class CharacterManager(BaseManager):
             "level": data.get("level")
         }
 
-        self.entries.append(entry)
-        self._save_index()
+        self._add_entry(entry)
+        self._save_index(changed=[entry])
         self.log.info(f"キャラクター作成: {name} (id={char_id})")
         return char_id
 
-    def save_character_file(self, char_id: str, data: dict):
-        path = self.base_dir / f"{char_id}.json"
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    # ---- キャラクターファイル（キャッシュ経由） ----
+    def _char_path(self, char_id: str):
+        return self.base_dir / f"{char_id}.json"
+
+    def _cached_character(self, char_id: str) -> dict:
+        """キャッシュ上のデータ（初回のみ読み込み・正規化）。呼び出し側で変更しないこと"""
+        path = self._char_path(char_id)
+        data = self._char_cache.get(path)
+        if data is None:
+            data = get_storage().load_document(path)
+            if data is None:
+                raise FileNotFoundError(f"キャラクターファイルが見つかりません: {char_id}")
+            # itemsを統一形式に変換
+            data["items"] = self._normalize_items(data.get("items", []))
+            self._char_cache[path] = data
+        return data
 
+    def save_character_file(self, char_id: str, data: dict):
+        """キャッシュを更新して未保存にする（書き込みは flush_characters でまとめて行う）"""
+        path = self._char_path(char_id)
+        self._char_cache[path] = copy.deepcopy(data)
+        self._char_versions[path] = self._char_versions.get(path, 0) + 1
+        self._dirty.add(path)
 
     def load_character_file(self, char_id: str) -> dict:
-        path = self.base_dir / f"{char_id}.json"
-        if not path.exists():
-            raise FileNotFoundError(f"キャラクターファイルが見つかりません: {char_id}")
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # itemsを統一形式に変換
-        data["items"] = self._normalize_items(data.get("items", []))
-        return data
-
+        """書き換え用のコピーを返す（変更は save_character_file で反映）"""
+        return copy.deepcopy(self._cached_character(char_id))
+
+    def view_character(self, char_id: str) -> MappingProxyType:
+        """読み取り専用のビューを返す（コピーなし）"""
+        return MappingProxyType(self._cached_character(char_id))
+
+    def character_version(self, char_id: str) -> int:
+        """save_character_file のたびに増える版数（未保存の変更を含めた変更検知用）"""
+        return self._char_versions.get(self._char_path(char_id), 0)
+
+    def flush_characters(self, sync: bool = False):
+        """
+        未保存のキャラクターファイルをまとめて書き込む。
+        sync=True なら書き込み待ちにせずディスクまで書く（ステップの外での更新・セッションの区切り用）
+        """
+        if not self._dirty:
+            return
+        storage = get_storage()
+        paths = sorted(self._dirty)
+        with storage.transaction():
+            for path in paths:
+                storage.save_document(path, self._char_cache[path])
+        self.log.debug(f"キャラクターファイル保存: {len(paths)} 件")
+        self._dirty.clear()
+        if sync:
+            for path in paths:
+                get_write_behind().flush(path)
 
     def delete_character(self, char_id: str) -> bool:
-        file_path = self.base_dir / f"{char_id}.json"
-        if file_path.exists():
-            file_path.unlink()
+        path = self._char_path(char_id)
+        self._char_cache.pop(path, None)
+        self._dirty.discard(path)
+        if get_storage().delete_document(path):
             self.log.info(f"キャラクターファイル削除: {char_id}")
         return self.delete_entry_by_id(char_id)
 
@@ -84,6 +143,7 @@ class CharacterManager(BaseManager):
             data = self.load_character_file(char_id)
             data["name"] = new_name
             self.save_character_file(char_id, data)
+            self.flush_characters(sync=True)
 
             # インデックス上の表示名も更新
             self.update_character_entry(char_id, {"name": new_name})
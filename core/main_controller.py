@@ -17,6 +17,13 @@ class MainController:
         self._scenario_handler = None
 
     def step(self, progress_info: dict, player_input: str) -> tuple[dict, str]:
+        try:
+            return self._step(progress_info, player_input)
+        finally:
+            # 1ステップ中のキャラクター更新はここでまとめて保存する
+            self.ctx.character_mgr.flush_characters()
+
+    def _step(self, progress_info: dict, player_input: str) -> tuple[dict, str]:
         phase = progress_info.get("phase", "prologue")
 
         if phase == "scenario":
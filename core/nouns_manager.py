@@ -1,12 +1,18 @@
 # core/nouns_manager.py
 import uuid
 from core.base_manager import BaseManager
-from collections import defaultdict
 from datetime import datetime
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
 
 
+def _ngrams(text: str) -> set[str]:
+    """部分一致検索用の 1-gram + 2-gram（日本語の名前は分かち書きできないため文字単位）"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
 class NounsManager(BaseManager):
     def __init__(self):
         self.wid = None
@@ -16,11 +22,13 @@ class NounsManager(BaseManager):
         self.index_file = None
 
     def set_worldview_id(self, wid: str):
+        changed = wid != self.wid
         self.wid = wid
         self.base_dir = get_data_path(f"worlds/{wid}/nouns")
         self.index_file = self.base_dir / "nouns_index.json"
-        self.entries = self._load_index()
-        self.log.info(f"NounsManager: worldview_id を {wid} に切り替えました")
+        self._switch_index()
+        if changed:
+            self.log.info(f"NounsManager: worldview_id を {wid} に切り替えました")
         
     def create_noun(self, name: str, type: str, tags: list[str] = None,
                     category: str = "", notes: str = "", fame: int = 25,
@@ -44,8 +52,8 @@ class NounsManager(BaseManager):
             "created": created
         }
 
-        self.entries.append(entry)
-        self._save_index()
+        self._add_entry(entry)
+        self._save_index(changed=[entry])
         self.log.info(f"固有名詞作成: {name} (id={noun_id}, type={type}, fame={fame})")
         return noun_id
 
@@ -61,19 +69,80 @@ class NounsManager(BaseManager):
     def update_details(self, noun_id: str, new_details: dict) -> bool:
         return self.update_entry(noun_id, {"details": new_details})
 
+    # ---- 二次索引（type / tag / category / 名前の n-gram / fame 順） ----
+    # 各索引は キー → {id(entry): entry}（挿入順を保つ dict を順序付き集合として使う）
+    def _rebuild_secondary(self):
+        self._by_type: dict[str, dict] = {}
+        self._by_tag: dict[str, dict] = {}
+        self._by_category: dict[str, dict] = {}
+        self._by_gram: dict[str, dict] = {}
+        self._lower_names: dict[int, str] = {}
+        self._fame_sorted: dict[bool, list[dict]] = {}
+        for e in self._entries:
+            self._index_secondary(e)
+
+    def _secondary_keys(self, entry: dict):
+        yield self._by_type, entry.get("type", "未分類")
+        yield self._by_category, entry.get("category", "")
+        for tag in set(entry.get("tags", [])):
+            yield self._by_tag, tag
+
+    def _index_secondary(self, entry: dict):
+        key = id(entry)
+        for index, k in self._secondary_keys(entry):
+            index.setdefault(k, {})[key] = entry
+        name = entry.get("name", "").lower()
+        self._lower_names[key] = name
+        for g in _ngrams(name):
+            self._by_gram.setdefault(g, {})[key] = entry
+        self._fame_sorted = {}
+
+    def _unindex_secondary(self, entry: dict):
+        key = id(entry)
+        for index, k in self._secondary_keys(entry):
+            bucket = index.get(k)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del index[k]
+        for g in _ngrams(self._lower_names.pop(key, "")):
+            bucket = self._by_gram.get(g)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._by_gram[g]
+        self._fame_sorted = {}
+
     def filter_by_type(self, type_name: str) -> list[dict]:
-        return [e for e in self.entries if e.get("type") == type_name]
+        return list(self._by_type.get(type_name, {}).values())
 
     def filter_by_tag(self, tag: str) -> list[dict]:
-        return [e for e in self.entries if tag in e.get("tags", [])]
+        return list(self._by_tag.get(tag, {}).values())
+
+    def filter_by_category(self, category: str) -> list[dict]:
+        return list(self._by_category.get(category, {}).values())
 
     def search_nouns_by_name(self, keyword: str) -> list[dict]:
-        return [e for e in self.entries if keyword.lower() in e.get("name", "").lower()]
+        keyword = keyword.lower()
+        if not keyword:
+            return list(self.entries)
+        grams = [keyword] if len(keyword) == 1 else [keyword[i:i + 2] for i in range(len(keyword) - 1)]
+        buckets = [self._by_gram.get(g) for g in grams]
+        if any(b is None for b in buckets):
+            return []
+        # 最小の候補集合から、全 n-gram を含み実際に部分一致するものだけ残す
+        smallest = min(buckets, key=len)
+        return [e for k, e in smallest.items() if keyword in self._lower_names[k]]
 
     def get_grouped_by_type(self) -> dict[str, list[dict]]:
-        grouped = defaultdict(list)
-        for e in self.entries:
-            grouped[e.get("type", "未分類")].append
+        return {t: list(bucket.values()) for t, bucket in self._by_type.items()}
+
+    def sorted_by_fame(self, descending: bool = True) -> list[dict]:
+        """fame 順の一覧（entries の並びは変えない。変更があるまで結果を使い回す）"""
+        hit = self._fame_sorted.get(descending)
+        if hit is None:
+            hit = self._fame_sorted[descending] = sorted(self._entries, key=lambda e: e.get("fame", 0), reverse=descending)
+        return list(hit)
 
     def sort_index_by_fame(self, ascending: bool = True) -> None:
         """
@@ -82,5 +151,6 @@ class NounsManager(BaseManager):
         """
         # デフォルト値は 0 にしておく（fame 未設定対策）
         self.entries.sort(key=lambda e: e.get("fame", 0), reverse=not ascending)
+        self._rebuild_secondary()  # 索引内の並びも entries に合わせる
         self._save_index()
         self.log.info(f"nouns_index を fame {'昇順' if ascending else '降順'} に並び替えました")
@@ -7,6 +7,7 @@ from datetime import datetime
 from pathlib import Path
 
 from core.base_manager import BaseManager
+from core.storage import get_storage
 from infra.path_helper import get_data_path
 
 
@@ -35,8 +36,8 @@ class SessionManager(BaseManager):
             "created": created
         }
 
-        self.entries.append(entry)
-        self._save_index()
+        self._add_entry(entry)
+        self._save_index(changed=[entry])
         self.active_session_id = sid
 
         session_dir = get_data_path(f"worlds/{worldview_id}/sessions/{sid}")
@@ -66,8 +67,8 @@ class SessionManager(BaseManager):
             "cloned_from": old_sid
         }
 
-        self.entries.append(new_entry)
-        self._save_index()
+        self._add_entry(new_entry)
+        self._save_index(changed=[new_entry])
         self.active_session_id = new_sid
 
         to_dir = get_data_path(f"worlds/{worldview_id}/sessions/{new_sid}")
@@ -127,6 +128,7 @@ class SessionManager(BaseManager):
                 self.active_session_id = "default"
 
             session_dir = get_data_path(f"worlds/{worldview_id}/sessions/{sid}")
+            get_storage().drop_tree(session_dir)
             if session_dir.exists():
                 shutil.rmtree(session_dir)
                 self.log.info(f"セッションディレクトリを削除しました: {session_dir}")
@@ -2,6 +2,7 @@ from pathlib import Path
 import json
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
+from infra.write_behind import write_json
 
 class SessionState:
     def __init__(self):
@@ -49,9 +50,8 @@ class SessionState:
             "last_session": self.last_session
         }
         try:
-            self._state_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self._state_path, "w", encoding="utf-8") as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
+            # 中断検出に使うので遅延させずに書く（原子的書き込み）
+            write_json(self._state_path, state, defer=False)
         except Exception as e:
             self.log.warning(f"状態保存失敗: {e}")
 
@@ -0,0 +1,269 @@
+# core/storage.py
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from infra.path_helper import get_data_base, get_data_path
+from infra.write_behind import file_stamp, get_write_behind, json_exists, read_json, write_json
+from infra.logging import get_logger
+
+log = get_logger("Storage")
+
+
+def _relkey(path: Path) -> str:
+    """data/ からの相対パス（SQLite 側のキー。JSON ツリーと1対1に対応させる）"""
+    path = Path(path)
+    try:
+        return path.relative_to(get_data_base()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+class JsonStorage:
+    """
+    従来どおりの JSON ファイル保存（既定）
+    書き込みは write-behind キュー経由（tmp → os.replace の原子的書き込み、連続更新は1回にまとめる）
+    """
+
+    name = "json"
+
+    def load_index(self, index_file: Path) -> list:
+        return read_json(index_file, default=[])
+
+    def save_index(self, index_file: Path, entries: list, changed=None, deleted=None):
+        write_json(index_file, entries)
+
+    def load_document(self, path: Path) -> dict | None:
+        return read_json(path)
+
+    def save_document(self, path: Path, data: dict):
+        write_json(path, data)
+
+    def delete_document(self, path: Path) -> bool:
+        existed = json_exists(path)
+        get_write_behind().cancel(path)
+        Path(path).unlink(missing_ok=True)
+        return existed
+
+    def drop_tree(self, dir_path: Path):
+        # ディレクトリ自体は呼び出し側で消す。書き込み待ちが後から復活させないよう破棄だけする
+        get_write_behind().cancel(dir_path)
+
+    def stamp(self, path: Path) -> tuple | None:
+        # 自分で書いた内容のままなら、書き込み待ちでも書き込み後でも同じ版数を返す（flush で再読込させない）
+        version = get_write_behind().version(path)
+        if version is not None:
+            return ("version", version)
+        return file_stamp(path)
+
+    def transaction(self):
+        return nullcontext()
+
+
+class SqliteStorage:
+    """
+    SQLite（WAL）保存
+    - 索引は collection（= 元の JSON ファイルの相対パス）ごとに1エントリ1行。変更分だけ upsert/delete する
+    - キャラクターファイル等の単体 JSON は documents テーブル
+    - type / tag での絞り込みはマネージャ側のメモリ上の二次索引で行うため、列・別テーブルには持たない
+    """
+
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        collection TEXT NOT NULL,
+        id         TEXT NOT NULL,
+        position   INTEGER NOT NULL,
+        data       TEXT NOT NULL,
+        PRIMARY KEY (collection, id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_entries_position ON entries(collection, position);
+    -- 旧スキーマの集計用索引（参照されないまま書き込みだけ増えるため廃止）
+    DROP INDEX IF EXISTS idx_entries_type;
+    DROP TABLE IF EXISTS entry_tags;
+    CREATE TABLE IF NOT EXISTS collections (
+        collection TEXT PRIMARY KEY,
+        version    INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS documents (
+        key     TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        data    TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, db_path: Path | None = None):
+        self.db_path = Path(db_path) if db_path else get_data_path("shelves.db")
+        self._lock = threading.RLock()
+        self._depth = 0
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        log.info(f"SQLite ストレージを開きました: {self.db_path}")
+
+    # ---- トランザクション（入れ子は外側にまとめる） ----
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            outer = self._depth == 0
+            if outer:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outer:
+                    self.conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outer:
+                self.conn.execute("COMMIT")
+
+    def _bump(self, collection: str):
+        self.conn.execute(
+            "INSERT INTO collections(collection, version) VALUES(?, 1) "
+            "ON CONFLICT(collection) DO UPDATE SET version = version + 1",
+            (collection,),
+        )
+
+    # ---- 索引 ----
+    def load_index(self, index_file: Path) -> list:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT data FROM entries WHERE collection = ? ORDER BY position", (_relkey(index_file),)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def _upsert(self, collection: str, entry: dict):
+        self.conn.execute(
+            "INSERT INTO entries(collection, id, position, data) VALUES("
+            " ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM entries WHERE collection = ?), ?) "
+            "ON CONFLICT(collection, id) DO UPDATE SET data = excluded.data",
+            (collection, entry.get("id"), collection, json.dumps(entry, ensure_ascii=False)),
+        )
+
+    def _delete(self, collection: str, eid: str):
+        self.conn.execute("DELETE FROM entries WHERE collection = ? AND id = ?", (collection, eid))
+
+    def save_index(self, index_file: Path, entries: list, changed=None, deleted=None):
+        """
+        changed / deleted が渡されればその分だけ反映（索引の大きさに依存しない）。
+        どちらも無ければ collection 全体を entries で置き換える（並び替え等）。
+        """
+        collection = _relkey(index_file)
+        with self.transaction():
+            if changed is None and deleted is None:
+                self.conn.execute("DELETE FROM entries WHERE collection = ?", (collection,))
+                for entry in entries:
+                    self._upsert(collection, entry)
+            else:
+                for eid in deleted or []:
+                    self._delete(collection, eid)
+                for entry in changed or []:
+                    self._upsert(collection, entry)
+            self._bump(collection)
+
+    # ---- 単体ドキュメント ----
+    def load_document(self, path: Path) -> dict | None:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM documents WHERE key = ?", (_relkey(path),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_document(self, path: Path, data: dict):
+        with self.transaction():
+            self.conn.execute(
+                "INSERT INTO documents(key, version, data) VALUES(?, 1, ?) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1, data = excluded.data",
+                (_relkey(path), json.dumps(data, ensure_ascii=False)),
+            )
+
+    def delete_document(self, path: Path) -> bool:
+        with self.transaction():
+            cur = self.conn.execute("DELETE FROM documents WHERE key = ?", (_relkey(path),))
+        return cur.rowcount > 0
+
+    def drop_tree(self, dir_path: Path):
+        """ディレクトリ削除に合わせて、その配下に相当する行を消す"""
+        prefix = _relkey(dir_path).rstrip("/") + "/"
+        like = prefix.replace("%", r"\%").replace("_", r"\_") + "%"
+        with self.transaction():
+            for table, col in (("entries", "collection"), ("collections", "collection"), ("documents", "key")):
+                self.conn.execute(f"DELETE FROM {table} WHERE {col} LIKE ? ESCAPE '\\'", (like,))
+
+    def stamp(self, path: Path) -> tuple | None:
+        """変更検知用の版数（collection / document ごとに書き込みで増える）。DB に無いパスはファイルの mtime/size"""
+        key = _relkey(path)
+        with self._lock:
+            row = self.conn.execute("SELECT version FROM collections WHERE collection = ?", (key,)).fetchone()
+            if row is None:
+                row = self.conn.execute("SELECT version FROM documents WHERE key = ?", (key,)).fetchone()
+        return ("sqlite", row[0]) if row else file_stamp(path)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_storage = JsonStorage()
+
+
+def get_storage():
+    return _storage
+
+
+def set_storage(storage):
+    """起動時（マネージャ生成前）に保存先を切り替える"""
+    global _storage
+    _storage = storage
+    log.info(f"ストレージ: {storage.name}")
+
+
+def create_storage(name: str):
+    if name == "sqlite":
+        return SqliteStorage()
+    return JsonStorage()
+
+
+def migrate_json_to_sqlite(db_path: Path | None = None) -> dict:
+    """
+    data/worlds 以下の JSON 索引とキャラクターファイルを SQLite へ一括移行する（JSON 側は残す）。
+    戻り値: {"collections": 件数, "entries": 件数, "documents": 件数}
+    """
+    src = JsonStorage()
+    dst = SqliteStorage(db_path)
+    worlds = get_data_base() / "worlds"
+    counts = {"collections": 0, "entries": 0, "documents": 0}
+
+    index_files = [worlds / "worldview_index.json", worlds / "session_index.json"]
+    index_files += sorted(worlds.glob("*/nouns/nouns_index.json"))
+    index_files += sorted(worlds.glob("*/characters/character_index.json"))
+    index_files += sorted(worlds.glob("*/sessions/*/canon/canon_index.json"))
+
+    with dst.transaction():
+        for index_file in index_files:
+            if not index_file.exists():
+                continue
+            entries = src.load_index(index_file)
+            dst.save_index(index_file, entries)
+            counts["collections"] += 1
+            counts["entries"] += len(entries)
+
+        for char_file in sorted(worlds.glob("*/characters/*.json")):
+            if char_file.name == "character_index.json":
+                continue
+            dst.save_document(char_file, src.load_document(char_file))
+            counts["documents"] += 1
+
+    dst.close()
+    log.info(f"JSON → SQLite 移行完了: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    # python -m core.storage  … data/ 以下を data/shelves.db へ移行
+    print(migrate_json_to_sqlite())
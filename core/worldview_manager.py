@@ -4,6 +4,7 @@ import uuid
 from datetime import datetime
 
 from core.base_manager import BaseManager
+from core.storage import get_storage
 from infra.path_helper import get_data_path
 
 
@@ -43,8 +44,8 @@ class WorldviewManager(BaseManager):
             "session_count": 0
         }
 
-        self.entries.append(entry)
-        self._save_index()
+        self._add_entry(entry)
+        self._save_index(changed=[entry])
 
         dir_path = self.base_dir / wid
         for sub in ["sessions", "characters", "nouns"]:
@@ -60,6 +61,7 @@ class WorldviewManager(BaseManager):
         success = self.delete_entry_by_id(wid)
         if success:
             dir_path = self.base_dir / wid
+            get_storage().drop_tree(dir_path)
             if dir_path.exists():
                 from shutil import rmtree
                 rmtree(dir_path)
@@ -0,0 +1,96 @@
+# infra/jsonl_journal.py
+import json
+import os
+import time
+from pathlib import Path
+
+from infra.logging import get_logger
+
+log = get_logger("JsonlJournal")
+
+# fsync をまとめる単位（件数・経過秒のどちらかに達したら実行）
+DEFAULT_FSYNC_EVERY = 8
+DEFAULT_FSYNC_INTERVAL_SEC = 2.0
+
+
+def atomic_write_text(path: Path, text: str, fsync: bool = True):
+    """一時ファイルに書いてから os.replace で差し替える（途中で落ちても旧内容が残る）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonlJournal:
+    """
+    追記専用の JSON Lines ファイル
+    - append は1行書くだけ（O(1)）。OS へは毎回 flush、fsync は件数/時間でまとめて行う
+    - 末尾の書きかけ行（クラッシュ時）は読み込み時に読み飛ばす
+    - rewrite で全体を原子的に置き換える（コンパクション用）
+    """
+
+    def __init__(self, path: Path, fsync_every: int = DEFAULT_FSYNC_EVERY,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL_SEC):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._fh = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.line_count = 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def read(self) -> list:
+        if not self.path.exists():
+            self.line_count = 0
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    log.warning(f"壊れた行を読み飛ばしました: {self.path.name}:{lineno}")
+        self.line_count = len(records)
+        return records
+
+    def append(self, record):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self.line_count += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """未 fsync の追記をディスクへ確定させる"""
+        if self._fh is not None and self._pending:
+            os.fsync(self._fh.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def rewrite(self, records: list):
+        """内容を records で原子的に置き換える"""
+        self.close()
+        text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        atomic_write_text(self.path, text)
+        self.line_count = len(records)
+
+    def close(self):
+        if self._fh is not None:
+            self.sync()
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,201 @@
+# infra/write_behind.py
+import atexit
+import json
+import threading
+import time
+from pathlib import Path
+
+from infra.jsonl_journal import atomic_write_text
+from infra.logging import get_logger
+
+log = get_logger("WriteBehind")
+
+# 同じファイルへの連続更新をまとめる待ち時間（最初の更新からこの秒数後に1回だけ書く）
+DEFAULT_DELAY_SEC = 0.3
+
+
+def file_stamp(path: Path) -> tuple | None:
+    """ファイルの (mtime_ns, size)。無ければ None"""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class WriteBehindQueue:
+    """
+    ファイル単位の遅延書き込みキュー
+    - submit した内容はすぐには書かず、delay 秒後にワーカースレッドが原子的に書き込む
+    - その間に同じパスへ submit されたら内容だけ差し替える（N 回の更新 → 1 回の書き込み）
+    - 書き込み待ち・書き込み中の内容は pending_text で読める（自分の書いた内容が必ず読める）
+    - ディスク I/O（書き込み・fsync）はロックの外で行い、同じパスへの書き込みは1本ずつ版数順に流す
+    """
+
+    def __init__(self, delay: float = DEFAULT_DELAY_SEC, fsync: bool = True):
+        self.delay = delay
+        self.fsync = fsync
+        self._cond = threading.Condition()
+        self._pending: dict[Path, tuple[float, str, int]] = {}  # path → (期限, 本文, 版数)
+        self._inflight: dict[Path, tuple[str, int]] = {}        # path → (本文, 版数)：書き込み中
+        self._written: dict[Path, tuple[int, tuple]] = {}       # path → (版数, 書いた直後の mtime/size)
+        self._seq = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="WriteBehind", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: Path, text: str):
+        path = Path(path)
+        with self._cond:
+            self._seq += 1
+            old = self._pending.get(path)
+            deadline = old[0] if old else time.monotonic() + self.delay
+            self._pending[path] = (deadline, text, self._seq)
+            closed = self._closed
+            self._cond.notify_all()
+        if closed:
+            self._write(path)
+
+    def write_now(self, path: Path, text: str):
+        """待たずに書く（書き込み待ちの古い内容は破棄される）"""
+        self.submit(path, text)
+        self._write(Path(path))
+
+    def pending_text(self, path: Path) -> str | None:
+        item = self._lookup(Path(path))
+        return item[0] if item else None
+
+    def version(self, path: Path) -> int | None:
+        """
+        path の版数。書き込み待ち・書き込み中ならその版数、
+        書き込み後にファイルが外から変更されていなければ最後に書いた版数（flush を挟んでも変わらない）
+        """
+        path = Path(path)
+        item = self._lookup(path)
+        if item is not None:
+            return item[1]
+        with self._cond:
+            written = self._written.get(path)
+        if written is not None and file_stamp(path) == written[1]:
+            return written[0]
+        return None
+
+    def _lookup(self, path: Path) -> tuple[str, int] | None:
+        with self._cond:
+            item = self._pending.get(path)
+            if item is not None:
+                return item[1], item[2]
+            return self._inflight.get(path)
+
+    def cancel(self, path: Path):
+        """path 自身と、その配下の書き込み待ちを破棄する（削除するファイル・ディレクトリ用）"""
+        path = Path(path)
+
+        def matches(p: Path) -> bool:
+            return p == path or path in p.parents
+
+        with self._cond:
+            for p in [p for p in self._pending if matches(p)]:
+                del self._pending[p]
+            for p in [p for p in self._written if matches(p)]:
+                del self._written[p]
+            # 書き込み中のものは終わるまで待つ（呼び出し側の削除の後で書き戻されないように）
+            while any(matches(p) for p in self._inflight):
+                self._cond.wait()
+
+    def flush(self, path: Path | None = None):
+        """書き込み待ちを今すぐ書く（path 指定時はそのファイルだけ）"""
+        with self._cond:
+            targets = [Path(path)] if path is not None else list(self._pending)
+        for p in targets:
+            self._write(p)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
+
+    def _write(self, path: Path):
+        with self._cond:
+            # 同じパスの書き込みは1本ずつ（先の書き込みが後の内容を上書きしないように）
+            while path in self._inflight:
+                self._cond.wait()
+            item = self._pending.pop(path, None)
+            if item is None:
+                return
+            _, text, seq = item
+            self._inflight[path] = (text, seq)
+        stamp = None
+        try:
+            atomic_write_text(path, text, fsync=self.fsync)
+            stamp = file_stamp(path)
+        except Exception as e:
+            log.error(f"書き込み失敗: {path}: {e}")
+        finally:
+            with self._cond:
+                del self._inflight[path]
+                if stamp is not None:
+                    self._written[path] = (seq, stamp)
+                else:
+                    self._written.pop(path, None)
+                self._cond.notify_all()
+
+    def _next_due(self) -> Path | None:
+        """期限の来たパスを返す（書き込み中のパスは後回し）。閉じられて空なら None"""
+        with self._cond:
+            while True:
+                ready = {p: v for p, v in self._pending.items() if p not in self._inflight}
+                if not ready:
+                    if self._closed and not self._pending:
+                        return None
+                    self._cond.wait()
+                    continue
+                path, (deadline, _, _) = min(ready.items(), key=lambda kv: kv[1][0])
+                now = time.monotonic()
+                if deadline > now:
+                    self._cond.wait(deadline - now)
+                    continue
+                return path
+
+    def _run(self):
+        while True:
+            path = self._next_due()
+            if path is None:
+                return
+            self._write(path)
+
+
+_queue = WriteBehindQueue()
+atexit.register(_queue.close)
+
+
+def get_write_behind() -> WriteBehindQueue:
+    return _queue
+
+
+def write_json(path: Path, data, defer: bool = True, indent: int | None = 2):
+    """
+    JSON を原子的に書く（tmp → os.replace）。
+    defer=True なら書き込みキューに載せ、短時間の連続更新を1回の書き込みにまとめる。
+    """
+    text = json.dumps(data, ensure_ascii=False, indent=indent)
+    if defer:
+        _queue.submit(path, text)
+    else:
+        _queue.write_now(path, text)
+
+
+def read_json(path: Path, default=None):
+    """書き込み待ちがあればそれを、無ければファイルを読む"""
+    text = _queue.pending_text(path)
+    if text is None:
+        path = Path(path)
+        if not path.exists():
+            return default
+        text = path.read_text(encoding="utf-8")
+    return json.loads(text)
+
+
+def json_exists(path: Path) -> bool:
+    return _queue.pending_text(path) is not None or Path(path).exists()
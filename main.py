@@ -15,8 +15,13 @@ from core.nouns_manager import NounsManager
 from core.character_manager import CharacterManager
 from core.canon_manager import CanonManager
 from core.dice import roll_dice
+from core.storage import create_storage, set_storage
 
 from ai.chat_engine import ChatEngine
+from ai.response_cache import ResponseCache, DEFAULT_CACHE_TTLS
+from ai.async_chat_engine import AsyncChatEngine
+
+from phases.scenario.gameflow.streaming import STREAMED_FLAG
 
 from infra.path_helper import get_data_path, get_resource_path
 from infra.logging import get_logger, set_debug_enabled
@@ -28,6 +33,9 @@ os.environ["KIVY_NO_ARGS"] = "1"#kivyがargparseを無視するように
 
 log = get_logger("Main")
 
+# 作成した AppContext（終了時に非同期エンジンを閉じる）
+_contexts: list[AppContext] = []
+
 def init_engine_with_retry(ui, state: SessionState, args, interrupted_session):
     """
     非同期でAPIキーとネットワークを検証し、成功したらctxとcontrollerを作ってrun_loop開始。
@@ -61,21 +69,34 @@ def init_engine_with_retry(ui, state: SessionState, args, interrupted_session):
             return
 
         try:
-            engine = ChatEngine(api_key_path=api_key_path, debug=args.debug)
+            engine = ChatEngine(
+                api_key_path=api_key_path,
+                debug=args.debug,
+                cache=ResponseCache(ttls=DEFAULT_CACHE_TTLS) if args.response_cache else None,
+            )
             ui.safe_print("System","APIキーとネットワークの検証に成功しました。")
             if args.debug:
                 ui.safe_print("System", "［Debug］デバッグモード有効")
 
             ctx = AppContext(
                 engine=engine,
+                async_engine_factory=lambda: AsyncChatEngine(api_key_path=api_key_path, debug=args.debug,
+                                                             cache=engine.cache, rate_limiter=engine.rate_limiter),
                 ui=ui,
                 state=state,
                 worldview_mgr=WorldviewManager(),
                 session_mgr=SessionManager(),
                 character_mgr=CharacterManager(),
                 nouns_mgr=NounsManager(),
-                canon_mgr=CanonManager()
+                canon_mgr=CanonManager(),
+                options={
+                    "combined_intent": args.combined_intent,
+                    "speculative_director": args.speculative_director,
+                    "prefetch_chapter": args.prefetch_chapter,
+                    "prefetch_intro": args.prefetch_intro,
+                },
             )
+            _contexts.append(ctx)
             controller = MainController(ctx, debug=args.debug)
 
             progress_info = {
@@ -144,7 +165,9 @@ def run_loop(ui, controller: MainController, progress_info: dict, last_input: st
             progress_info, output = controller.step(progress_info, current_input)
 
             if output is not None:
-                ui.safe_print("System",output)
+                # ストリーミングで表示済みの本文は再表示しない
+                if not progress_info.get("flags", {}).pop(STREAMED_FLAG, False):
+                    ui.safe_print("System",output)
 
                 if progress_info.get("auto_continue"):
                     wait_sec = progress_info.get("wait_seconds", 1.0)
@@ -175,8 +198,20 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", action="store_true", help="デバッグモードを有効にする")
     parser.add_argument("--ui", choices=["tk", "kivy"], default="kivy", help="UIフレームワークを選択 (tk/kivy)")
+    parser.add_argument("--response-cache", action="store_true", help="LLM応答キャッシュを有効にする（意図分類・返答分類のみ）")
+    parser.add_argument("--combined-intent", action="store_true",
+                        help="意図分類と進行生成を1回のLLM呼び出しにまとめる")
+    parser.add_argument("--speculative-director", action="store_true",
+                        help="意図分類と並行して action 用の進行生成を先行実行する")
+    parser.add_argument("--prefetch-chapter", action="store_true",
+                        help="章の最終セクション中に次章のプランを先行生成する")
+    parser.add_argument("--prefetch-intro", action="store_true",
+                        help="セクション終了を検出した時点で次の導入文を先行生成する")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json",
+                        help="索引・キャラクターの保存先 (json/sqlite)。既存データの移行は python -m core.storage")
     args = parser.parse_args()
     set_debug_enabled(args.debug)
+    set_storage(create_storage(args.storage))
 
     clean_temp_folder()
 
@@ -208,6 +243,9 @@ def main():
         Clock.schedule_once(lambda dt: init_engine_with_retry(ui, state, args, interrupted_session), 0)
         ui.run()
 
+    for ctx in _contexts:
+        ctx.close()
+
 
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
 import unicodedata
 import copy
 import json
+from concurrent.futures import Future
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
 
+# 成長フェーズの開始時に非同期エンジンへ投げた canon 振り分け（session_id → Future）
+# ハンドラはステップごとに作り直されるため、モジュールで保持する
+_canon_selections: dict[str, Future] = {}
+
 class CharacterGrowth:
     def __init__(self, ctx, progress_info):
         self.ctx = ctx
@@ -63,6 +68,7 @@ class CharacterGrowth:
     # イントロ〜レベル
     #==================================================
     def _step_intro(self) -> tuple[dict, str]:
+        self._start_canon_selection()
         self.progress_info["step"] = 10
         self.progress_info["auto_continue"] = True
         return self.progress_info, f"キャラクター『{self.character.get('name', '無名')}』は物語を通じて成長しました。\n\n"
@@ -94,6 +100,7 @@ class CharacterGrowth:
             level = min(level + 1, 15)
             self.character["level"] = level
             self.char_mgr.save_character_file(self.pcid, self.character)
+            self.char_mgr.flush_characters(sync=True)
             msg = f"レベルが {level} に上昇しました。\n\n"
         elif choice == "2":
             msg = "レベルは変更されませんでした。\n\n"
@@ -326,6 +333,7 @@ class CharacterGrowth:
         # 残りを持ち越し保存
         self.character["growth_pool"] = int(remain)
         self.char_mgr.save_character_file(self.pcid, self.character)
+        self.char_mgr.flush_characters(sync=True)
 
         # 次へ（履歴作成フロー）
         self.progress_info["step"] = 30
@@ -360,6 +368,7 @@ class CharacterGrowth:
             if history:
                 self.character.setdefault("history", []).append(history)
                 self.char_mgr.save_character_file(self.pcid, self.character)
+                self.char_mgr.flush_characters(sync=True)
                 self.progress_info["step"] = 100
                 self.progress_info["auto_continue"] = True
                 return self.progress_info, "キャラクターの履歴に成長記録を追加しました。"
@@ -386,6 +395,7 @@ class CharacterGrowth:
         history = {"text": text}
         self.character.setdefault("history", []).append(history)
         self.char_mgr.save_character_file(self.pcid, self.character)
+        self.char_mgr.flush_characters(sync=True)
 
         self.progress_info["step"] = 100
         self.progress_info["auto_continue"] = True
@@ -442,16 +452,8 @@ class CharacterGrowth:
         self.progress_info["step"] = 0
         return self.progress_info, f"[致命的エラー] {message}"
     
-    def _finalize_canon_to_nouns(self):
-        """
-        シナリオ終了時に canon_facts を AI 判定して
-        - 世界観に登録する nouns（最大3件）
-        - 続編用 canon（最大5件）
-        に振り分けて保存する
-        """
-        self.sid = self.flags.get("growth_session_id")
-        self.wid = self.flags.get("growth_worldview_id")
-
+    def _canon_selection_request(self) -> dict | None:
+        """canon 振り分けの呼び出し引数（engine.chat に渡す）。対象の canon が無ければ None"""
         canon_mgr = self.ctx.canon_mgr
         canon_mgr.set_context(self.wid, self.sid)  # ← ここ追加
         nouns_mgr = self.ctx.nouns_mgr
@@ -461,13 +463,13 @@ class CharacterGrowth:
         all_canon = canon_mgr.list_entries()
         if not all_canon:
             self.log.info("処理対象の canon がありません。")
-            return
+            return None
 
         # ギミックは除外
         filtered_canon = [c for c in all_canon if c.get("type") != "ギミック"]
         if not filtered_canon:
             self.log.info("ギミック以外の canon がありません。")
-            return
+            return None
 
         # すでに登録されている nouns を取得
         existing_nouns = nouns_mgr.entries  # すでにロード済みリスト
@@ -565,13 +567,54 @@ canon_facts（これを振り分ける）:
         }
 
 
-        resp = self.ctx.engine.chat(
-            messages=[{"role": "system", "content": system_prompt}],
-            caller_name="FinalizeCanon",
-            model_level="very_high",
-            max_tokens=10000,
-            schema=schema
-        )
+        return {
+            "messages": [{"role": "system", "content": system_prompt}],
+            "caller_name": "FinalizeCanon",
+            "model_level": "very_high",
+            "max_tokens": 10000,
+            "schema": schema,
+        }
+
+    def _start_canon_selection(self):
+        """
+        canon 振り分けを非同期エンジンで始めておく（成長の選択を進めている間に走らせる）。
+        成長フェーズ中は canon・固有名詞・世界観が変わらないので、結果は終了時にそのまま使える
+        """
+        async_engine = getattr(self.ctx, "async_engine", None)
+        if async_engine is None or self.sid in _canon_selections:
+            return
+        try:
+            request = self._canon_selection_request()
+        except Exception as e:
+            self.log.warning(f"canon 振り分けの先行開始に失敗（終了時に生成）: {e}")
+            return
+        if request is not None:
+            _canon_selections[self.sid] = async_engine.submit(async_engine.chat(**request))
+
+    def _finalize_canon_to_nouns(self):
+        """
+        シナリオ終了時に canon_facts を AI 判定して
+        - 世界観に登録する nouns（最大3件）
+        - 続編用 canon（最大5件）
+        に振り分けて保存する
+        """
+        self.sid = self.flags.get("growth_session_id")
+        self.wid = self.flags.get("growth_worldview_id")
+        nouns_mgr = self.ctx.nouns_mgr
+
+        resp = None
+        started = _canon_selections.pop(self.sid, None)
+        if started is not None:
+            try:
+                resp = started.result()
+            except Exception as e:
+                self.log.warning(f"先行した canon 振り分けに失敗（作り直します）: {e}")
+        if resp is None:
+            request = self._canon_selection_request()
+            if request is None:
+                return
+            resp = self.ctx.engine.chat(**request)
+        nouns_mgr.set_worldview_id(self.wid)
 
         try:
             selection = resp  # schema使用時はすでにパース済み
@@ -33,7 +33,7 @@ class ActionCheck:
         is_revision = "action_check_plan" in self.flags
 
         # 会話ログ取得
-        messages = self.convlog.get_slim()
+        messages = self.convlog.get_slim(caller_name="ActionCheck")
 
         # プレプロンプト構築
         pre_snippets = self._render_snippet_group()
@@ -246,7 +246,7 @@ class ActionCheck:
         session = self.ctx.session_mgr.get_entry_by_id(sid)
         pcid = session.get("player_character")
         self.ctx.character_mgr.set_worldview_id(wid)
-        char = self.ctx.character_mgr.load_character_file(pcid)
+        char = self.ctx.character_mgr.view_character(pcid)
 
         FIELD_LABELS = {
             "name": "名前",
@@ -348,7 +348,7 @@ class ActionCheck:
         session = self.ctx.session_mgr.get_entry_by_id(sid)
         pcid = session.get("player_character")
         self.ctx.character_mgr.set_worldview_id(wid)
-        char = self.ctx.character_mgr.load_character_file(pcid)
+        char = self.ctx.character_mgr.view_character(pcid)
 
         checks = {}
         for k, v in char.get("checks", {}).items():
@@ -1,6 +1,15 @@
 # phases/scenario/chapter_generator.py
 import json
+from concurrent.futures import Future
 from infra.path_helper import get_data_path
+from infra.logging import get_logger
+from phases.scenario.retrieval import retrieve_canon, retrieve_nouns
+
+log = get_logger("ChapterGenerator")
+
+# 章プランのプロンプトに載せる件数の上限（章の概要に関連の高いものから選ぶ）
+NOUNS_TOP_K = 30
+CANON_TOP_K = 40
 
 CHAPTER_PLAN_SCHEMA = {
     "type": "json_schema",
@@ -62,15 +71,6 @@ class ChapterGenerator:
 
         ctx.character_mgr.set_worldview_id(wid)
         
-        # nouns, canon はマネージャーに読み込ませる
-        ctx.nouns_mgr.set_worldview_id(wid)
-        self.nouns = ctx.nouns_mgr.list_entries()[:30]
-
-
-        ctx.canon_mgr.set_context(wid, sid)
-        self.canon = ctx.canon_mgr.list_entries()
-
-
         # シナリオ全体の読み込み
         scenario_path = get_data_path(f"worlds/{wid}/sessions/{sid}/scenario.json")
         self.scenario_data = {}
@@ -83,6 +83,15 @@ class ChapterGenerator:
         self.total_chapters = len(self._chapters_all)
         self.is_final_chapter = (self.total_chapters > 0 and self.chapter == self.total_chapters)
 
+        # nouns, canon はマネージャーに読み込ませ、この章の概要に関連の高いものを選ぶ
+        overview = self._chapters_all[chapter - 1] if 0 <= chapter - 1 < len(self._chapters_all) else {}
+        query = "\n".join(str(v) for v in overview.values() if isinstance(v, str))
+        ctx.nouns_mgr.set_worldview_id(wid)
+        self.nouns = retrieve_nouns(ctx.nouns_mgr, query, NOUNS_TOP_K)
+
+        ctx.canon_mgr.set_context(wid, sid)
+        self.canon = retrieve_canon(ctx.canon_mgr, query, CANON_TOP_K)
+
     def generate(self) -> dict:
         """
         次に来るべき章のプランを、構造化JSON（CHAPTER_PLAN_SCHEMA）で生成する。
@@ -101,15 +110,77 @@ class ChapterGenerator:
                 model_level="very_high", 
                 schema=CHAPTER_PLAN_SCHEMA,    # ★ 構造化出力
             )
-
-            if not isinstance(plan, dict):
-                # スキーマ外出力などの保険
-                plan = {"title": "", "flow": [], "canon": [], "error": "invalid schema output"}
-
         except Exception as e:
             # APIやスキーマバリデーション失敗時の保険
             plan = {"title": "", "flow": [], "canon": [], "error": f"generation failed: {e}"}
 
+        return self.finalize(plan)
+
+    # ---- 先読み（前章の最終セクション中に下書きを作っておく） ----
+    def draft_async(self, history: list[dict]) -> Future | None:
+        """
+        前章の進行中のログ（history）を踏まえた下書きを非同期エンジンで生成し始める（保存はしない）。
+        非同期エンジンが無ければ None。結果は章の開始時に finalize() または refine() に渡す。
+        """
+        async_engine = getattr(self.ctx, "async_engine", None)
+        if async_engine is None:
+            return None
+        messages = [
+            {"role": "system", "content": self._system_prompt()},
+            {"role": "user", "content": self._build_prompt() + self._history_block(history, "前章の進行状況（最終セクション進行中）")},
+        ]
+        return async_engine.submit(async_engine.chat(
+            messages=messages,
+            max_tokens=30000,
+            caller_name="ChapterGenerator.draft",
+            model_level="very_high",
+            schema=CHAPTER_PLAN_SCHEMA,
+        ))
+
+    def refine(self, draft: dict, history: list[dict]) -> dict:
+        """
+        下書きの作成後に進んだログ（history）だけを渡し、矛盾する箇所だけを直させる（軽いモデル）。
+        失敗したら下書きをそのまま使う。
+        """
+        messages = [
+            {"role": "system", "content": self._system_prompt()},
+            {"role": "user", "content": (
+                f"以下は第{self.chapter}章の構成の下書きです。\n"
+                f"{json.dumps(draft, ensure_ascii=False)}\n"
+                + self._history_block(history, "下書き作成後に起きた前章の出来事")
+                + "\n\n上記の出来事と矛盾する箇所や、結末を反映すべき箇所だけを修正し、"
+                "それ以外は下書きのまま同じ形式で出力してください。"
+            )},
+        ]
+        try:
+            plan = self.ctx.engine.chat(
+                messages=messages,
+                max_tokens=8000,
+                caller_name="ChapterGenerator.refine",
+                model_level="medium",
+                schema=CHAPTER_PLAN_SCHEMA,
+            )
+        except Exception as e:
+            log.warning(f"章プランの差分調整に失敗（下書きを使用）: {e}")
+            return draft
+        return plan if isinstance(plan, dict) and plan.get("flow") else draft
+
+    @staticmethod
+    def _history_block(history: list[dict], heading: str) -> str:
+        if not history:
+            return ""
+        lines = [f"\n\n## {heading}:"]
+        for m in history:
+            role = "要約" if m.get("role") == "summary" else m.get("role", "")
+            lines.append(f"- {role}: {m.get('content', '')}")
+        return "\n".join(lines)
+
+    def finalize(self, plan) -> dict:
+        """生成結果を検証し、最終章ならエンディングを足して保存する"""
+        if not isinstance(plan, dict):
+            # スキーマ外出力などの保険
+            plan = {"title": "", "flow": [], "canon": [], "error": "invalid schema output"}
+
         # --- 最終章なら固定エンディングセクションを追加 ---
         if getattr(self, "is_final_chapter", False):
             flow = plan.get("flow", [])
@@ -187,7 +258,7 @@ class ChapterGenerator:
         pc = None
         if pcid:
             try:
-                pc = self.ctx.character_mgr.load_character_file(pcid)
+                pc = self.ctx.character_mgr.view_character(pcid)
             except FileNotFoundError:
                 self.ctx.character_mgr.log.warning(f"キャラクターが見つかりません: {pcid}")
 
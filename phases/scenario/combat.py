@@ -90,10 +90,10 @@ class CombatHandler:
         session = self.ctx.session_mgr.get_entry_by_id(sid)
         pcid = session.get("player_character")
         self.ctx.character_mgr.set_worldview_id(wid)
-        self.char = self.ctx.character_mgr.load_character_file(pcid)
+        self.char = self.ctx.character_mgr.view_character(pcid)
 
         # 会話ログ（戦闘前の状況説明）
-        messages = self.convlog.get_slim()
+        messages = self.convlog.get_slim(caller_name="CombatHandler")
 
         # スニペット
         pre_snippets = self._render_snippet_group()
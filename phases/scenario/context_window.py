@@ -0,0 +1,101 @@
+# phases/scenario/context_window.py
+import threading
+
+from ai.token_estimator import estimate_tokens, MESSAGE_OVERHEAD_TOKENS
+from infra.logging import get_logger
+
+log = get_logger("ContextWindow")
+
+# caller ごとの履歴トークン予算（caller 名の完全一致、または "." / ":" より前の接頭辞で引く）
+# 載っていない caller（要約系など）は履歴を全て渡す
+HISTORY_BUDGETS = {
+    "IntentRouter": 3000,
+    "Director": 8000,
+    "Narrator": 6000,
+    "MiscHandler": 6000,
+    "IntroHandler": 6000,
+    "ActionCheck": 4000,
+    "CombatHandler": 4000,
+    "ChapterGenerator": 6000,
+}
+
+# 予算に関わらず必ず残す末尾のメッセージ数（直前のやりとり）
+MIN_RECENT_MESSAGES = 2
+
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def budget_for(caller_name: str | None) -> int | None:
+    if not caller_name:
+        return None
+    if caller_name in HISTORY_BUDGETS:
+        return HISTORY_BUDGETS[caller_name]
+    for sep in (".", ":"):
+        prefix = caller_name.split(sep, 1)[0]
+        if prefix in HISTORY_BUDGETS:
+            return HISTORY_BUDGETS[prefix]
+    return None
+
+
+def _cost(message: dict) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def fit_history(messages: list[dict], budget: int) -> tuple[list[dict], int, int]:
+    """
+    履歴を予算内に詰める。優先順位：
+      1) 末尾の MIN_RECENT_MESSAGES 件（予算超過でも残す）
+      2) 要約（[要約] の system）を新しい順
+      3) それ以外のやりとりを新しい順（収まらなくなった時点で打ち切り、途中の歯抜けは作らない）
+    打ち切った位置が assistant の発言なら、対応する質問が無いのでそれも落とす。
+    戻り値: (詰めた履歴（元の順序）, 元のトークン数, 詰めた後のトークン数)
+    """
+    costs = [_cost(m) for m in messages]
+    total = sum(costs)
+    if total <= budget:
+        return list(messages), total, total
+
+    n = len(messages)
+    keep = set(range(max(0, n - MIN_RECENT_MESSAGES), n))
+    used = sum(costs[i] for i in keep)
+
+    summaries = [i for i in range(n) if i not in keep and messages[i].get("role") == "system"]
+    for i in reversed(summaries):
+        if used + costs[i] <= budget:
+            keep.add(i)
+            used += costs[i]
+
+    for i in reversed(range(n)):
+        if i in keep or i in summaries:
+            continue
+        if used + costs[i] > budget:
+            break
+        keep.add(i)
+        used += costs[i]
+
+    turns = sorted(i for i in keep if i not in summaries)
+    if len(turns) > 1 and messages[turns[0]].get("role") == "assistant" and \
+            any(j not in summaries for j in range(turns[0])):
+        keep.discard(turns[0])
+        used -= costs[turns[0]]
+
+    return [messages[i] for i in sorted(keep)], total, used
+
+
+def record(caller_name: str, before: int, after: int) -> None:
+    key = caller_name.split(".", 1)[0].split(":", 1)[0]
+    with _stats_lock:
+        s = _stats.setdefault(key, {"calls": 0, "tokens_before": 0, "tokens_after": 0, "tokens_saved": 0})
+        s["calls"] += 1
+        s["tokens_before"] += before
+        s["tokens_after"] += after
+        s["tokens_saved"] += before - after
+    if before > after:
+        log.info(f"[{caller_name}] 履歴を予算内に圧縮: {before} → {after} tok（-{before - after}）")
+
+
+def get_window_stats() -> dict:
+    """caller ごとの履歴圧縮の累計（calls / tokens_before / tokens_after / tokens_saved）"""
+    with _stats_lock:
+        return {k: dict(v) for k, v in _stats.items()}
@@ -2,11 +2,70 @@
 
 import os
 import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Literal
 from infra.path_helper import get_data_path
+from infra.jsonl_journal import JsonlJournal, atomic_write_text
+from infra.logging import get_logger
+from phases.scenario import context_window
+from phases.scenario.retrieval import retrieve_canon, retrieve_nouns
+
+log = get_logger("ConversationLog")
 
 Role = Literal["system", "user", "assistant", "summary"]
 
+# スリムログのジャーナルがこの行数を超えたらスナップショットへ畳み込む
+SLIM_COMPACT_EVERY = 200
+
+# 要約ワーカー（1本に直列化：対象の確定 → LLM → 差し込み を順に行うので要約同士が競合しない）
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LogSummary")
+
+# 要約の階層（上ほど粗い）：ターンのブロック → セクション → 章 → セッションのあらすじ
+SUMMARY_LEVELS = ["session", "chapter", "section", "block"]
+SUMMARY_LABELS = {"session": "あらすじ", "chapter": "章の要約", "section": "セクションの要約", "block": "要約"}
+# 各階層の上限（超えた分は畳み込む）
+MAX_BLOCK_SUMMARIES = 4
+MAX_CHAPTER_SUMMARIES = 2
+# 区切りの畳み込みで生のまま残す末尾メッセージ数（直前の1往復）
+KEEP_RECENT_MESSAGES = 2
+
+# 要約の背景情報に載せる固有名詞・カノンの上限（直近のログに関連の高いものから選ぶ）
+CONTEXT_NOUNS_TOP_K = 20
+CONTEXT_CANON_TOP_K = 30
+# 関連度の検索語に使う末尾メッセージ数
+RETRIEVAL_QUERY_MESSAGES = 10
+
+_SUMMARY_BASE = (
+    "あなたはTRPGセッションログの要約専門AIです。\n"
+    "以下の背景情報(世界観、PC、固有名詞、カノン)を考慮し、"
+)
+FOLD_INSTRUCTIONS = {
+    "block": _SUMMARY_BASE + (
+        "会話ログの重要な出来事だけを簡潔に要約してください。\n"
+        "確認応答・雑談・プレイヤーのメタ発言は除外し、進行や展開に関わる事実のみを抽出してください。"
+    ),
+    "section": _SUMMARY_BASE + (
+        "このセクションの要約と会話ログを、セクション全体の要約1つにまとめてください。\n"
+        "重複を除き、進行や展開に関わる事実と、セクションの結末を残してください。"
+    ),
+    "chapter": _SUMMARY_BASE + (
+        "この章のセクション要約と会話ログを、章全体の要約1つにまとめてください。\n"
+        "章の目的がどう達成されたか、登場人物・入手物・判明した事実を中心に残してください。"
+    ),
+    "session": _SUMMARY_BASE + (
+        "これまでのあらすじと章の要約を統合し、セッション全体のあらすじを更新してください。\n"
+        "以後の展開に影響する事実（関係・所持品・未解決の謎）を優先し、細部は省いてください。"
+    ),
+}
+# 階層ごとの (model_level, max_tokens)
+FOLD_CALL_ARGS = {
+    "block": (None, 1500),
+    "section": (None, 1500),
+    "chapter": ("high", 1800),
+    "session": ("high", 1800),
+}
+
 
 class ConversationLog:
     def __init__(self, wid: str, sid: str, ctx=None):
@@ -18,8 +77,21 @@ class ConversationLog:
         self.messages: list[dict] = []
         self.slim_messages: list[dict] = []
 
-        self.path = get_data_path(f"worlds/{wid}/sessions/{sid}/conversation.json")
+        # 全文ログ：追記のみの JSONL（旧 conversation.json は初回読み込み時に移行）
+        self.path = get_data_path(f"worlds/{wid}/sessions/{sid}/conversation.jsonl")
+        self.legacy_path = get_data_path(f"worlds/{wid}/sessions/{sid}/conversation.json")
+        # スリムログ：スナップショット（要約で置き換わった時点の全体）＋ それ以降の追記ジャーナル
         self.slim_path = get_data_path(f"worlds/{wid}/sessions/{sid}/conversation_slim.json")
+        self.slim_journal_path = get_data_path(f"worlds/{wid}/sessions/{sid}/conversation_slim.jsonl")
+
+        self._journal = JsonlJournal(self.path)
+        self._slim_journal = JsonlJournal(self.slim_journal_path)
+        self._slim_seq = 0
+
+        # slim_messages の変更は要約ワーカーの差し込みと競合するため、このロック下で行う
+        self._lock = threading.RLock()
+        self._pending_summary: Future | None = None
+        self._block_job_queued = False
 
         self._load()
         self._load_slim()
@@ -27,118 +99,260 @@ class ConversationLog:
     def append(self, role: Role, content: str):
         entry = {"role": role, "content": content.strip()}
         self.messages.append(entry)
-        self._save()
+        self._journal.append(entry)
 
-        self.slim_messages.append(entry)
+        with self._lock:
+            self.slim_messages.append(entry)
+            self._append_slim(entry)
         self._summarize_if_needed()
-        self._save_slim()
+
+    def flush(self):
+        """まとめ待ちの追記を fsync する"""
+        with self._lock:
+            self._journal.sync()
+            self._slim_journal.sync()
+
+    def wait_pending_summary(self, timeout: float | None = None):
+        """実行中のバックグラウンド要約があれば、差し込みまで待つ"""
+        future = self._pending_summary
+        if future is None:
+            return
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            pass  # 失敗は _on_job_done 側でログ済み
+
+    def close(self):
+        self.wait_pending_summary()
+        with self._lock:
+            self._journal.close()
+            self._slim_journal.close()
 
     def get(self) -> list[dict]:
         return self.messages.copy()
 
-    def get_slim(self) -> list[dict]:
-        """OpenAI互換のメッセージリストを返す（summary → system）"""
+    def get_slim(self, caller_name: str | None = None) -> list[dict]:
+        """
+        OpenAI互換のメッセージリストを返す（summary → system）
+        caller_name を渡すと、context_window.HISTORY_BUDGETS の予算内に新しい順・要約優先で詰める
+        """
         result = []
-        for m in self.slim_messages:
+        with self._lock:
+            slim = list(self.slim_messages)
+        for m in slim:
             role = m["role"]
             content = m["content"]
             if role == "summary":
                 role = "system"
-                content = f"[要約] {content}"
+                content = f"[{SUMMARY_LABELS.get(self._level(m), '要約')}] {content}"
             result.append({"role": role, "content": content})
+
+        budget = context_window.budget_for(caller_name)
+        if budget is None:
+            return result
+        result, before, after = context_window.fit_history(result, budget)
+        context_window.record(caller_name, before, after)
         return result
 
     def _load(self):
-        if os.path.exists(self.path):
-            with open(self.path, encoding="utf-8") as f:
+        if self._journal.exists():
+            self.messages = self._journal.read()
+        elif os.path.exists(self.legacy_path):
+            # 旧形式（JSON配列）→ JSONL へ移行し、旧ファイルは .bak として残す
+            with open(self.legacy_path, encoding="utf-8") as f:
                 self.messages = json.load(f)
+            self._journal.rewrite(self.messages)
+            os.replace(self.legacy_path, f"{self.legacy_path}.bak")
+            log.info(f"会話ログを JSONL へ移行しました: {self.path}")
         else:
             self.messages = []
 
-    def _save(self):
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.messages, f, ensure_ascii=False, indent=2)
-
     def _load_slim(self):
+        messages = []
+        seq = 0
         if os.path.exists(self.slim_path):
             with open(self.slim_path, encoding="utf-8") as f:
-                self.slim_messages = json.load(f)
-        else:
-            self.slim_messages = []
-
-    def _save_slim(self):
-        os.makedirs(os.path.dirname(self.slim_path), exist_ok=True)
-        with open(self.slim_path, "w", encoding="utf-8") as f:
-            json.dump(self.slim_messages, f, ensure_ascii=False, indent=2)
-
-    def _summarize_if_needed(self, block_size=10, summarize_n=5):
-        if not self.engine or not self.ctx:
-            return
-
-        # --- 背景情報を取得 ---
-        wid = self.wid
-        sid = self.sid
-        worldview = self.ctx.worldview_mgr.get_entry_by_id(wid) or {}
-        session = self.ctx.session_mgr.get_entry_by_id(sid) or {}
-
-        pcid = session.get("player_character", {}).get("id") if isinstance(session.get("player_character"), dict) else None
-        pc = self.ctx.character_mgr.load_character_file(pcid) if pcid else {}
-
-        self.ctx.nouns_mgr.set_worldview_id(wid)
-        nouns = self.ctx.nouns_mgr.entries
-
-        self.ctx.canon_mgr.set_context(wid, sid)
-        canon = self.ctx.canon_mgr.list_entries()
-
-        # --- 現在の slim_messages を再構成（summaryは保持） ---
-        existing_summaries = [m for m in self.slim_messages if m["role"] == "summary"]
-        non_summary_msgs = [m for m in self.slim_messages if m["role"] != "summary"]
-
-        # --- user → assistant のペアをループとして抽出 ---
+                data = json.load(f)
+            if isinstance(data, list):  # 旧形式：メッセージ配列のみ
+                messages = data
+            else:
+                messages = data.get("messages", [])
+                seq = data.get("seq", 0)
+
+        # スナップショット以降の追記を再生（seq がスナップショット以下のものは反映済み）
+        for rec in self._slim_journal.read():
+            if rec.get("seq", 0) > seq:
+                messages.append(rec["entry"])
+                seq = rec["seq"]
+
+        self.slim_messages = messages
+        self._slim_seq = seq
+
+    def _append_slim(self, entry: dict):
+        self._slim_seq += 1
+        self._slim_journal.append({"seq": self._slim_seq, "entry": entry})
+        if self._slim_journal.line_count >= SLIM_COMPACT_EVERY:
+            self._compact_slim()
+
+    def _compact_slim(self):
+        """現在の slim_messages をスナップショットとして書き出し、ジャーナルを空にする"""
+        snapshot = {"seq": self._slim_seq, "messages": self.slim_messages}
+        atomic_write_text(self.slim_path, json.dumps(snapshot, ensure_ascii=False, indent=2))
+        self._slim_journal.rewrite([])
+
+    @staticmethod
+    def _level(m: dict) -> str:
+        return m.get("level", "block")  # level 無しの旧 summary は最下層扱い
+
+    def _loops(self) -> list[list[dict]]:
+        """summary 以外の user → assistant のペアをループとして抽出"""
         loops = []
         buf = []
-        for m in non_summary_msgs:
+        for m in self.slim_messages:
             if m["role"] == "user":
                 buf = [m]
             elif m["role"] == "assistant" and buf:
                 buf.append(m)
                 loops.append(buf)
                 buf = []
+        return loops
 
-        if len(loops) <= block_size:
-            return  # 十分にたまっていない場合はスキップ
-
-        # --- 要約対象の先頭Nループと、残りのループを分割 ---
-        target = loops[:summarize_n]
-        remaining = loops[summarize_n:]
-
-        flat = [msg for loop in target for msg in loop]
-        text = "\n".join(f"{m['role']}: {m['content']}" for m in flat)
-
-        # --- AIによる要約プロンプト生成 ---
-        prompt = [
-            {"role": "system", "content": (
-                "あなたはTRPGセッションログの要約専門AIです。\n"
-                "以下の背景情報(世界観、PC、固有名詞、カノン)を考慮し、会話ログの重要な出来事だけを簡潔に要約してください。\n"
-                "確認応答・雑談・プレイヤーのメタ発言は除外し、進行や展開に関わる事実のみを抽出してください。"
-            )},
-            {"role": "system", "content": f"■ 世界観:\n{worldview.get('long_description') or worldview.get('description', '')}"},
-            {"role": "system", "content": f"■ PC:\n{json.dumps(pc, ensure_ascii=False, indent=2)}"},
-            {"role": "system", "content": f"■ 固有名詞:\n{json.dumps(nouns, ensure_ascii=False, indent=2)}"},
-            {"role": "system", "content": f"■ カノン:\n{json.dumps(canon, ensure_ascii=False, indent=2)}"},
-            {"role": "user", "content": text}
+    def _summarize_if_needed(self, block_size=10, summarize_n=5):
+        """
+        ループ数が block_size を超えたら、先頭 summarize_n ループを block 要約にする処理をバックグラウンドへ積む。
+        （ターンは待たない。対象はワーカー側で確定し、完成時に差し込む）
+        """
+        if not self.engine or not self.ctx or self._block_job_queued:
+            return
+        with self._lock:
+            if len(self._loops()) <= block_size:
+                return  # 十分にたまっていない場合はスキップ
+        self._block_job_queued = True
+        self._enqueue(self._job_fold_turns, block_size, summarize_n)
+
+    def roll_up(self, level: str) -> Future | None:
+        """
+        区切り（level="section" / "chapter"）で、下位の要約と古いログを1つの要約に畳み込む（バックグラウンド）。
+        直近の1往復は次の導入の文脈として生のまま残す。章の要約が溜まったら古い章をあらすじへ畳み込む。
+        """
+        if not self.engine or not self.ctx:
+            return None
+        # 畳み込む範囲は積んだ時点で確定する（ワーカーが拾うまでに届いた次の章・セクションのログを混ぜない）
+        with self._lock:
+            raw = [m for m in self.slim_messages if m["role"] != "summary"]
+        cutoff = raw[-KEEP_RECENT_MESSAGES] if len(raw) >= KEEP_RECENT_MESSAGES else (raw[0] if raw else None)
+        return self._enqueue(self._job_roll_up, level, cutoff)
+
+    def _enqueue(self, job, *args) -> Future:
+        # 背景情報（マネージャ経由の読み込み）は呼び出し側スレッドで済ませ、ワーカーでは LLM 呼び出しだけ行う
+        with self._lock:
+            recent = self.slim_messages[-RETRIEVAL_QUERY_MESSAGES:]
+        context = self.build_context_prompt(query="\n".join(m["content"] for m in recent))
+        future = _summary_executor.submit(job, context, *args)
+        future.add_done_callback(self._on_job_done)
+        self._pending_summary = future
+        return future
+
+    @staticmethod
+    def _on_job_done(future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            log.warning(f"バックグラウンド要約に失敗しました（次回の条件成立時に再試行）: {future.exception()}")
+
+    def _job_fold_turns(self, context: list[dict], block_size: int, summarize_n: int):
+        try:
+            with self._lock:
+                loops = self._loops()
+            if len(loops) <= block_size:
+                return
+            self._fold(context, "block", [m for loop in loops[:summarize_n] for m in loop])
+
+            # block 要約が増えすぎたら、最新以外を1つにまとめる
+            with self._lock:
+                blocks = [m for m in self.slim_messages if m["role"] == "summary" and self._level(m) == "block"]
+            if len(blocks) > MAX_BLOCK_SUMMARIES:
+                self._fold(context, "block", blocks[:-1])
+        finally:
+            self._block_job_queued = False
+
+    def _job_roll_up(self, context: list[dict], level: str, cutoff: dict | None):
+        """cutoff（生のまま残す最初のメッセージ）より前の、下位の要約と生ログを畳み込む"""
+        lower = SUMMARY_LEVELS[SUMMARY_LEVELS.index(level) + 1:]
+        with self._lock:
+            slim = list(self.slim_messages)
+        if cutoff is None:
+            end = len(slim)  # 積んだ時点で生ログが無かった：要約だけを畳み込む
+        else:
+            end = next((i for i, m in enumerate(slim) if m is cutoff), None)
+            if end is None:
+                log.info("畳み込みの区切りが既に要約されていたため、区切りの要約を見送りました")
+                return
+        targets = [
+            m for m in slim[:end]
+            if (m["role"] == "summary" and self._level(m) in lower)
+            or (m["role"] != "summary" and cutoff is not None)
         ]
-
-        # --- AIで要約し、新しい summary エントリを生成 ---
-        summary = self.engine.chat(prompt, caller_name="LogSummary", max_tokens=1500).strip()
-        summary_entry = {"role": "summary", "content": summary}
-
-        # --- 要約 + 残りループを新しい slim_messages として保存 ---
-        self.slim_messages = existing_summaries + [summary_entry] + [m for loop in remaining for m in loop]
-
-    def build_context_prompt(self) -> list[dict]:
-        """世界観・キャラ・カノン・固有名詞を含む前提情報"""
+        self._fold(context, level, targets)
+
+        if level == "chapter":
+            with self._lock:
+                chapters = [m for m in self.slim_messages if m["role"] == "summary" and self._level(m) == "chapter"]
+                synopsis = [m for m in self.slim_messages if m["role"] == "summary" and self._level(m) == "session"]
+            if len(chapters) > MAX_CHAPTER_SUMMARIES:
+                self._fold(context, "session", synopsis + chapters[:len(chapters) - MAX_CHAPTER_SUMMARIES])
+
+    def _fold(self, context: list[dict], level: str, targets: list[dict]) -> bool:
+        """targets を要約して level の summary 1件に置き換える（ワーカースレッドで実行）"""
+        if not targets:
+            return False
+        lines = []
+        for m in targets:
+            if m["role"] == "summary":
+                lines.append(f"[{SUMMARY_LABELS[self._level(m)]}] {m['content']}")
+            else:
+                lines.append(f"{m['role']}: {m['content']}")
+
+        prompt = [{"role": "system", "content": FOLD_INSTRUCTIONS[level]}] + context + [
+            {"role": "user", "content": "\n".join(lines)}
+        ]
+        model_level, max_tokens = FOLD_CALL_ARGS[level]
+        summary = self._background_chat(
+            prompt,
+            caller_name="LogSummary" if level == "block" else f"LogSummary.{level}",
+            model_level=model_level,
+            max_tokens=max_tokens,
+        ).strip()
+        return self._splice(targets, {"role": "summary", "level": level, "content": summary})
+
+    def _background_chat(self, *args, **kwargs):
+        """
+        ワーカーからの LLM 呼び出し。非同期エンジンがあればその接続プールで走らせ（ワーカーは要約の直列化だけを担う）、
+        無ければ同期エンジンを使う
+        """
+        async_engine = getattr(self.ctx, "async_engine", None)
+        if async_engine is None:
+            return self.engine.chat(*args, **kwargs)
+        return async_engine.run(async_engine.chat(*args, **kwargs))
+
+    def _splice(self, targets: list[dict], entry: dict) -> bool:
+        """targets を entry に原子的に置き換える（entry は先頭の対象があった位置に入り、時系列が保たれる）"""
+        ids = {id(m) for m in targets}
+        with self._lock:
+            positions = [i for i, m in enumerate(self.slim_messages) if id(m) in ids]
+            if len(positions) != len(targets):
+                log.info("要約対象が既に置き換えられていたため、要約を破棄しました")
+                return False
+            merged = [m for m in self.slim_messages if id(m) not in ids]
+            merged.insert(positions[0], entry)
+            self.slim_messages = merged
+            self._compact_slim()
+        log.info(f"{entry['level']} 要約を反映しました（{len(targets)}件 → 1件）")
+        return True
+
+    def build_context_prompt(self, query: str | None = None) -> list[dict]:
+        """
+        世界観・キャラ・カノン・固有名詞を含む前提情報。
+        query があれば、固有名詞・カノンは query に関連の高い上位だけに絞る。
+        """
         wid = self.wid
         sid = self.sid
 
@@ -146,47 +360,29 @@ class ConversationLog:
         session = self.ctx.session_mgr.get_entry_by_id(sid) or {}
 
         pcid = session.get("player_character", {}).get("id") if isinstance(session.get("player_character"), dict) else None
-        pc = self.ctx.character_mgr.load_character_file(pcid) if pcid else {}
+        pc = dict(self.ctx.character_mgr.view_character(pcid)) if pcid else {}
 
         self.ctx.nouns_mgr.set_worldview_id(wid)
-        nouns = self.ctx.nouns_mgr.entries
-
         self.ctx.canon_mgr.set_context(wid, sid)
-        canon = self.ctx.canon_mgr.list_entries()
+        if query is None:
+            nouns = self.ctx.nouns_mgr.entries
+            canon = self.ctx.canon_mgr.list_entries()
+        else:
+            nouns = retrieve_nouns(self.ctx.nouns_mgr, query, CONTEXT_NOUNS_TOP_K)
+            canon = retrieve_canon(self.ctx.canon_mgr, query, CONTEXT_CANON_TOP_K)
 
         return [
             {"role": "system", "content": f"■ 世界観:\n{worldview.get('long_description') or worldview.get('description', '')}"},
-            {"role": "system", "content": f"■ PC:\n{json.dumps(pc, ensure_ascii=False, indent=2)}"},
-            {"role": "system", "content": f"■ 固有名詞:\n{json.dumps(nouns, ensure_ascii=False, indent=2)}"},
-            {"role": "system", "content": f"■ カノン:\n{json.dumps(canon, ensure_ascii=False, indent=2)}"},
+            {"role": "system", "content": f"■ PC:\n{json.dumps(pc, ensure_ascii=False)}"},
+            {"role": "system", "content": f"■ 固有名詞:\n{json.dumps(nouns, ensure_ascii=False)}"},
+            {"role": "system", "content": f"■ カノン:\n{json.dumps(canon, ensure_ascii=False)}"},
         ]
 
     def summarize_now(self):
-        if not self.engine or not self.ctx:
-            return
-
-        # --- 背景情報を準備 ---
-        prompt = self.build_context_prompt()
-        prompt.insert(0, {
-            "role": "system", "content": (
-                "あなたはTRPGセッションログの要約専門AIです。\n"
-                "以下の背景情報(世界観、PC、固有名詞、カノン)を考慮し、会話ログの重要な出来事だけを簡潔に要約してください。\n"
-                "確認応答・雑談・プレイヤーのメタ発言は除外し、進行や展開に関わる事実のみを抽出してください。"
-            )
-        })
-
-        prompt += self.get_slim()
-        prompt.append({"role": "user", "content": "以上を要約してください。"})
-
-        summary = self.engine.chat(
-            messages=prompt,
-            caller_name="ForcedSummary",
-            model_level="high",
-            max_tokens=1800
-        ).strip()
-
-        self.slim_messages = [{"role": "summary", "content": summary}]
-        self._save_slim()
+        """章の区切りの畳み込みを行い、反映まで待つ"""
+        future = self.roll_up("chapter")
+        if future is not None:
+            future.result()
 
     def generate_story_summary(self) -> str:
         if not self.engine or not self.ctx:
@@ -1,8 +1,11 @@
 # phases/scenario/gameflow/director.py
 import json
 import logging
+from concurrent.futures import Future
 from typing import Optional, Dict, Any
 from infra.path_helper import get_data_path
+from phases.scenario.gameflow.prompt_layout import assemble_messages
+from phases.scenario.intent_router import CATEGORIES, CATEGORY_GUIDE
 
 class Director:
 
@@ -117,7 +120,8 @@ class Director:
             return None
 
     # ===== プロンプト差し替え =====
-    def _get_system_prompt(self, label: str) -> str:
+    def _get_system_prompt(self) -> str:
+        """全フェーズ共通の仕様（プロンプト先頭に置く安定部分）"""
         common = """
 【Progression JSON 共通仕様】
 
@@ -257,9 +261,12 @@ class Director:
 - 必要キーは必ず含める（cmd は空配列 [] 可）
 - plan（章/セクション目標）は参照のみ。**obj には“PCの目的”だけ**を書く
 """
-        if label == "action":
-            return f"""{common}
+        return common
 
+    def _get_phase_prompt(self, label: str) -> str:
+        """フェーズ固有の追加指示（履歴の後ろ＝末尾側に置く）"""
+        if label == "action":
+            return """
 【このフェーズは 通常】
 - プレイヤーが能動的な行動を宣言した段階。
 - act は行動要約。flow.obj はpcの直近の目的。
@@ -271,8 +278,7 @@ class Director:
   - それ以外（通常の進行）: "none"
 """
         elif label == "post_check_description":
-            return f"""{common}
-
+            return """
 【このフェーズは post_check_description（行為判定 直後）】
 - act：結果を織り込んだ行為の要約（例：説得が通り門を通過する／鍵開けは叶わず扉は閉ざされたまま）。
 - flow.obj：判定によりPCの志向が**変化した場合のみ更新**（変化が無ければ維持）。
@@ -304,8 +310,7 @@ class Director:
     - cmd：後に影響する**確定的な不利**（例：資源損失、騒ぎの拡大を add_history 等で記録）。
 """
         elif label == "post_combat_description":
-            return f"""{common}
-    
+            return """
 【このフェーズは post_combat_description（戦闘 直後）】
 - act にはプレイヤー入力から得られた「戦闘の成否」を踏まえ、
   PCがどう戦い、どういう理由で勝利したのか／逆にどうして不利になったのかを
@@ -353,20 +358,40 @@ class Director:
 
 """
         else:
-            return common
-
+            return ""
+
+
+    # ===== 意図分類＋進行の統合スキーマ（combined モード用） =====
+    @classmethod
+    def combined_schema(cls) -> Dict[str, Any]:
+        progression = {k: v for k, v in cls.progression_schema["schema"].items() if k != "$schema"}
+        return {
+            "type": "json_schema",
+            "name": "IntentProgression",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    "category": {"type": "string", "enum": CATEGORIES},
+                    "progression": {"anyOf": [progression, {"type": "null"}]},
+                },
+                "required": ["category", "progression"],
+            },
+        }
 
-    # ===== 共通呼び出し =====
-    def handle(self, label: str, player_input: str) -> Dict[str, Any]:
-        # Informations
-        prompt_infos = self.infos.build_prompt(
-            include=["scenario", "worldview", "character", "nouns", "canon", "plan"],
-            chapter=self.state.chapter
+    def _get_combined_prompt(self) -> str:
+        return (
+            "【このターンは 意図分類＋進行】\n"
+            "まず最後のプレイヤー入力の意図を次のカテゴリで分類し、category に入れてください。\n"
+            + CATEGORY_GUIDE +
+            "※ 疑問形だから質問、断定しているから行動などと一意に判別せず、文脈から適切なカテゴリへ分類してください。\n\n"
+            "category が \"action\" のときだけ、下記の通常フェーズ指示に従って progression を生成してください。\n"
+            "それ以外のカテゴリでは progression は null にしてください。\n"
+            + self._get_phase_prompt("action")
         )
 
-        # convlog は読むだけ（ここで append しない）
-        history = self.convlog.get_slim()
-
+    def _build_final_user(self, player_input: str) -> str:
         # 前回Progressionを最終入力へ同梱
         prev_prog = self._last_progression
         if prev_prog:
@@ -387,24 +412,93 @@ class Director:
             f"{(goal_text or '（未設定）')}\n"
             "※今回の描写でこのgoalを満たすなら、Progression の \"cue\" は必ず \"end\" を返してください。"
         )
+        return final_user
 
-        system_prompt = self._get_system_prompt(label)
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "system", "content": prompt_infos},
-            *history,
-            {"role": "user", "content": final_user},
-        ]
+    def _build_messages(self, turn_rules: str, player_input: str) -> list[dict]:
+        # convlog は読むだけ（ここで append しない）
+        history = self.convlog.get_slim(caller_name="Director")
+
+        # 安定した順（共通仕様 → Informations → 履歴 → フェーズ指示 → 今回入力）で組み立て
+        return assemble_messages(
+            system_rules=self._get_system_prompt(),
+            infos=self.infos,
+            chapter=self.state.chapter,
+            history=history,
+            turn_rules=turn_rules,
+            turn_input=self._build_final_user(player_input),
+        )
 
-        prog = self.ctx.engine.chat(
-            messages=messages,
+    def _chat_args(self, label: str, player_input: str) -> Dict[str, Any]:
+        return dict(
+            messages=self._build_messages(self._get_phase_prompt(label), player_input),
             caller_name=f"Director.{label}",
             model_level="high",
             schema=self.progression_schema,
             max_tokens=3000
         )
 
+    # ===== 共通呼び出し =====
+    def handle(self, label: str, player_input: str) -> Dict[str, Any]:
+        prog = self.ctx.engine.chat(**self._chat_args(label, player_input))
+
         # 生成されたProgressionをディスクへ保存（次ターン参照用）
         if isinstance(prog, dict):
             self._persist_progression(prog)
-        return prog
\ No newline at end of file
+        return prog
+
+    # ===== 投機実行（意図分類と並行して action の Progression を先に作る） =====
+    def speculate(self, label: str, player_input: str) -> Optional[Future]:
+        """
+        非同期エンジンで Progression 生成を先行開始し、Future を返す（非同期エンジンが無ければ None）。
+        結果は commit_speculation() するまで保存しない。不要になったら future.cancel() で破棄する。
+        """
+        async_engine = getattr(self.ctx, "async_engine", None)
+        if async_engine is None:
+            return None
+        args = self._chat_args(label, player_input)
+        args["caller_name"] += ".speculative"
+        return async_engine.submit(async_engine.chat(**args))
+
+    def commit_speculation(self, future: Future) -> Optional[Dict[str, Any]]:
+        """先行実行の結果を待って確定する（失敗時は None → 呼び出し側で通常実行）"""
+        try:
+            prog = future.result()
+        except Exception as e:
+            self.log.warning(f"[Director] speculative progression failed: {e}")
+            return None
+        if not isinstance(prog, dict):
+            return None
+        self._persist_progression(prog)
+        return prog
+
+    def handle_with_intent(self, player_input: str) -> tuple[str, Optional[Dict[str, Any]]]:
+        """
+        意図分類と action 時の Progression 生成を1回の構造化呼び出しで行う（combined モード）。
+        プロンプト先頭は handle() と同じなので、共通部分はキャッシュ済み入力として扱われる。
+        戻り値: (category, progression or None)
+        """
+        messages = self._build_messages(self._get_combined_prompt(), player_input)
+
+        result = self.ctx.engine.chat(
+            messages=messages,
+            caller_name="Director.combined",
+            model_level="high",
+            schema=self.combined_schema(),
+            max_tokens=3000
+        )
+
+        if not isinstance(result, dict):
+            self.log.warning(f"[Director] combined: スキーマ外の応答: {result}")
+            return "other", None
+
+        label = result.get("category", "other")
+        if label not in CATEGORIES:
+            self.log.warning(f"[Director] combined: 不明なカテゴリ: {label}")
+            label = "other"
+
+        prog = result.get("progression") if label == "action" else None
+        if isinstance(prog, dict):
+            self._persist_progression(prog)
+        else:
+            prog = None
+        return label, prog
\ No newline at end of file
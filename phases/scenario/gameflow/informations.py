@@ -1,8 +1,14 @@
 # phases/scenario/gameflow/informations.py
 
 import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
 from core.app_context import AppContext
 from core.session_state import SessionState
+from core.storage import get_storage
+from phases.scenario.retrieval import retrieve_canon, retrieve_nouns
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
 
@@ -23,6 +29,59 @@ PRE_PROMPT_SNIPPETS = {
     "plan": "この章およびセクションにおける進行計画：\n{plan}"
 }
 
+# プロンプトに載せる件数の上限（超える分は現在の章・セクションの目的に関連の高いものから選ぶ）
+NOUNS_TOP_K = 20
+CANON_TOP_K = 30
+
+# 変化しにくい順（プロンプト先頭ほど安定させ、プロバイダ側の prompt caching を効かせる）
+STABLE_ORDER = ["worldview", "nouns", "scenario", "plan", "canon", "character"]
+
+# (wid, sid) → 直近のスナップショット。依存ファイルが変わらない限りターンをまたいで再利用する
+_snapshots: dict[tuple, "InformationsSnapshot"] = {}
+_snapshots_lock = threading.Lock()
+
+# (wid, sid, key, chapter) → (依存データのスタンプ, 組み立て済みの本文)。依存が変わったキーだけ組み立て直す
+_fragments: dict[tuple, tuple] = {}
+_fragment_stats: dict[str, dict] = {}
+_fragments_lock = threading.Lock()
+
+
+def get_fragment_stats() -> dict:
+    """キーごとのフラグメントキャッシュの hit / miss 累計"""
+    with _fragments_lock:
+        return {k: dict(v) for k, v in _fragment_stats.items()}
+
+
+@dataclass(frozen=True)
+class InformationsSnapshot:
+    """
+    1ターン分の Informations を固めた不変オブジェクト（Informations と同じ読み出しAPIを持つ）。
+    key = (wid, sid, chapter, section, 依存ファイルの mtime/size)
+    """
+    key: tuple
+    chapter: int
+    segments: tuple[tuple[str, str], ...]
+    section_goal: str
+    source: "Informations" = field(compare=False, repr=False)
+
+    def build(self, key: str, chapter: int = 1) -> str:
+        if chapter != self.chapter:
+            return self.source.build(key, chapter=chapter)
+        return dict(self.segments).get(key, f"（未対応キー: {key}）")
+
+    def build_prompt(self, include=None, chapter: int = 1) -> str:
+        include = include or ["scenario","worldview","character","nouns","canon","plan"]
+        parts = [self.build(k, chapter=chapter) for k in include]
+        return "\n\n".join(p for p in parts if p)
+
+    def build_segments(self, include=None, chapter: int = 1) -> list[tuple[str, str]]:
+        if chapter != self.chapter:
+            return self.source.build_segments(include=include, chapter=chapter)
+        return [(k, text) for k, text in self.segments if text and (include is None or k in include)]
+
+    def get_current_section_goal(self) -> str:
+        return self.section_goal
+
 
 class Informations:
     def __init__(self, state: SessionState, ctx: AppContext):
@@ -32,6 +91,50 @@ class Informations:
         self.sid = state.session_id
 
     def build(self, key: str, chapter: int = 1) -> str:
+        """key のフラグメントを返す（依存データが前回から変わっていなければキャッシュから）"""
+        if key not in PRE_PROMPT_SNIPPETS:
+            return f"（未対応キー: {key}）"
+        cache_key = (self.wid, self.sid, key, chapter)
+        stamps = self._fragment_stamps(key, chapter)
+        with _fragments_lock:
+            hit = _fragments.get(cache_key)
+            stat = _fragment_stats.setdefault(key, {"hits": 0, "misses": 0})
+            if hit is not None and hit[0] == stamps:
+                stat["hits"] += 1
+                return hit[1]
+            stat["misses"] += 1
+        text = self._render(key, chapter)
+        with _fragments_lock:
+            _fragments[cache_key] = (stamps, text)
+        return text
+
+    def _fragment_stamps(self, key: str, chapter: int) -> tuple:
+        """key のフラグメントが読むデータの変更スタンプ"""
+        wid, sid = self.wid, self.sid
+        storage = get_storage()
+        scenario = storage.stamp(get_data_path(f"worlds/{wid}/sessions/{sid}/scenario.json"))
+        plan = storage.stamp(get_data_path(f"worlds/{wid}/sessions/{sid}/chapters/chapter_{chapter:02}/plan.json"))
+        if key == "scenario":
+            return (scenario,)
+        if key == "worldview":
+            return (self.ctx.worldview_mgr.index_stamp(),)
+        if key == "character":
+            session = self.ctx.session_mgr.get_entry_by_id(sid) or {}
+            pcid = session.get("player_character")
+            if not pcid:
+                return (self.ctx.session_mgr.index_stamp(),)
+            char_path = get_data_path(f"worlds/{wid}/characters/{pcid}.json")
+            return (pcid, self.ctx.character_mgr.character_version(pcid), storage.stamp(char_path))
+        # 以下は現在のセクションの目的で選別・強調するのでセクション番号にも依存する
+        section = self.state.section
+        if key == "nouns":
+            return (section, scenario, plan, storage.stamp(get_data_path(f"worlds/{wid}/nouns/nouns_index.json")))
+        if key == "canon":
+            return (section, scenario, plan,
+                    storage.stamp(get_data_path(f"worlds/{wid}/sessions/{sid}/canon/canon_index.json")))
+        return (section, scenario, plan)  # plan
+
+    def _render(self, key: str, chapter: int) -> str:
         wid, sid = self.wid, self.sid
 
         if key == "scenario":
@@ -67,7 +170,7 @@ class Informations:
                 return PRE_PROMPT_SNIPPETS["character"].format(character="（PC未設定）")
 
             self.ctx.character_mgr.set_worldview_id(wid)
-            char = self.ctx.character_mgr.load_character_file(pcid)
+            char = self.ctx.character_mgr.view_character(pcid)
             name = char.get("name", "？？？")
             level = char.get("level", "?")
             background = char.get("background", "不明")
@@ -95,7 +198,7 @@ class Informations:
 
         elif key == "nouns":
             self.ctx.nouns_mgr.set_worldview_id(wid)
-            nouns = self.ctx.nouns_mgr.entries[:20]
+            nouns = retrieve_nouns(self.ctx.nouns_mgr, self._retrieval_query(chapter), NOUNS_TOP_K)
             noun_lines = [
                 f"- {n.get('name','')}（{n.get('type','')}）：{n.get('notes','')}"
                 for n in nouns
@@ -104,7 +207,7 @@ class Informations:
 
         elif key == "canon":
             self.ctx.canon_mgr.set_context(wid, sid)
-            canon = self.ctx.canon_mgr.list_entries() if hasattr(self.ctx.canon_mgr,"list_entries") else self.ctx.canon_mgr.entries
+            canon = retrieve_canon(self.ctx.canon_mgr, self._retrieval_query(chapter), CANON_TOP_K)
             lines = []
             for entry in canon:
                 name = entry.get("name", "")
@@ -114,6 +217,8 @@ class Informations:
                 if notes:
                     line += f"：{notes}"
                 lines.append(line)
+                if entry.get("history_digest"):
+                    lines.append(f"  これまでの経緯: {entry['history_digest']}")
                 history = entry.get("history", [])
                 if history:
                     lines.append("  履歴:")
@@ -169,6 +274,63 @@ class Informations:
         parts = [self.build(k, chapter=chapter) for k in include]
         return "\n\n".join(p for p in parts if p)
 
+    def _retrieval_query(self, chapter: int) -> str:
+        """固有名詞・カノンの選別に使う検索語（章の目的・タイトルと現在のセクションの目的/説明）"""
+        wid, sid = self.wid, self.sid
+        parts = []
+        scenario_path = get_data_path(f"worlds/{wid}/sessions/{sid}/scenario.json")
+        if scenario_path.exists():
+            with open(scenario_path, encoding="utf-8") as f:
+                overviews = json.load(f).get("draft", {}).get("chapters", [])
+            if 0 <= (chapter-1) < len(overviews):
+                parts.append(overviews[chapter-1].get("goal", ""))
+        plan_path = get_data_path(f"worlds/{wid}/sessions/{sid}/chapters/chapter_{chapter:02}/plan.json")
+        if plan_path.exists():
+            with open(plan_path, encoding="utf-8") as f:
+                plan = json.load(f)
+            parts.append(plan.get("title", ""))
+            flow = plan.get("flow", [])
+            section_idx = self.state.section - 1
+            if 0 <= section_idx < len(flow):
+                parts.append(flow[section_idx].get("goal", ""))
+                parts.append(flow[section_idx].get("description", ""))
+        return "\n".join(p for p in parts if p)
+
+    def build_segments(self, include=None, chapter: int = 1) -> list[tuple[str, str]]:
+        """STABLE_ORDER の順で (key, 本文) を返す。include はキーの絞り込みのみ（順序は固定）"""
+        keys = [k for k in STABLE_ORDER if include is None or k in include]
+        segments = [(k, self.build(k, chapter=chapter)) for k in keys]
+        return [(k, text) for k, text in segments if text]
+
+    def _dependency_stamps(self, chapter: int) -> tuple:
+        """build() が読むデータの変更スタンプ一覧（ファイルは mtime/size、SQLite は版数）"""
+        return tuple(self._fragment_stamps(k, chapter) for k in STABLE_ORDER)
+
+    def snapshot(self) -> InformationsSnapshot:
+        """
+        現在の章・セクションの全セグメントを一度だけ組み立てて返す。
+        依存ファイルが前回から変わっていなければ、前回のスナップショットをそのまま返す（ディスク読み込みなし）。
+        """
+        chapter = self.state.chapter
+        key = (self.wid, self.sid, chapter, self.state.section, self._dependency_stamps(chapter))
+        with _snapshots_lock:
+            snap = _snapshots.get((self.wid, self.sid))
+        if snap is not None and snap.key == key:
+            log.debug(f"Informations スナップショット再利用: ch{chapter}-{self.state.section}")
+            return snap
+
+        snap = InformationsSnapshot(
+            key=key,
+            chapter=chapter,
+            segments=tuple((k, self.build(k, chapter=chapter)) for k in STABLE_ORDER),
+            section_goal=self.get_current_section_goal(),
+            source=self,
+        )
+        with _snapshots_lock:
+            _snapshots[(self.wid, self.sid)] = snap
+        log.debug(f"Informations スナップショット生成: ch{chapter}-{self.state.section}")
+        return snap
+
     def get_current_section_goal(self) -> str:
         """
         現在のセクションのゴールを返す。
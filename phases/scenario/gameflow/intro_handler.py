@@ -1,21 +1,53 @@
 # phases/scenario/handlers/intro_handler.py
 
 import json
+from concurrent.futures import Future
 from infra.path_helper import get_data_path
+from infra.logging import get_logger
 from phases.scenario.gameflow.informations import Informations  # 追加
+from phases.scenario.gameflow.streaming import chat_to_ui
+from phases.scenario.gameflow.prompt_layout import assemble_messages
+
+log = get_logger("IntroHandler")
+
 
 class IntroHandler:
-    def __init__(self, ctx, state, convlog, infos: Informations):  # 変更
+    def __init__(self, ctx, state, convlog, infos: Informations, flags: dict | None = None):  # 変更
         self.ctx = ctx
         self.state = state
         self.convlog = convlog
         self.infos = infos  # 追加
+        self.flags = flags
 
-    def handle(self, label: str) -> str:
+    def handle(self, label: str, prefetched: Future | None = None) -> str:
+        """prefetched（prefetch() の Future）があればその結果を使い、失敗していれば通常どおり生成する"""
+        if prefetched is not None:
+            try:
+                text = prefetched.result()
+                if isinstance(text, str) and text.strip():
+                    return text.strip()
+            except Exception as e:
+                log.warning(f"先読みした導入の取得に失敗（通常生成へ）: {e}")
         kind = "chapter" if label == "chapter_intro" else "section"
         return self._handle_intro(kind)
 
+    def prefetch(self, label: str) -> Future | None:
+        """
+        導入文を非同期エンジンで先に生成し始める（UI へは流さない）。
+        state はこれから始まる章・セクションを指していること。非同期エンジンが無ければ None。
+        """
+        async_engine = getattr(self.ctx, "async_engine", None)
+        if async_engine is None:
+            return None
+        kind = "chapter" if label == "chapter_intro" else "section"
+        args = self._intro_chat_args(kind)
+        args["caller_name"] += ".prefetch"
+        return async_engine.submit(async_engine.chat(**args))
+
     def _handle_intro(self, kind: str) -> str:
+        return chat_to_ui(self.ctx, self.flags, **self._intro_chat_args(kind))
+
+    def _intro_chat_args(self, kind: str) -> dict:
         wid = self.state.worldview_id
         sid = self.state.session_id
         chapter = self.state.chapter
@@ -65,26 +97,26 @@ class IntroHandler:
                 "わかりやすさ優先・三人称・常体・ラノベ風で。"
             )
 
+        # 章・セクションごとに変わる導入情報は末尾側へ
+        turn_rules = ""
         if overview:
-            instruction += f"\n\nこの章の概要: {overview}"
+            turn_rules += f"この章の概要: {overview}\n"
         if intro:
-            instruction += f"\nセクションの導入情報（必ず参考にしてください）: {intro}"
+            turn_rules += f"セクションの導入情報（必ず参考にしてください）: {intro}"
 
-        # ✅ snippetsを使わずInformationsで一括生成（scenario/worldview/character/nouns/canon/plan）
-        instruction += "\n\n" + self.infos.build_prompt(
-            include=["scenario","worldview","character","nouns","canon","plan"],
-            chapter=chapter
+        # ✅ snippetsを使わずInformationsで一括生成（安定した順：worldview → nouns → scenario → plan → canon → character）
+        messages = assemble_messages(
+            system_rules=instruction,
+            infos=self.infos,
+            chapter=chapter,
+            history=self.convlog.get_slim(caller_name="IntroHandler"),
+            turn_rules=turn_rules.strip(),
         )
-
-        messages = [{"role": "system", "content": instruction}]
-        messages += self.convlog.get_slim()
         model_level = "high" if kind == "chapter" else "high"
 
-        response = self.ctx.engine.chat(
+        return dict(
             messages=messages,
             caller_name=f"IntroHandler:{kind}_intro",
             model_level=model_level,
             max_tokens=5000
         )
-        
-        return response
@@ -1,10 +1,14 @@
 # phases/scenario/handlers/misc_handler.py
+from phases.scenario.gameflow.streaming import chat_to_ui
+from phases.scenario.gameflow.prompt_layout import assemble_messages
+
 class MiscHandler:
-    def __init__(self, ctx, state, convlog, infos):
+    def __init__(self, ctx, state, convlog, infos, flags: dict | None = None):
         self.ctx = ctx
         self.state = state
         self.convlog = convlog
         self.infos = infos
+        self.flags = flags
 
     def handle(self, label: str, player_input: str) -> str:
         base_map = {
@@ -72,19 +76,20 @@ class MiscHandler:
             "わかりやすさ優先・三人称・常体・ラノベ風で描写/回答してください。"
         )
 
-        # Informationsの付加
-        sys += "\n\n" + self.infos.build_prompt(
-            include=["scenario","worldview","character","nouns","canon","plan"],
-            chapter=self.state.chapter
-        )
         sys += "\n\n" + base
 
+        # Informationsの付加（安定した順に並べ、履歴・今回入力は末尾）
+        msgs = assemble_messages(
+            system_rules=sys,
+            infos=self.infos,
+            chapter=self.state.chapter,
+            history=self.convlog.get_slim(caller_name="MiscHandler"),
+            turn_input=player_input.strip(),
+        )
 
-        msgs = [{"role": "system", "content": sys}]
-        msgs += self.convlog.get_slim()
-        msgs.append({"role": "user", "content": player_input.strip()})
-
-        out = self.ctx.engine.chat(
+        out = chat_to_ui(
+            self.ctx,
+            self.flags,
             messages=msgs,
             caller_name=f"MiscHandler:{label}",
             model_level="high",
@@ -2,6 +2,9 @@ from __future__ import annotations
 import json
 from typing import Dict, Any
 
+from phases.scenario.gameflow.streaming import chat_to_ui
+from phases.scenario.gameflow.prompt_layout import assemble_messages
+
 class Narrator:
     """
     Progression(JSON dict) と player_input を受け取り、
@@ -17,8 +20,9 @@ class Narrator:
         self.convlog = convlog
         self.infos = infos
         
-    def _system_prompt_common(self, cue: str | None = None) -> str:
-        base = """
+    def _system_prompt_common(self) -> str:
+        """cue に依存しない共通ルール（プロンプト先頭に置く安定部分）"""
+        return """
 あなたはソロTRPGの進行役（Narrator）です。以下の Progression JSON を厳密に読み取り、
 プレイヤー提示用の描写テキストを **日本語で1段落のみ** 生成してください（目安100〜200字）。
 シナリオの進行計画に基づき、シナリオを進行してください。
@@ -36,33 +40,32 @@ class Narrator:
 描写は三人称・地の文・常体で、web小説程度の簡単な語彙を使ってください。
 """
 
-    # cue に応じて追加ルールを付ける
+    def _system_prompt_for_cue(self, cue: str | None = None) -> str:
+        """cue に応じた追加ルール（毎ターン変わるので末尾側に置く）"""
         if cue == "action":
-            base += """
+            return """
 【重要ルール（cue=action）】
 - この返答の最後は必ず「〜のため、行為判定を行います。」で締めてください。
 - 技能名や難易度は提示しないでください。
 """
         elif cue == "combat":
-            base += """
+            return """
 【重要ルール（cue=combat）】
 - この返答の最後は必ず「〜のため、戦闘判定を行います。戦法を提示してください。」で締めてください。
 - 戦闘の舞台・敵・状況を描写し、プレイヤーが戦法を宣言できるよう導いてください。
 """
         elif cue == "end":
-            base += """
+            return """
 【重要ルール（cue=end）】
 - この返答では、話をある程度収束させつつ、次の展開やセクションへの自然なつながりを描写してください。
 """
         else:  # cue==None
-            base += """
+            return """
 【重要ルール（cueがnone）】
 - この返答の最後には、objと矛盾せず、かつシナリオを進行できるような、プレイヤーキャラクターが取りうる行動案を提示してください。
 - 「行動案：1) ～ 2) ～」の形式で2～3個、改行で区切ってください。
 """
 
-        return base
-
 
     def _system_prompt_for_label(self, label: str) -> str:
         
@@ -89,32 +92,32 @@ class Narrator:
         描写テキストを1段落で返す。
         label: "action" | "post_check_description" | "post_combat_description" | "none" 等
         """
-        # 参照情報（Directorと同様に Informations から束ねる）
-        prompt_infos = self.infos.build_prompt(
-            include=["scenario", "worldview", "character", "nouns", "canon", "plan"],
-            chapter=self.state.chapter
-        )
-        history = self.convlog.get_slim()
+        history = self.convlog.get_slim(caller_name="Narrator")
 
         prog_blob = json.dumps(progression, ensure_ascii=False, indent=2)
 
-        messages = [
-            {"role": "system", "content": self._system_prompt_common(progression.get("cue")) + self._system_prompt_for_label(label)},
-            {"role": "system", "content": prompt_infos},
-            *history,
-            {"role": "user", "content":
+        # 参照情報（Directorと同様に Informations から束ね、安定した順に並べる）
+        messages = assemble_messages(
+            system_rules=self._system_prompt_common(),
+            infos=self.infos,
+            chapter=self.state.chapter,
+            history=history,
+            turn_rules=self._system_prompt_for_cue(progression.get("cue")) + self._system_prompt_for_label(label),
+            turn_input=(
                 "【Progression JSON（入力）】\n"
                 f"{prog_blob}\n\n"
                 "【プレイヤー直近発話（参照用）】\n"
                 f"{player_input}"
-            },
-        ]
+            ),
+        )
 
-        text = self.ctx.engine.chat(
+        # 文章出力。UI があれば差分を逐次表示する
+        text = chat_to_ui(
+            self.ctx,
+            self.flags,
             messages=messages,
             caller_name=f"Narrator.{label}",
             model_level="high",
             max_tokens=5000,
-            schema=None,  # 文章出力
         )
         return text if isinstance(text, str) else json.dumps(text, ensure_ascii=False)
@@ -0,0 +1,29 @@
+# phases/scenario/gameflow/prompt_layout.py
+from phases.scenario.gameflow.informations import Informations
+
+
+def assemble_messages(
+    *,
+    system_rules: str,
+    infos: Informations,
+    chapter: int,
+    history: list[dict],
+    turn_input: str | None = None,
+    turn_rules: str | None = None,
+    include=None,
+) -> list[dict]:
+    """
+    プロンプトを「変化しにくい順」に並べる。
+      system rules → worldview → nouns → scenario → plan → canon → character
+      → history → turn rules（cue/フェーズ別の追加指示）→ turn input
+    先頭の共通部分が毎ターン同じバイト列になるため、プロバイダ側で cached input として扱われる。
+    """
+    messages = [{"role": "system", "content": system_rules}]
+    for _key, text in infos.build_segments(include=include, chapter=chapter):
+        messages.append({"role": "system", "content": text})
+    messages += history
+    if turn_rules:
+        messages.append({"role": "system", "content": turn_rules})
+    if turn_input is not None:
+        messages.append({"role": "user", "content": turn_input})
+    return messages
@@ -0,0 +1,102 @@
+# phases/scenario/gameflow/streaming.py
+import re
+
+from infra.logging import get_logger
+
+log = get_logger("Streaming")
+
+# run_loop 側に「本文は表示済み」と伝えるフラグ名
+STREAMED_FLAG = "streamed_output"
+
+# 思考部分（ChatEngine._strip_think と同じく <think ...> 〜 </think> を取り除く）
+_THINK_OPEN = "<think"
+_THINK_CLOSE = re.compile(r"</think\s*>", re.IGNORECASE)
+
+
+class ThinkFilter:
+    """
+    ストリームの差分から <think> 〜 </think> を取り除く。
+    タグがチャンクをまたいでも取りこぼさないよう、タグの途中かもしれない末尾は次の差分まで持ち越す。
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._inside = False
+
+    def feed(self, delta: str) -> str:
+        """表示してよい部分を返す"""
+        self._buf += delta
+        out = []
+        while True:
+            if self._inside:
+                m = _THINK_CLOSE.search(self._buf)
+                if m:
+                    self._buf = self._buf[m.end():]
+                    self._inside = False
+                    continue
+                # 思考部分は捨てる（閉じタグの途中かもしれない末尾だけ残す）
+                i = self._buf.rfind("<")
+                self._buf = self._buf[i:] if i != -1 else ""
+                break
+            i = self._buf.lower().find(_THINK_OPEN)
+            if i != -1:
+                out.append(self._buf[:i])
+                self._buf = self._buf[i + len(_THINK_OPEN):]
+                self._inside = True
+                continue
+            keep = _partial_tag_len(self._buf.lower())
+            out.append(self._buf[:len(self._buf) - keep])
+            self._buf = self._buf[len(self._buf) - keep:]
+            break
+        return "".join(out)
+
+    def close(self) -> str:
+        """ストリーム終了時の残り（閉じていない思考部分は捨てる）"""
+        rest = "" if self._inside else self._buf
+        self._buf = ""
+        return rest
+
+
+def _partial_tag_len(text: str) -> int:
+    """text の末尾が "<think" の途中までと一致する長さ"""
+    for k in range(min(len(text), len(_THINK_OPEN) - 1), 0, -1):
+        if _THINK_OPEN.startswith(text[-k:]):
+            return k
+    return 0
+
+
+def can_stream(ctx) -> bool:
+    """UI が差分追記に対応していて、エンジンがストリーミングを持っているか"""
+    ui = getattr(ctx, "ui", None)
+    return bool(ui is not None and hasattr(ui, "safe_print") and hasattr(ctx.engine, "chat_stream"))
+
+
+def chat_to_ui(ctx, flags: dict | None, **chat_args) -> str:
+    """
+    文章出力の LLM 呼び出しを、UI へ差分表示しながら行う。
+    - UI が無い（ShelvesAPI 等）場合は従来どおり engine.chat() で一括取得
+    - ストリーミングした場合は flags[STREAMED_FLAG] を立て、run_loop での二重表示を防ぐ
+    - <think> 〜 </think> は engine.chat() と同じく表示にも戻り値にも含めない
+    - 戻り値は常に全文（後段のタグ処理・ログ保存はこれまでどおり）
+    """
+    if not can_stream(ctx):
+        return ctx.engine.chat(**chat_args)
+
+    ui = ctx.ui
+    chunks: list[str] = []
+    think = ThinkFilter()
+
+    def show(text: str):
+        if not chunks:
+            text = text.lstrip()  # 思考部分の後ろの改行から表示を始めない
+        if text:
+            ui.safe_print("System", text, append=bool(chunks))
+            chunks.append(text)
+
+    for delta in ctx.engine.chat_stream(**chat_args):
+        show(think.feed(delta))
+    show(think.close())
+
+    if flags is not None and chunks:
+        flags[STREAMED_FLAG] = True
+    return "".join(chunks).strip()
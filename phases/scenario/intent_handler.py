@@ -5,6 +5,11 @@ from phases.scenario.gameflow.narrator import Narrator
 from phases.scenario.gameflow.add_command import append_brackets_to_text
 from phases.scenario.gameflow.intro_handler import IntroHandler
 from phases.scenario.gameflow.misc_handler import MiscHandler
+from phases.scenario.intent_router import classify_intent, classify_local
+
+# combined / 投機実行で先に得た Progression を action ターンへ引き継ぐキー
+PREFETCHED_PROGRESSION = "prefetched_progression"
+
 
 class IntentHandler:
     def __init__(self, ctx, state, flags, convlog):
@@ -13,23 +18,66 @@ class IntentHandler:
         self.flags = flags
         self.convlog = convlog
 
-        # 共通情報束ね
-        self.infos = Informations(state, ctx)  # informations.py 構造に準拠 :contentReference[oaicite:1]{index=1}
+        # 共通情報束ね（ターン内は不変のスナップショットを Director / Narrator / Intro / Misc で共有）
+        self.infos = Informations(state, ctx).snapshot()
 
         # 進行JSONを作る司令塔（I/Oあり／前回Progression保持）
         self.director = Director(ctx, state, flags, convlog, self.infos)  # director() で呼ぶ実装 :contentReference[oaicite:2]{index=2}
 
         # 導入系・雑系ハンドラ（どちらも Informations 連結に対応済） 
-        self.intro = IntroHandler(ctx, state, convlog, self.infos)  # :contentReference[oaicite:3]{index=3}
-        self.misc = MiscHandler(ctx, state, convlog, self.infos)    # :contentReference[oaicite:4]{index=4}
+        self.intro = IntroHandler(ctx, state, convlog, self.infos, flags)  # :contentReference[oaicite:3]{index=3}
+        self.misc = MiscHandler(ctx, state, convlog, self.infos, flags)    # :contentReference[oaicite:4]{index=4}
+
+    def classify_and_direct(self, player_input: str) -> str:
+        """
+        意図分類と Director を1回の呼び出しで済ませる（combined モード）。
+        action の Progression は flags に預け、続く handle("action") でそのまま使う。
+        ローカルの前段分類で確定した発言は統合呼び出しをしない。
+        """
+        label = classify_local(player_input)
+        if label is not None:
+            return label
+        label, progression = self.director.handle_with_intent(player_input)
+        if label == "action" and progression is not None:
+            self.flags[PREFETCHED_PROGRESSION] = progression
+        return label
+
+    def classify_speculatively(self, player_input: str) -> str:
+        """
+        意図分類と action 用の Director を並行に走らせる（speculative モード）。
+        ラベルが action なら先行結果を flags に預け、それ以外なら破棄する。
+        レイテンシ：intent + director → max(intent, director)
+        ローカルの前段分類で確定した発言は投機実行しない。
+        """
+        label = classify_local(player_input)
+        if label is not None:
+            return label
+        future = self.director.speculate("action", player_input)
+        try:
+            label = classify_intent(self.ctx, player_input, self.convlog)
+        except BaseException:
+            if future is not None:
+                future.cancel()
+            raise
+
+        if future is None:
+            return label
+        if label == "action":
+            progression = self.director.commit_speculation(future)
+            if progression is not None:
+                self.flags[PREFETCHED_PROGRESSION] = progression
+        else:
+            future.cancel()
+        return label
 
-    def handle(self, intent_or_label, player_input: str | None):
+    def handle(self, intent_or_label, player_input: str | None, intro_prefetch=None):
         """
         intent_or_label:
           - dict: {"label": "..."} でも
           - str : "action" 等のラベル文字列でもOK
         player_input は None 可。
         post系のときは flags から補完する。
+        intro_prefetch: 導入系ラベルのとき、先読み済みの導入文の Future（IntroHandler.prefetch）
         """
         # --- ラベルの正規化（dict or str の両対応） ---
         if isinstance(intent_or_label, dict):
@@ -46,8 +94,10 @@ class IntentHandler:
             player_input = self.flags.get("last_combat_result", "")
 
         if label in ("action", "post_check_description", "post_combat_description"):
-            # 1) 進行JSON（Progression）生成
-            progression = self.director.handle(label, player_input) 
+            # 1) 進行JSON（Progression）生成（combined 等で取得済みならそれを使う）
+            progression = self.flags.pop(PREFETCHED_PROGRESSION, None) if label == "action" else None
+            if progression is None:
+                progression = self.director.handle(label, player_input)
             # 2) 描写生成（I/Oなし）。Narratorは Informations を内部で読む。 :contentReference[oaicite:6]{index=6}
             narr = Narrator(self.ctx, self.state, self.flags, self.convlog, self.infos)
             desc = narr.handle(
@@ -61,7 +111,7 @@ class IntentHandler:
 
         elif label in ("chapter_intro", "section_intro"):
             # Intro のプロンプトは Informations 連結へ更新済み。 :contentReference[oaicite:8]{index=8}
-            output_text = self.intro.handle(label)
+            output_text = self.intro.handle(label, prefetched=intro_prefetch)
 
         elif label in ("info_request", "gm_query","system", "other"):
             # 雑系も Informations 連結に対応済み。 :contentReference[oaicite:9]{index=9}
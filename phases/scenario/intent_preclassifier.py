@@ -0,0 +1,111 @@
+# phases/scenario/intent_preclassifier.py
+import re
+import sys
+from pathlib import Path
+
+from infra.logging import get_logger
+from infra.path_helper import get_data_path
+from phases.scenario.local_classifier import (
+    REPEAT, ModelSlot, NaiveBayesModel, load_chatlog_samples, normalize,
+)
+
+log = get_logger("IntentPreclassifier")
+
+# この確信度以上ならローカル判定で確定し、IntentRouter（LLM）を呼ばない
+LOCAL_CONFIDENCE_THRESHOLD = 0.85
+
+# 学習モデル（任意）。ファイルが無ければキーワード規則だけで動く
+MODEL_RELATIVE_PATH = "models/intent_model.json"
+# この件数未満のデータで学習したモデルは使わない
+MIN_TRAINING_SAMPLES = 50
+# 学習モデルの事後確率はこの値以上のときだけ採用する（規則より厳しめ）
+MODEL_CONFIDENCE_THRESHOLD = 0.9
+
+# 規則で判定するのは短い発言だけ（長文の行動宣言に「セーブ」等が混ざっても拾わない）
+RULE_MAX_CHARS = 30
+
+# システム操作・ルール確認（例は intent_router.CATEGORY_GUIDE の system を参照）
+# セーブ・中断は発言全体が依頼のときだけ（「セーブポイントを探す」「ゲームを終わらせる魔王を倒す」は行動）
+SYSTEM_PATTERNS = [
+    re.compile(p) for p in (
+        r"^セーブ(したい|する|して|します)?$",
+        r"^(help|ヘルプ)$",
+        r"^(ゲーム|セッション|プレイ)を?(中断|終了|やめ)(したい|する|して|します)?$",
+        r"^(中断|終了)(したい|する|して|します)?$",
+        r"ルール(を|が|って|は)?(教え|確認|知り|分から|わから|どう)",
+        r"判定(って|は|の)?(どう|どうやっ|やり方|仕方|方法)",
+        r"スキル(って|は|に|の)?(何|なに|一覧|どんな|ある)",
+        r"(技能|スキル)一覧",
+    )
+]
+
+
+def classify_by_rules(text: str) -> tuple[str | None, float]:
+    """
+    キーワード規則による分類。
+    戻り値: (ラベル, 確信度)。判断がつかなければ (None, 0.0)
+    """
+    norm = normalize(text)
+    if not norm:
+        return "invalid", 0.95  # 空・記号や「……」だけ
+    if REPEAT.match(norm):
+        return "invalid", 0.9
+
+    if len(norm) <= RULE_MAX_CHARS:
+        for pattern in SYSTEM_PATTERNS:
+            if pattern.search(norm):
+                return "system", 0.9
+
+    return None, 0.0
+
+
+_model_slot = ModelSlot(MODEL_RELATIVE_PATH, MIN_TRAINING_SAMPLES, "意図分類")
+
+
+def get_model() -> NaiveBayesModel | None:
+    """学習済みモデル（無い・学習データが少なければ None）。初回だけ読み込む"""
+    return _model_slot.get()
+
+
+def set_model(model: NaiveBayesModel | None):
+    """モデルを差し替える（None で無効化）"""
+    _model_slot.set(model)
+
+
+def preclassify_intent(text: str) -> tuple[str | None, float]:
+    """
+    LLM に渡す前の軽量な意図分類（規則 → 学習モデルの順）。
+    戻り値: (ラベル, 確信度)。確定できなければ (None, 確信度)
+    """
+    label, conf = classify_by_rules(text)
+    if label is not None:
+        return label, conf
+
+    model = get_model()
+    if model is None:
+        return None, 0.0
+    label, conf = model.predict(text)
+    if label is None or conf < MODEL_CONFIDENCE_THRESHOLD:
+        return None, conf
+    return label, conf
+
+
+def _category_of(response: dict) -> str | None:
+    from phases.scenario.intent_router import CATEGORIES
+
+    label = (response.get("parsed_object") or {}).get("category")
+    return label if label in CATEGORIES else None
+
+
+def train_from_chatlogs(chatlog_dirs: list[Path], out_path: Path | None = None) -> NaiveBayesModel:
+    """IntentRouter の chatlog（最後の User 発言 → 分類結果）から学習して保存する"""
+    samples = load_chatlog_samples(chatlog_dirs, "IntentRouter", _category_of)
+    return _model_slot.train(samples, out_path)
+
+
+if __name__ == "__main__":
+    # python -m phases.scenario.intent_preclassifier [chatlogディレクトリ ...]
+    # 起動時に data/temp は消えるため、学習に使う chatlog は別の場所へ退避しておく
+    dirs = [Path(p) for p in sys.argv[1:]] or [get_data_path("temp/debug/chatlog")]
+    trained = train_from_chatlogs(dirs)
+    print(f"{trained.n_samples} samples: {dict(trained.label_counts)}")
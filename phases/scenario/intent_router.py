@@ -3,9 +3,12 @@
 from typing import Literal
 
 from infra.logging import get_logger
+from phases.scenario.intent_preclassifier import preclassify_intent, LOCAL_CONFIDENCE_THRESHOLD
 
 log = get_logger("IntentRouter")
 
+# LLM に渡す直近の履歴件数（ローカルで確定できなかった曖昧な発言だけが LLM に回るため短めでよい）
+INTENT_HISTORY_MESSAGES = 6
 
 
 IntentLabel = Literal[
@@ -33,9 +36,8 @@ INTENT_SCHEMA = {
     }
 }
 
-SYSTEM_PROMPT = (
-    "あなたはTRPG支援AIです。以下に示す会話の履歴（AssistantとUserのやりとり）をもとに、\n"
-    "直近のプレイヤー発言（最後のUserの発言）について、その意図を以下の6カテゴリのいずれかに分類してください。\n\n"
+# カテゴリ定義（単独分類と Director 統合呼び出しの両方で使う）
+CATEGORY_GUIDE = (
     "【分類カテゴリと定義】\n"
     "- action: キャラクターが能動的に行おうとしている行動や操作全般。スキル使用、発言や呼びかけなどの会話も含む。返答としての了承・拒否もこれに含める。\n"
     "  （例: 「扉を開ける」「調べる」「隠れる」「説得を振ります」「回避振っていいですか？」「こんにちは」「誰かいますか？」「その男に話しかける」など）\n"  
@@ -43,12 +45,33 @@ SYSTEM_PROMPT = (
     "- gm_query: シーンや判定、進行方針などGM側の処理に関する質問（例: 「なんで〈探知〉？」「これってイベント？」「さっきそのアイテム拾ったよ」など）\n"
     "- system: セーブ、中断、ルールの確認などシステム的操作・情報要求　行為判定用のスキルについての質問（例: 「セーブしたい」「判定ってどうやるの？」「スキルって何があるの？」など）\n"
     "- invalid: 発言が意味不明・途中で切れてる・ノイズ・構文不明 （例:「助走をつけてｚ」 「あああ」「……」「oo」など 迷ったらこれでいい）\n"
-    "- other: 感想、雑談、意図的行動に該当しない発言（例: 「この村いいな」「怖くなってきた」など）\n\n"
+    "- other: 感想、雑談、意図的行動に該当しない発言（例: 「この村いいな」「怖くなってきた」など）\n"
+)
+
+SYSTEM_PROMPT = (
+    "あなたはTRPG支援AIです。以下に示す会話の履歴（AssistantとUserのやりとり）をもとに、\n"
+    "直近のプレイヤー発言（最後のUserの発言）について、その意図を以下の6カテゴリのいずれかに分類してください。\n\n"
+    + CATEGORY_GUIDE + "\n"
     "※ 分類すべきは最後のPlayerの発言だけです。それ以前の文脈も参考にして構いません。疑問形だから質問、断定しているから行動などと一意に判別せず、文脈から適切なカテゴリへ分類してください。"
 )
 
+def classify_local(input_text: str) -> IntentLabel | None:
+    """ローカルの前段分類。確信度が閾値以上ならラベルを、そうでなければ None（LLM で分類する）を返す"""
+    label, confidence = preclassify_intent(input_text)
+    if label is None or confidence < LOCAL_CONFIDENCE_THRESHOLD:
+        return None
+    log.info(f"[分類結果] {label}（ローカル 確信度 {confidence:.2f}）")
+    return label
+
+
 def classify_intent(ctx, input_text: str, convlog) -> IntentLabel:
-    messages = convlog.get_slim() + [{"role": "user", "content": input_text.strip()}]
+    """意図分類（ローカルの前段分類で確信度が閾値に届かなかった発言だけを LLM に回す）"""
+    label = classify_local(input_text)
+    if label is not None:
+        return label
+
+    history = convlog.get_slim(caller_name="IntentRouter")[-INTENT_HISTORY_MESSAGES:]
+    messages = history + [{"role": "user", "content": input_text.strip()}]
     messages.insert(0, {"role": "system", "content": SYSTEM_PROMPT})
 
     result = ctx.engine.chat(
@@ -0,0 +1,173 @@
+# phases/scenario/local_classifier.py
+import json
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterator
+
+from infra.logging import get_logger
+from infra.path_helper import get_data_path
+
+log = get_logger("LocalClassifier")
+
+# LLM を呼ぶ前のローカル分類（意図の前段分類・返答分類）で共有する部品
+
+# 句読点・記号・空白（比較前に取り除く）
+PUNCT = re.compile(r"[\s、。，．,.!！?？~～〜―…・「」『』（）()\[\]\"'`♪☆★]+")
+# 「あああ」「ooo」のような同一文字の連続だけの入力
+REPEAT = re.compile(r"^(.)\1{2,}$")
+
+
+def normalize(text: str) -> str:
+    """NFKC・小文字化・記号除去"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return PUNCT.sub("", text)
+
+
+def _features(norm: str) -> list[str]:
+    """文字 1-gram + 2-gram（日本語は分かち書きしないため）"""
+    padded = f"^{norm}$"
+    return list(norm) + [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+class NaiveBayesModel:
+    """過去の LLM の分類結果で学習する多項ナイーブベイズ（文字 n-gram）"""
+
+    def __init__(self, label_counts: dict[str, int] | None = None,
+                 feature_counts: dict[str, dict[str, int]] | None = None):
+        self.label_counts = dict(label_counts or {})
+        self.feature_counts = {k: dict(v) for k, v in (feature_counts or {}).items()}
+        self._prepare()
+
+    def _prepare(self):
+        self.vocab = set()
+        for counts in self.feature_counts.values():
+            self.vocab.update(counts)
+        self.totals = {label: sum(counts.values()) for label, counts in self.feature_counts.items()}
+
+    @property
+    def n_samples(self) -> int:
+        return sum(self.label_counts.values())
+
+    @classmethod
+    def fit(cls, samples: list[tuple[str, str]]) -> "NaiveBayesModel":
+        label_counts = Counter()
+        feature_counts: dict[str, Counter] = {}
+        for text, label in samples:
+            norm = normalize(text)
+            if not norm:
+                continue
+            label_counts[label] += 1
+            feature_counts.setdefault(label, Counter()).update(_features(norm))
+        return cls(label_counts, feature_counts)
+
+    def predict(self, text: str) -> tuple[str | None, float]:
+        """(ラベル, 事後確率)。学習データが無ければ (None, 0.0)"""
+        norm = normalize(text)
+        if not norm or not self.label_counts:
+            return None, 0.0
+        feats = Counter(f for f in _features(norm) if f in self.vocab)
+        n = self.n_samples
+        v = len(self.vocab) + 1
+        log_probs = {}
+        for label, count in self.label_counts.items():
+            counts = self.feature_counts.get(label, {})
+            denom = self.totals.get(label, 0) + v
+            lp = math.log(count / n)
+            for f, k in feats.items():
+                lp += k * math.log((counts.get(f, 0) + 1) / denom)
+            log_probs[label] = lp
+        top = max(log_probs.values())
+        z = sum(math.exp(lp - top) for lp in log_probs.values())
+        label = max(log_probs, key=log_probs.get)
+        return label, 1.0 / z
+
+    def save(self, path: Path):
+        data = {"label_counts": self.label_counts, "feature_counts": self.feature_counts}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "NaiveBayesModel":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(data.get("label_counts"), data.get("feature_counts"))
+
+
+class ModelSlot:
+    """data/ 配下の学習済みモデルを初回だけ読み込んで保持する（無い・学習データが少なければ None）"""
+
+    def __init__(self, relative_path: str, min_samples: int, name: str):
+        self.relative_path = relative_path
+        self.min_samples = min_samples
+        self.name = name
+        self._model: NaiveBayesModel | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return get_data_path(self.relative_path)
+
+    def get(self) -> NaiveBayesModel | None:
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                path = self.path
+                if path.exists():
+                    try:
+                        model = NaiveBayesModel.load(path)
+                        if model.n_samples >= self.min_samples:
+                            self._model = model
+                            log.info(f"{self.name}モデルを読み込みました: {model.n_samples}件")
+                        else:
+                            log.info(f"{self.name}モデルの学習データが少ないため使いません: {model.n_samples}件")
+                    except Exception as e:
+                        log.warning(f"{self.name}モデルの読み込み失敗: {e}")
+            return self._model
+
+    def set(self, model: NaiveBayesModel | None):
+        """モデルを差し替える（None で無効化）"""
+        with self._lock:
+            self._model = model
+            self._loaded = True
+
+    def train(self, samples: list[tuple[str, str]], out_path: Path | None = None) -> NaiveBayesModel:
+        """samples から学習して保存する。既存モデルは置き換える"""
+        model = NaiveBayesModel.fit(samples)
+        path = out_path or self.path
+        model.save(path)
+        log.info(f"{self.name}モデルを保存しました: {path}（{model.n_samples}件 {dict(model.label_counts)}）")
+        self.set(model if model.n_samples >= self.min_samples else None)
+        return model
+
+
+def iter_chatlogs(chatlog_dirs: list[Path], caller_name: str) -> Iterator[tuple[str, dict]]:
+    """
+    デバッグ時に保存される chatlog（ai/chat_engine.py の _dump_chatlog）のうち caller_name のものについて、
+    (最後の User 発言, response) を返す
+    """
+    for base in chatlog_dirs:
+        for path in sorted(Path(base).glob(f"*_{caller_name}_*.json")):
+            try:
+                record = json.loads(path.read_text(encoding="utf-8"))
+            except Exception as e:
+                log.warning(f"chatlog 読み込み失敗: {path}: {e}")
+                continue
+            messages = (record.get("request") or {}).get("messages") or []
+            user = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), None)
+            if isinstance(user, str):
+                yield user, record.get("response") or {}
+
+
+def load_chatlog_samples(chatlog_dirs: list[Path], caller_name: str,
+                         label_of: Callable[[dict], str | None]) -> list[tuple[str, str]]:
+    """chatlog から (発言, ラベル) を集める。label_of が None を返した応答は使わない"""
+    samples = []
+    for user, response in iter_chatlogs(chatlog_dirs, caller_name):
+        label = label_of(response)
+        if label is not None:
+            samples.append((user, label))
+    return samples
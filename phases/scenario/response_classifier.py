@@ -0,0 +1,133 @@
+# phases/scenario/response_classifier.py
+import re
+import sys
+from pathlib import Path
+
+from infra.logging import get_logger
+from infra.path_helper import get_data_path
+from phases.scenario.local_classifier import (
+    REPEAT, ModelSlot, NaiveBayesModel, load_chatlog_samples, normalize,
+)
+
+log = get_logger("ResponseClassifier")
+
+# 判定/戦闘の提案に対する返答の分類ラベル
+RESPONSE_LABELS = ("yes", "no", "suggest", "invalid")
+
+# この確信度以上ならローカル判定で確定し、LLM を呼ばない
+LOCAL_CONFIDENCE_THRESHOLD = 0.85
+
+# 学習モデル（任意）。語彙で決まらない返答に使う。ファイルが無ければ語彙と規則だけで動く
+MODEL_RELATIVE_PATH = "models/response_model.json"
+# この件数未満のデータで学習したモデルは使わない
+MIN_TRAINING_SAMPLES = 50
+# 学習モデルの事後確率はこの値以上のときだけ採用する（語彙より厳しめ）
+MODEL_CONFIDENCE_THRESHOLD = 0.9
+
+# 正規化後（NFKC・小文字・記号除去）の完全一致で判定する語
+# 「いいです」「結構です」「大丈夫」のように了承にも辞退にも取れる語は載せない（LLM に任せる）
+YES_WORDS = {
+    "はい", "うん", "ええ", "おう", "いいね", "よし", "オーケー", "ok", "okay", "yes", "y",
+    "了解", "りょうかい", "承知", "もちろん", "賛成", "お願い", "おねがい",
+    "それで", "それでいい", "それでいいよ", "それで大丈夫", "頼む", "たのむ", "よろしく", "どうぞ",
+    "振る", "ふる", "振ります", "ふります", "ロール", "ロールする", "判定する", "受け入れる", "やる", "やります",
+}
+NO_WORDS = {
+    "いいえ", "いや", "いやだ", "ううん", "no", "n", "ノー", "だめ", "ダメ", "やめ", "やめる", "やめます",
+    "やめておく", "やめとく", "断る", "ことわる", "しない", "しません",
+    "やらない", "やりません", "振らない", "ふらない", "拒否", "キャンセル", "cancel",
+}
+# 肯定語の後ろに付いても意味を変えない言い回し（「はい、お願いします」など）
+POLITE_TAILS = (
+    "お願いします", "おねがいします", "お願い", "おねがい", "よろしくお願いします", "よろしく", "どうぞ",
+    "します", "です", "それで", "で", "ね", "よ", "な", "っす", "ます",
+)
+
+
+def _strip_tails(text: str) -> str:
+    changed = True
+    while text and changed:
+        changed = False
+        for tail in POLITE_TAILS:
+            if text.endswith(tail) and len(text) > len(tail):
+                text = text[: -len(tail)]
+                changed = True
+                break
+    return text
+
+
+_model_slot = ModelSlot(MODEL_RELATIVE_PATH, MIN_TRAINING_SAMPLES, "返答分類")
+
+
+def set_model(model: NaiveBayesModel | None):
+    """モデルを差し替える（None で無効化）"""
+    _model_slot.set(model)
+
+
+def classify_response_local(text: str) -> tuple[str | None, float]:
+    """
+    定型的な返答をローカルで分類する（語彙・規則 → 学習モデルの順）。
+    戻り値: (ラベル, 確信度)。判断がつかなければ (None, 0.0)
+    """
+    raw = (text or "").strip()
+    norm = normalize(raw)
+
+    if not norm:
+        return "invalid", 0.95  # 空・記号や「……」だけ
+    if REPEAT.match(norm):
+        return "invalid", 0.9
+
+    if norm in YES_WORDS:
+        return "yes", 0.95
+    if norm in NO_WORDS:
+        return "no", 0.95
+
+    # 「はい、お願いします」「うん、それで」など：肯定語 + 丁寧語だけ
+    for word in sorted(YES_WORDS, key=len, reverse=True):
+        if norm.startswith(word):
+            rest = norm[len(word):]
+            if not rest or _strip_tails(rest) in YES_WORDS or rest in POLITE_TAILS:
+                return "yes", 0.9
+            break
+    stripped = _strip_tails(norm)
+    if stripped in YES_WORDS:
+        return "yes", 0.9
+    if stripped in NO_WORDS:
+        return "no", 0.9
+
+    model = _model_slot.get()
+    if model is not None:
+        label, conf = model.predict(raw)
+        if label is not None and conf >= MODEL_CONFIDENCE_THRESHOLD:
+            return label, conf
+
+    return None, 0.0
+
+
+def normalize_response_label(result) -> str:
+    """LLM の出力を4ラベルのいずれかに揃える（読み取れなければ suggest ＝入力を改めて評価する）"""
+    text = str(result or "").strip().lower()
+    for label in RESPONSE_LABELS:
+        if re.search(rf"\b{label}\b", text):
+            return label
+    log.warning(f"返答分類の出力が想定外のため suggest として扱います: {text[:50]!r}")
+    return "suggest"
+
+
+def _label_of(response: dict) -> str | None:
+    text = str(response.get("stripped_text") or "").strip().lower()
+    return next((label for label in RESPONSE_LABELS if re.search(rf"\b{label}\b", text)), None)
+
+
+def train_from_chatlogs(chatlog_dirs: list[Path], out_path: Path | None = None) -> NaiveBayesModel:
+    """ClassifyResponse の chatlog（返答 → LLM の分類）から学習して保存する"""
+    samples = load_chatlog_samples(chatlog_dirs, "ClassifyResponse", _label_of)
+    return _model_slot.train(samples, out_path)
+
+
+if __name__ == "__main__":
+    # python -m phases.scenario.response_classifier [chatlogディレクトリ ...]
+    # 起動時に data/temp は消えるため、学習に使う chatlog は別の場所へ退避しておく
+    dirs = [Path(p) for p in sys.argv[1:]] or [get_data_path("temp/debug/chatlog")]
+    trained = train_from_chatlogs(dirs)
+    print(f"{trained.n_samples} samples: {dict(trained.label_counts)}")
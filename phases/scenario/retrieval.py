@@ -0,0 +1,163 @@
+# phases/scenario/retrieval.py
+import math
+import threading
+from collections import Counter
+from typing import Callable
+
+from infra.logging import get_logger
+
+log = get_logger("Retrieval")
+
+# BM25 のパラメータ
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 最終スコア = BM25（最大値で正規化） + FAME_WEIGHT * fame/100 + RECENCY_WEIGHT * 新しさ（0〜1）
+#   + EMBEDDING_WEIGHT * コサイン類似度（埋め込み関数が設定されている場合のみ）
+FAME_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.2
+EMBEDDING_WEIGHT = 0.5
+
+# 埋め込み関数（texts → ベクトルのリスト）。ローカルモデルを使う場合のみ set_embedder で設定する
+_embedder: Callable[[list[str]], list[list[float]]] | None = None
+
+# (種類, 索引ファイル) → (署名, 索引)。署名が変わるまで作り直さない
+_indexes: dict[tuple, tuple] = {}
+_indexes_lock = threading.Lock()
+
+
+def set_embedder(embedder: Callable[[list[str]], list[list[float]]] | None):
+    """ローカル埋め込みモデルを差し込む（None で無効化）。BM25 のスコアに類似度を加点する"""
+    global _embedder
+    _embedder = embedder
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def tokenize(text: str) -> list[str]:
+    """文字 2-gram（日本語は分かち書きしないため）。1文字の語は 1-gram"""
+    text = "".join(text.lower().split())
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def _noun_text(e: dict) -> str:
+    tags = " ".join(str(t) for t in e.get("tags", []))
+    return f"{e.get('name', '')} {e.get('name', '')} {e.get('type', '')} {e.get('category', '')} {tags} {e.get('notes', '')}"
+
+
+def _canon_text(e: dict) -> str:
+    history = " ".join(h.get("text", "") for h in e.get("history", []))
+    return f"{e.get('name', '')} {e.get('name', '')} {e.get('type', '')} {e.get('notes', '')} {e.get('history_digest', '')} {history}"
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+class RetrievalIndex:
+    """エントリ一覧に対する BM25 索引（fame / 新しさの事前スコアと、任意で埋め込みを持つ）"""
+
+    def __init__(self, entries: list[dict], text_fn: Callable[[dict], str]):
+        self.entries = list(entries)
+        texts = [text_fn(e) for e in self.entries]
+        self.doc_tfs = [Counter(tokenize(t)) for t in texts]
+        self.doc_lens = [sum(tf.values()) for tf in self.doc_tfs]
+        self.avg_len = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        df = Counter()
+        for tf in self.doc_tfs:
+            df.update(tf.keys())
+        n = len(self.entries)
+        self.idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items()}
+        self.postings: dict[str, list[int]] = {}
+        for i, tf in enumerate(self.doc_tfs):
+            for t in tf:
+                self.postings.setdefault(t, []).append(i)
+        self.prior = self._prior()
+        self.vectors = _embedder(texts) if _embedder and texts else None
+
+    def _prior(self) -> list[float]:
+        # 新しさは created（無ければ並び順）の順位で 0〜1 に正規化。canon は履歴の最新章も加味する
+        def recency_key(i_e):
+            i, e = i_e
+            last_ch = max((h.get("chapter", 0) for h in e.get("history", []) if isinstance(h.get("chapter"), int)), default=0)
+            return (last_ch, e.get("created", ""), i)
+        order = sorted(enumerate(self.entries), key=recency_key)
+        n = len(order)
+        recency = [0.0] * n
+        for rank, (i, _) in enumerate(order):
+            recency[i] = rank / (n - 1) if n > 1 else 1.0
+        prior = []
+        for i, e in enumerate(self.entries):
+            try:
+                fame = float(e.get("fame", 0) or 0)
+            except (TypeError, ValueError):
+                fame = 0.0
+            prior.append(FAME_WEIGHT * min(max(fame, 0.0), 100.0) / 100.0 + RECENCY_WEIGHT * recency[i])
+        return prior
+
+    def bm25(self, query: str) -> dict[int, float]:
+        scores: dict[int, float] = {}
+        for t, qf in Counter(tokenize(query)).items():
+            idf = self.idf.get(t)
+            if idf is None:
+                continue
+            for i in self.postings[t]:
+                tf = self.doc_tfs[i][t]
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lens[i] / self.avg_len)
+                scores[i] = scores.get(i, 0.0) + qf * idf * tf * (BM25_K1 + 1) / norm
+        return scores
+
+    def search(self, query: str, top_k: int) -> list[dict]:
+        """関連度上位 top_k 件（クエリに一致が無ければ fame / 新しさの上位）"""
+        lexical = self.bm25(query) if query else {}
+        top = max(lexical.values(), default=0.0)
+        semantic = None
+        if self.vectors is not None and query:
+            qv = _embedder([query])[0]
+            semantic = [_cosine(qv, v) for v in self.vectors]
+
+        def score(i):
+            s = self.prior[i]
+            if top:
+                s += lexical.get(i, 0.0) / top
+            if semantic is not None:
+                s += EMBEDDING_WEIGHT * semantic[i]
+            return s
+
+        ranked = sorted(range(len(self.entries)), key=lambda i: (-score(i), i))
+        # 選んだものは元の並びで返す（プロンプトの先頭を安定させる）
+        return [self.entries[i] for i in sorted(ranked[:top_k])]
+
+
+def _get_index(kind: str, mgr, text_fn) -> RetrievalIndex:
+    # 索引の保存（= エントリの変更）ごとにスタンプが変わる
+    signature = (id(mgr.entries), len(mgr.entries), mgr.index_stamp())
+    key = (kind, mgr.index_file)
+    with _indexes_lock:
+        hit = _indexes.get(key)
+    if hit is not None and hit[0] == signature:
+        return hit[1]
+    index = RetrievalIndex(mgr.entries, text_fn)
+    with _indexes_lock:
+        _indexes[key] = (signature, index)
+    log.debug(f"検索索引を作成: {kind} {len(index.entries)}件")
+    return index
+
+
+def retrieve_nouns(nouns_mgr, query: str, top_k: int) -> list[dict]:
+    """nouns_mgr（set_worldview_id 済み）から query に関連する固有名詞を top_k 件"""
+    if len(nouns_mgr.entries) <= top_k:
+        return list(nouns_mgr.entries)
+    return _get_index("nouns", nouns_mgr, _noun_text).search(query, top_k)
+
+
+def retrieve_canon(canon_mgr, query: str, top_k: int) -> list[dict]:
+    """canon_mgr（set_context 済み）から query に関連するカノンを top_k 件"""
+    if len(canon_mgr.entries) <= top_k:
+        return list(canon_mgr.entries)
+    return _get_index("canon", canon_mgr, _canon_text).search(query, top_k)
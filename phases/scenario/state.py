@@ -1,7 +1,7 @@
 # phases/scenario/state.py
 
-import json
 from infra.path_helper import get_data_path
+from infra.write_behind import read_json, write_json
 
 
 class ScenarioState:
@@ -20,13 +20,12 @@ class ScenarioState:
         self._load()
 
     def _load(self):
-        if self._path.exists():
-            with open(self._path, encoding="utf-8") as f:
-                data = json.load(f)
-                self.chapter = data.get("chapter", 0)
-                self.scene = data.get("scene", "exploration")
-                self.section = data.get("section", 0)
-                self.markers = data.get("markers", {})
+        data = read_json(self._path)
+        if data is not None:
+            self.chapter = data.get("chapter", 0)
+            self.scene = data.get("scene", "exploration")
+            self.section = data.get("section", 0)
+            self.markers = data.get("markers", {})
 
     def save(self):
         data = {
@@ -35,9 +34,7 @@ class ScenarioState:
             "section": self.section,
             "markers": self.markers
         }
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self._path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(self._path, data)
 
     # -- marker 操作用 --
 
@@ -1,4 +1,5 @@
 # phases/scenario_handler.py
+import copy
 import json
 import re
 from json import JSONDecodeError
@@ -6,13 +7,20 @@ from json import JSONDecodeError
 
 from infra.path_helper import get_data_path
 from infra.logging import get_logger
+from infra.write_behind import get_write_behind
 
 from phases.scenario.state import ScenarioState
 from phases.scenario.chapter_generator import ChapterGenerator
 from phases.scenario.intent_router import classify_intent
-from phases.scenario.intent_handler import IntentHandler
+from phases.scenario.intent_handler import IntentHandler, PREFETCHED_PROGRESSION
 from phases.scenario.conversation_log import ConversationLog
+from phases.scenario.context_window import get_window_stats
 from phases.scenario.command_handler import CommandHandler
+from phases.scenario.response_classifier import (
+    LOCAL_CONFIDENCE_THRESHOLD, classify_response_local, normalize_response_label,
+)
+from phases.scenario.gameflow.informations import Informations, get_fragment_stats
+from phases.scenario.gameflow.intro_handler import IntroHandler
 
 class ScenarioHandler:
     def __init__(self, ctx: object, progress_info: dict, debug: bool = False):
@@ -26,6 +34,13 @@ class ScenarioHandler:
         self.sid = self.flags.get("id")
 
         self.state: ScenarioState | None = None
+        # 次章プランの先読み {"chapter", "generator", "future", "log_len"}
+        self._chapter_prefetch: dict | None = None
+        # 次の導入文の先読み {"label", "chapter", "section", "future"}
+        self._intro_prefetch: dict | None = None
+
+    def _option(self, name: str) -> bool:
+        return bool(getattr(self.ctx, "options", {}).get(name))
 
     def handle(self, player_input: str) -> tuple[dict, str]:
         self.flags = self.progress_info.setdefault("flags", {})
@@ -137,14 +152,18 @@ class ScenarioHandler:
             return self.progress_info, content
       
     def _step_start_chapter(self) -> tuple[dict, str]:
-        # 章が1になるときを除き、ここで要約
+        # 章が1になるときを除き、ここで章の要約へ畳み込む（バックグラウンド）
         if getattr(self.state, "chapter", 0) != 0:
             if hasattr(self, "convlog") and self.convlog:
                 try:
-                    self.convlog.summarize_now()
+                    self.convlog.roll_up("chapter")
                 except Exception as e:
-                    self.ctx.logger.warning(f"[ScenarioHandler] 章切り替え時の要約に失敗: {e}")
+                    self.log.warning(f"[ScenarioHandler] 章切り替え時の要約に失敗: {e}")
         
+        # 前章までで伸びたカノン履歴を畳み込む（プロンプトのカノン欄を一定に保つ）
+        self.ctx.canon_mgr.set_context(self.wid, self.sid)
+        self.ctx.canon_mgr.compact_all()
+
         self.state.chapter += 1
         self.state.section = 0
         chapter = self.state.chapter
@@ -163,11 +182,16 @@ class ScenarioHandler:
             self.progress_info["step"] = 9999
             return self.progress_info, None
 
-        # 通常の章生成
-        generator = ChapterGenerator(self.ctx, self.wid, self.sid, chapter)
-        plan = generator.generate()
+        # 先読みした下書きがあればそれを使い、無ければ通常の章生成
+        plan = self._take_prefetched_plan(chapter)
+        if plan is None:
+            generator = ChapterGenerator(self.ctx, self.wid, self.sid, chapter)
+            plan = generator.generate()
         self.state.save()
 
+        if self._option("prefetch_intro") and plan.get("flow"):
+            self._prefetch_intro("chapter_intro", chapter, 1)
+
         title = plan.get("title", "")
         heading = f"\n第{chapter}章「{title}」を開始します。\n" if title else f"\n第{chapter}章を開始します。\n"
 
@@ -199,6 +223,14 @@ class ScenarioHandler:
             self.progress_info["step"] = 1000  # 新チャプターへ
             return self.progress_info, None
 
+        # 前のセクションの要約を畳み込む（章の最初のセクションは章の畳み込みで済んでいる）
+        if section > 1:
+            self._force_summarize_section()
+
+        # 章の最終セクションに入ったら、次章のプランを裏で作り始める
+        if section == len(sections) and self._option("prefetch_chapter"):
+            self._prefetch_next_chapter()
+
         section_info = sections[section - 1]
         scene = section_info.get("scene", "exploration")
 
@@ -214,6 +246,55 @@ class ScenarioHandler:
         return self.progress_info, "(セクション進行)"
 
 
+    def _prefetch_next_chapter(self):
+        next_chapter = self.state.chapter + 1
+        scenario_path = get_data_path(f"worlds/{self.wid}/sessions/{self.sid}/scenario.json")
+        try:
+            with open(scenario_path, encoding="utf-8") as f:
+                total = len(json.load(f).get("draft", {}).get("chapters", []))
+        except (OSError, JSONDecodeError):
+            return
+        if next_chapter > total:
+            return
+        generator = ChapterGenerator(self.ctx, self.wid, self.sid, next_chapter)
+        future = generator.draft_async(self.convlog.get_slim(caller_name="ChapterGenerator"))
+        if future is None:
+            return
+        self._chapter_prefetch = {
+            "chapter": next_chapter,
+            "generator": generator,
+            "future": future,
+            "log_len": len(self.convlog.messages),
+        }
+        self.log.info(f"第{next_chapter}章のプランを先読み開始")
+
+    def _take_prefetched_plan(self, chapter: int) -> dict | None:
+        """
+        先読みの下書きを確定して返す（無い・失敗した場合は None → 通常生成）。
+        下書き後にログが進んでいれば、その分だけ軽いモデルで差分調整する。
+        """
+        prefetch, self._chapter_prefetch = self._chapter_prefetch, None
+        if not prefetch or prefetch["chapter"] != chapter:
+            if prefetch:
+                prefetch["future"].cancel()
+            return None
+        try:
+            draft = prefetch["future"].result()
+        except Exception as e:
+            self.log.warning(f"第{chapter}章の先読みに失敗（通常生成へ）: {e}")
+            return None
+        if not isinstance(draft, dict) or not draft.get("flow"):
+            return None
+
+        generator = prefetch["generator"]
+        new_messages = self.convlog.messages[prefetch["log_len"]:]
+        if new_messages:
+            self.log.info(f"第{chapter}章の下書きを差分調整（{len(new_messages)}件のログ）")
+            draft = generator.refine(draft, new_messages)
+        else:
+            self.log.info(f"第{chapter}章の下書きをそのまま使用")
+        return generator.finalize(draft)
+
     def _intent_router(self, player_input: str) -> tuple[dict, str]:
         # --- デバッグ専用コマンド（--debug 時のみ有効） ---
         if getattr(self, "debug", False):
@@ -238,6 +319,9 @@ class ScenarioHandler:
                     flags_str = str(self.flags)
                 return self.progress_info, f"【デバッグ】Flags 内容:\n{flags_str}"
 
+            elif cmd == "stats":
+                return self.progress_info, "\n".join(["【デバッグ】累計統計:"] + self._debug_stats())
+
             # シナリオ終了
             if cmd == "end":
                 self.progress_info["step"] = 9999
@@ -273,7 +357,15 @@ class ScenarioHandler:
             self.progress_info["step"] = 2010
             return self.progress_info, None
 
-        label = classify_intent(self.ctx, player_input, self.convlog)
+        self.flags.pop(PREFETCHED_PROGRESSION, None)
+        if self._option("combined_intent"):
+            handler = IntentHandler(self.ctx, self.state, self.flags, self.convlog)
+            label = handler.classify_and_direct(player_input)
+        elif self._option("speculative_director"):
+            handler = IntentHandler(self.ctx, self.state, self.flags, self.convlog)
+            label = handler.classify_speculatively(player_input)
+        else:
+            label = classify_intent(self.ctx, player_input, self.convlog)
         self.flags["intent"] = label
         self.log.debug(f"intent: {label}")
 
@@ -283,13 +375,41 @@ class ScenarioHandler:
         self.progress_info["step"] = 2010
         return self.progress_info, None
 
+    def _debug_stats(self) -> list[str]:
+        """デバッグ用 stats コマンドの本文（各モジュールが集計している累計値を読み出す）"""
+        lines = ["- トークン使用量（caller ごと）:"]
+        try:
+            from ai.chat_engine import get_usage_stats
+            usage = get_usage_stats()
+        except ImportError as e:
+            usage = {}
+            lines.append(f"  (取得できません: {e})")
+        for caller, st in sorted(usage.items()):
+            ratio = st["cached_tokens"] / st["input_tokens"] if st["input_tokens"] else 0.0
+            lines.append(
+                f"  {caller}: {st['calls']}回 / input={st['input_tokens']}"
+                f" (cached={st['cached_tokens']}, {ratio:.0%}) / output={st['output_tokens']}"
+            )
+
+        lines.append("- 履歴の圧縮（caller ごと）:")
+        for caller, st in sorted(get_window_stats().items()):
+            lines.append(
+                f"  {caller}: {st['calls']}回 / {st['tokens_before']} → {st['tokens_after']} tok"
+                f"（-{st['tokens_saved']}）"
+            )
+
+        lines.append("- Informations フラグメントキャッシュ:")
+        for key, st in sorted(get_fragment_stats().items()):
+            lines.append(f"  {key}: hit={st['hits']} / miss={st['misses']}")
+        return lines
+
     def _intent_handler(self, player_input: str | None) -> tuple[dict, str]:
         if "intent" not in self.flags:
             return self._fail("意図が設定されていません")
 
         label = self.flags["intent"]
         handler = IntentHandler(self.ctx, self.state, self.flags, self.convlog)
-        message = handler.handle(label, player_input)
+        message = handler.handle(label, player_input, intro_prefetch=self._take_intro_prefetch(label))
 
         self.flags.pop("intent", None)
 
@@ -321,6 +441,8 @@ class ScenarioHandler:
             if cmd == "end_section":
                 self.progress_info["step"] = 1100
                 self.progress_info["auto_continue"] = True
+                if self._option("prefetch_intro"):
+                    self._prefetch_next_section_intro()
             elif cmd == "action_check":
                 self.progress_info["step"] = 3000
                 self.progress_info["auto_continue"] = True
@@ -337,12 +459,51 @@ class ScenarioHandler:
 
         return self.progress_info, clean
 
+    # ---- 導入文の先読み ----
+    def _prefetch_next_section_intro(self):
+        """[end_section] の時点で、同じ章の次セクションの導入文を裏で生成し始める（章の切り替えは章プラン確定後に行う）"""
+        plan_path = get_data_path(
+            f"worlds/{self.wid}/sessions/{self.sid}/chapters/chapter_{self.state.chapter:02}/plan.json"
+        )
+        try:
+            with open(plan_path, encoding="utf-8") as f:
+                sections = json.load(f).get("flow", [])
+        except (OSError, JSONDecodeError):
+            return
+        if self.state.section < len(sections):
+            self._prefetch_intro("section_intro", self.state.chapter, self.state.section + 1)
+
+    def _prefetch_intro(self, label: str, chapter: int, section: int):
+        if self._intro_prefetch:
+            self._intro_prefetch["future"].cancel()
+            self._intro_prefetch = None
+        # これから始まる位置を指す state の写し（保存はしない）で、導入と同じプロンプトを組み立てる
+        upcoming = copy.copy(self.state)
+        upcoming.chapter = chapter
+        upcoming.section = section
+        infos = Informations(upcoming, self.ctx).snapshot()
+        future = IntroHandler(self.ctx, upcoming, self.convlog, infos, self.flags).prefetch(label)
+        if future is None:
+            return
+        self._intro_prefetch = {"label": label, "chapter": chapter, "section": section, "future": future}
+        self.log.info(f"{label} を先読み開始: ch{chapter}-{section}")
+
+    def _take_intro_prefetch(self, label: str):
+        """現在の位置・ラベルに一致する先読みの Future を返す（一致しなければ破棄して None）"""
+        prefetch, self._intro_prefetch = self._intro_prefetch, None
+        if not prefetch:
+            return None
+        if (prefetch["label"], prefetch["chapter"], prefetch["section"]) != (label, self.state.chapter, self.state.section):
+            prefetch["future"].cancel()
+            return None
+        return prefetch["future"]
+
     def _force_summarize_section(self):
         if hasattr(self, "convlog") and self.convlog:
             try:
-                self.convlog.summarize_now()
+                self.convlog.roll_up("section")
             except Exception as e:
-                print(f"[WARNING] summarize_now() failed: {e}")
+                self.log.warning(f"[ScenarioHandler] セクション切り替え時の要約に失敗: {e}")
 
     def _handle_action_check_init(self) -> tuple[dict, str | None]:
         self.flags.pop("action_check_plan", None)
@@ -450,6 +611,12 @@ class ScenarioHandler:
         return self.progress_info, None
 
     def _classify_response(self, text: str) -> str:
+        # 「はい」「お願いします」「……」のような定型の返答はローカルで即決する
+        label, confidence = classify_response_local(text)
+        if label is not None and confidence >= LOCAL_CONFIDENCE_THRESHOLD:
+            self.log.debug(f"返答分類（ローカル）: {label} ({confidence:.2f})")
+            return label
+
         messages = [
             {
                 "role": "system",
@@ -465,14 +632,22 @@ class ScenarioHandler:
             {"role": "user", "content": text.strip()}
         ]
 
-        result = self.ctx.engine.chat(messages, model_level="medium", max_tokens=2000).strip().lower()
-        return result
+        result = self.ctx.engine.chat(
+            messages, caller_name="ClassifyResponse", model_level="medium", max_tokens=2000
+        )
+        return normalize_response_label(result)
 
     def _step_finalize_scenario(self) -> tuple[dict, str]:
+        if getattr(self, "convlog", None):
+            self.convlog.close()
         self.ctx.session_mgr.end_session(self.sid)
         self.ctx.state.mark_session_end()
         if self.state:
             self.state.clear_all()
+        # セッションの区切りでは書き込み待ちのキャラクターも含めて書き切る
+        if getattr(self.ctx, "character_mgr", None):
+            self.ctx.character_mgr.flush_characters()
+        get_write_behind().flush()
 
         try:
             self._generate_session_summary()
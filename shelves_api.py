@@ -10,7 +10,10 @@ from core.session_manager import SessionManager
 from core.character_manager import CharacterManager
 from core.nouns_manager import NounsManager
 from core.canon_manager import CanonManager
+from core.storage import create_storage, set_storage
 from ai.chat_engine import ChatEngine
+from ai.response_cache import ResponseCache, DEFAULT_CACHE_TTLS
+from ai.async_chat_engine import AsyncChatEngine
 
 from core.dice import roll_dice
 from infra.path_helper import get_data_path, get_resource_path
@@ -21,9 +24,17 @@ from infra.logging import set_api_log_callback
 log = get_logger("ShelvesAPI")
 
 class ShelvesAPI:
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, use_cache: bool = False, combined_intent: bool = False,
+                 speculative_director: bool = False, storage: str = "json", prefetch_chapter: bool = False,
+                 prefetch_intro: bool = False):
         set_debug_enabled(debug)
         self.debug = debug
+        self.use_cache = use_cache
+        self.combined_intent = combined_intent
+        self.speculative_director = speculative_director
+        self.storage = storage
+        self.prefetch_chapter = prefetch_chapter
+        self.prefetch_intro = prefetch_intro
         self.engine = None
         self.ctx = None
         self.controller = None
@@ -59,10 +70,15 @@ class ShelvesAPI:
     def initialize(self):
         """起動準備と初期化"""
         self._clean_temp_folder()
+        set_storage(create_storage(self.storage))
         api_key_path = self._ensure_api_key_file()
         if not check_online():
             raise RuntimeError("ネットワークに接続できません")
-        self.engine = ChatEngine(api_key_path=api_key_path, debug=self.debug)
+        self.engine = ChatEngine(
+            api_key_path=api_key_path,
+            debug=self.debug,
+            cache=ResponseCache(ttls=DEFAULT_CACHE_TTLS) if self.use_cache else None,
+        )
 
         self.state = SessionState()
         interrupted_session = (
@@ -74,13 +90,21 @@ class ShelvesAPI:
 
         self.ctx = AppContext(
             engine=self.engine,
+            async_engine_factory=lambda: AsyncChatEngine(api_key_path=api_key_path, debug=self.debug,
+                                                         cache=self.engine.cache, rate_limiter=self.engine.rate_limiter),
             ui=None,  # UI依存を排除
             state=self.state,
             worldview_mgr=WorldviewManager(),
             session_mgr=SessionManager(),
             character_mgr=CharacterManager(),
             nouns_mgr=NounsManager(),
-            canon_mgr=CanonManager()
+            canon_mgr=CanonManager(),
+            options={
+                "combined_intent": self.combined_intent,
+                "speculative_director": self.speculative_director,
+                "prefetch_chapter": self.prefetch_chapter,
+                "prefetch_intro": self.prefetch_intro,
+            },
         )
         self.controller = MainController(self.ctx, debug=self.debug)
         self.progress_info = {
@@ -177,5 +201,7 @@ class ShelvesAPI:
         threading.Thread(target=loop, daemon=True).start()
 
     def stop_loop(self):
-        """ゲームループを終了する"""
+        """ゲームループを終了する（非同期エンジンを作っていれば閉じる）"""
         self._running = False
+        if self.ctx is not None:
+            self.ctx.close()
@@ -0,0 +1,48 @@
+# tests/conftest.py
+from types import SimpleNamespace
+
+import pytest
+
+from core.app_context import AppContext
+from core.canon_manager import CanonManager
+from core.character_manager import CharacterManager
+from core.nouns_manager import NounsManager
+from core import storage
+from core.session_manager import SessionManager
+from core.storage import JsonStorage, set_storage
+from core.worldview_manager import WorldviewManager
+from infra import path_helper
+from infra.write_behind import get_write_behind
+from phases.scenario.gameflow import informations
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """data/ を tmp_path に差し替え、JSON ストレージで動かす"""
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    monkeypatch.setattr(storage, "get_data_base", lambda: tmp_path)
+    set_storage(JsonStorage())
+    yield tmp_path
+    get_write_behind().flush()
+
+
+@pytest.fixture
+def world(data_dir, monkeypatch):
+    """世界観・PC・セッションを1つずつ作った ctx と state（第1章第1セクション）"""
+    monkeypatch.setattr(informations, "_snapshots", {})
+    monkeypatch.setattr(informations, "_fragments", {})
+    monkeypatch.setattr(informations, "_fragment_stats", {})
+
+    ctx = AppContext(
+        engine=None, ui=None, state=None,
+        worldview_mgr=WorldviewManager(), session_mgr=SessionManager(), nouns_mgr=NounsManager(),
+        character_mgr=CharacterManager(), canon_mgr=CanonManager(),
+    )
+    wid = ctx.worldview_mgr.create_worldview("テスト世界", "霧の大陸")["id"]
+    ctx.character_mgr.set_worldview_id(wid)
+    pcid = ctx.character_mgr.create_character("アリア", {"name": "アリア", "level": 1, "background": "旅人"})
+    sid = ctx.session_mgr.new_session(wid, "テスト", pcid)
+    ctx.nouns_mgr.set_worldview_id(wid)
+    ctx.canon_mgr.set_context(wid, sid)
+    state = SimpleNamespace(worldview_id=wid, session_id=sid, chapter=1, section=1)
+    return SimpleNamespace(ctx=ctx, state=state, wid=wid, sid=sid, pcid=pcid)
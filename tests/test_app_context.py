@@ -0,0 +1,41 @@
+# tests/test_app_context.py
+from core.app_context import AppContext
+
+
+class _AsyncEngine:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _ctx(factory):
+    return AppContext(engine=None, ui=None, state=None, worldview_mgr=None, session_mgr=None, nouns_mgr=None,
+                      async_engine_factory=factory)
+
+
+def test_async_engine_is_created_on_first_use_only():
+    created = []
+    ctx = _ctx(lambda: created.append(_AsyncEngine()) or created[-1])
+    assert created == []
+    first = ctx.async_engine
+    assert ctx.async_engine is first
+    assert len(created) == 1
+
+
+def test_close_closes_created_engine_and_stops_recreating():
+    created = []
+    ctx = _ctx(lambda: created.append(_AsyncEngine()) or created[-1])
+    engine = ctx.async_engine
+    ctx.close()
+    assert engine.closed
+    assert ctx.async_engine is None
+    assert len(created) == 1
+
+
+def test_close_without_use_creates_nothing():
+    created = []
+    ctx = _ctx(lambda: created.append(_AsyncEngine()) or created[-1])
+    ctx.close()
+    assert created == []
@@ -0,0 +1,40 @@
+# tests/test_base_manager.py
+from core.base_manager import BaseManager
+
+
+def _manager(data_dir, entries=None) -> BaseManager:
+    mgr = BaseManager("Test", "worlds/index.json")
+    if entries is not None:
+        mgr.entries = entries
+    return mgr
+
+
+def test_lookup_by_id_uses_the_index(data_dir):
+    mgr = _manager(data_dir, [{"id": "a"}, {"id": "b"}])
+    assert mgr.get_entry_by_id("b") is mgr.entries[1]
+    assert mgr.get_entry_by_id("z") is None
+
+
+def test_duplicate_ids_resolve_to_the_first_entry(data_dir):
+    mgr = _manager(data_dir, [{"id": "a", "n": 1}, {"id": "a", "n": 2}])
+    assert mgr.get_entry_by_id("a")["n"] == 1
+
+
+def test_added_entries_are_indexed(data_dir):
+    mgr = _manager(data_dir, [])
+    entry = {"id": "c"}
+    mgr._add_entry(entry)
+    assert mgr.get_entry_by_id("c") is entry
+
+
+def test_replacing_entries_rebuilds_the_index(data_dir):
+    mgr = _manager(data_dir, [{"id": "a"}])
+    mgr.entries = [{"id": "b"}]
+    assert mgr.get_entry_by_id("a") is None
+    assert mgr.get_entry_by_id("b") is not None
+
+
+def test_direct_list_changes_are_picked_up(data_dir):
+    mgr = _manager(data_dir, [{"id": "a"}])
+    mgr.entries.append({"id": "b"})  # 旧来のコードが一覧を直接いじる場合
+    assert mgr.get_entry_by_id("b") is mgr.entries[1]
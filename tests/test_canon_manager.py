@@ -0,0 +1,63 @@
+# tests/test_canon_manager.py
+import pytest
+
+from core import canon_manager
+from core.canon_manager import KEEP_RECENT_HISTORY, CanonManager
+
+
+@pytest.fixture
+def canon(data_dir):
+    mgr = CanonManager()
+    mgr.set_context("w1", "s1")
+    yield mgr
+    mgr.archive.close()
+
+
+def _long(i: int) -> str:
+    return f"出来事{i}：" + "霧の中で門番と言葉を交わした。" * 10
+
+
+def test_short_history_is_left_alone(canon):
+    cid = canon.create_fact("門番", "人物", "門を守る老人")
+    for ch in range(1, 4):
+        canon.append_history(cid, f"第{ch}章の短い出来事", ch)
+    entry = canon.get_entry_by_id(cid)
+    assert len(entry["history"]) == 3
+    assert "history_digest" not in entry
+
+
+def test_old_history_is_folded_into_digest_and_archived(canon):
+    cid = canon.create_fact("門番", "人物", "門を守る老人")
+    canon.append_history(cid, "初期設定の履歴", 0)
+    for ch in range(1, 7):
+        canon.append_history(cid, _long(ch), ch)
+    entry = canon.get_entry_by_id(cid)
+
+    # 初期設定は常に残り、その後ろに直近の履歴が続く
+    assert entry["history"][0]["chapter"] == 0
+    assert [h["chapter"] for h in entry["history"][1:]] == list(range(7 - KEEP_RECENT_HISTORY, 7))
+    assert f"第{6 - KEEP_RECENT_HISTORY}章" in entry["history_digest"]
+    assert entry["tokens"] == canon_manager._entry_tokens(entry)
+
+    # アーカイブと合わせれば全履歴が時系列どおりに戻る
+    full = canon.get_full_history(cid)
+    assert [h["chapter"] for h in full] == list(range(0, 7))
+
+
+def test_digest_is_truncated_from_the_oldest_side(canon, monkeypatch):
+    monkeypatch.setattr(canon_manager, "DIGEST_MAX_CHARS", 50)
+    cid = canon.create_fact("門番", "人物", "")
+    for ch in range(1, 10):
+        canon.append_history(cid, _long(ch), ch)
+    digest = canon.get_entry_by_id(cid)["history_digest"]
+    assert len(digest) == 50
+    assert digest.startswith("…")
+
+
+def test_compact_all_folds_existing_entries(canon):
+    cid = canon.create_fact("門番", "人物", "")
+    entry = canon.get_entry_by_id(cid)
+    entry["history"] = [{"chapter": ch, "text": _long(ch)} for ch in range(1, 8)]  # 旧データ
+    assert canon.compact_all() == 1
+    assert len(entry["history"]) == 1 + KEEP_RECENT_HISTORY
+    assert canon.compact_all() == 0
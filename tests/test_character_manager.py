@@ -0,0 +1,43 @@
+# tests/test_character_manager.py
+import json
+
+from core import character_manager
+from core.character_manager import CharacterManager
+from core.storage import JsonStorage, set_storage
+from infra import path_helper
+
+
+def _manager(tmp_path, monkeypatch) -> CharacterManager:
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    set_storage(JsonStorage())
+    mgr = CharacterManager()
+    mgr.set_worldview_id("w1")
+    return mgr
+
+
+def test_sync_flush_writes_to_disk(tmp_path, monkeypatch):
+    mgr = _manager(tmp_path, monkeypatch)
+    cid = mgr.create_character("A", {"name": "A", "level": 1})
+    path = mgr.base_dir / f"{cid}.json"
+    assert json.loads(path.read_text(encoding="utf-8"))["level"] == 1
+
+    data = mgr.load_character_file(cid)
+    data["level"] = 2
+    mgr.save_character_file(cid, data)
+    mgr.flush_characters(sync=True)
+    assert json.loads(path.read_text(encoding="utf-8"))["level"] == 2
+
+
+def test_exit_hook_flushes_every_live_manager(tmp_path, monkeypatch):
+    mgr = _manager(tmp_path, monkeypatch)
+    other = CharacterManager()
+    assert {mgr, other} <= set(character_manager._managers)
+
+    cid = mgr.create_character("A", {"name": "A", "level": 1})
+    data = mgr.load_character_file(cid)
+    data["level"] = 5
+    mgr.save_character_file(cid, data)
+
+    character_manager._flush_all_characters()
+    path = mgr.base_dir / f"{cid}.json"
+    assert json.loads(path.read_text(encoding="utf-8"))["level"] == 5
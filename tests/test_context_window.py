@@ -0,0 +1,28 @@
+# tests/test_context_window.py
+from phases.scenario import context_window
+
+
+def _msg(role, content):
+    return {"role": role, "content": content}
+
+
+def test_fit_history_keeps_order_and_drops_orphaned_answer(monkeypatch):
+    monkeypatch.setattr(context_window, "_cost", lambda m: 10)
+    messages = [
+        _msg("system", "S1"),
+        _msg("user", "u1"), _msg("assistant", "a1"),
+        _msg("system", "S2"),
+        _msg("user", "u2"), _msg("assistant", "a2"),
+        _msg("user", "u3"), _msg("assistant", "a3"),
+    ]
+    # 直近2件 + 要約2件 + a2, u2, a1 まで入り、u1 で打ち切り → 質問の無い a1 は落とす
+    kept, before, after = context_window.fit_history(messages, 75)
+    assert [m["content"] for m in kept] == ["S1", "S2", "u2", "a2", "u3", "a3"]
+    assert (before, after) == (80, 60)
+
+
+def test_fit_history_within_budget_is_unchanged(monkeypatch):
+    monkeypatch.setattr(context_window, "_cost", lambda m: 10)
+    messages = [_msg("user", "u1"), _msg("system", "S1"), _msg("assistant", "a1")]
+    kept, _, _ = context_window.fit_history(messages, 100)
+    assert kept == messages
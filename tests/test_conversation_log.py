@@ -0,0 +1,187 @@
+# tests/test_conversation_log.py
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from infra import path_helper
+from phases.scenario import conversation_log
+from phases.scenario.conversation_log import ConversationLog
+
+
+class _Engine:
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, prompt=None, messages=None, caller_name="", **kwargs):
+        self.calls.append(caller_name)
+        return f"{caller_name} の要約"
+
+
+@pytest.fixture
+def convlog(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    engine = _Engine()
+    log = ConversationLog("w", "s", SimpleNamespace(engine=engine))
+    monkeypatch.setattr(log, "build_context_prompt", lambda query=None: [])
+    yield log
+    log.close()
+
+
+def _contents(log):
+    return [(m["role"], m["content"]) for m in log.slim_messages]
+
+
+def test_roll_up_folds_only_messages_present_when_queued(convlog):
+    for i in range(3):
+        convlog.append("user", f"u{i}")
+        convlog.append("assistant", f"a{i}")
+
+    # 先に積まれた仕事でワーカーを塞ぎ、区切りの要約が拾われる前に次の章のログが届く状況を作る
+    gate = threading.Event()
+    conversation_log._summary_executor.submit(gate.wait)
+    future = convlog.roll_up("chapter")
+    convlog.append("user", "next-chapter")
+    convlog.append("assistant", "next-answer")
+    gate.set()
+    future.result(timeout=5)
+
+    assert _contents(convlog) == [
+        ("summary", "LogSummary.chapter の要約"),
+        ("user", "u2"), ("assistant", "a2"),
+        ("user", "next-chapter"), ("assistant", "next-answer"),
+    ]
+    assert convlog.slim_messages[0]["level"] == "chapter"
+
+
+def test_section_roll_up_keeps_last_exchange(convlog):
+    convlog.append("user", "u0")
+    convlog.append("assistant", "a0")
+    convlog.append("user", "u1")
+    convlog.append("assistant", "a1")
+    convlog.roll_up("section").result(timeout=5)
+    assert _contents(convlog) == [
+        ("summary", "LogSummary.section の要約"), ("user", "u1"), ("assistant", "a1"),
+    ]
+
+
+class _AsyncEngine:
+    """run だけを持つ AsyncChatEngine の代役（コルーチンはその場で回す）"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def chat(self, prompt=None, messages=None, caller_name="", **kwargs):
+        self.calls.append(caller_name)
+        return f"{caller_name} の要約（async）"
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+
+def test_background_summary_uses_async_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    engine, async_engine = _Engine(), _AsyncEngine()
+    log = ConversationLog("w", "s", SimpleNamespace(engine=engine, async_engine=async_engine))
+    monkeypatch.setattr(log, "build_context_prompt", lambda query=None: [])
+    try:
+        log.append("user", "u0")
+        log.append("assistant", "a0")
+        log.append("user", "u1")
+        log.append("assistant", "a1")
+        log.roll_up("section").result(timeout=5)
+    finally:
+        log.close()
+    assert async_engine.calls == ["LogSummary.section"]
+    assert engine.calls == []
+    assert log.slim_messages[0]["content"] == "LogSummary.section の要約（async）"
+
+
+# ---- JSONL ジャーナルからの復元・旧形式の移行 ----
+
+def test_reopen_replays_full_and_slim_journals(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    log = ConversationLog("w", "s")
+    log.append("user", "u0")
+    log.append("assistant", "a0")
+    log.close()
+
+    reopened = ConversationLog("w", "s")
+    expected = [{"role": "user", "content": "u0"}, {"role": "assistant", "content": "a0"}]
+    assert reopened.get() == expected
+    assert reopened.slim_messages == expected
+    reopened.close()
+
+
+def test_slim_snapshot_is_not_replayed_twice(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    log = ConversationLog("w", "s")
+    log.append("user", "u0")
+    with log._lock:
+        log._compact_slim()  # ここまでをスナップショットへ
+    log.append("assistant", "a0")
+    log.close()
+
+    reopened = ConversationLog("w", "s")
+    assert _contents(reopened) == [("user", "u0"), ("assistant", "a0")]
+    reopened.close()
+
+
+def test_legacy_json_logs_are_migrated(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    session_dir = tmp_path / "worlds" / "w" / "sessions" / "s"
+    session_dir.mkdir(parents=True)
+    legacy = [{"role": "user", "content": "old"}, {"role": "assistant", "content": "reply"}]
+    (session_dir / "conversation.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+    (session_dir / "conversation_slim.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+
+    log = ConversationLog("w", "s")
+    assert log.get() == legacy
+    assert log.slim_messages == legacy
+    assert (session_dir / "conversation.jsonl").exists()
+    assert (session_dir / "conversation.json.bak").exists()
+    assert not (session_dir / "conversation.json").exists()
+
+    log.append("user", "new")
+    log.close()
+    reopened = ConversationLog("w", "s")
+    assert [m["content"] for m in reopened.get()] == ["old", "reply", "new"]
+    reopened.close()
+
+
+# ---- バックグラウンド要約 ----
+
+def _append_loops(log, start, count):
+    for i in range(start, start + count):
+        log.append("user", f"u{i}")
+        log.append("assistant", f"a{i}")
+
+
+def test_block_summary_runs_in_background_and_keeps_new_turns(convlog):
+    gate = threading.Event()
+    conversation_log._summary_executor.submit(gate.wait)
+    _append_loops(convlog, 0, 11)  # 10 ループを超えたので要約が積まれる（ターンは待たない）
+    assert convlog._block_job_queued
+    _append_loops(convlog, 11, 2)  # 要約待ちの間に届いたターン
+    assert len(convlog.get()) == 26
+    gate.set()
+    convlog.wait_pending_summary(timeout=5)
+
+    contents = _contents(convlog)
+    assert contents[0] == ("summary", "LogSummary の要約")
+    assert contents[1:] == [(r, f"{r[0]}{i}") for i in range(5, 13) for r in ("user", "assistant")]
+    assert not convlog._block_job_queued
+
+
+def test_only_one_block_summary_is_queued_at_a_time(convlog):
+    gate = threading.Event()
+    conversation_log._summary_executor.submit(gate.wait)
+    _append_loops(convlog, 0, 11)
+    first = convlog._pending_summary
+    _append_loops(convlog, 11, 3)
+    assert convlog._pending_summary is first
+    gate.set()
+    convlog.wait_pending_summary(timeout=5)
+    assert convlog.ctx.engine.calls.count("LogSummary") == 1
@@ -0,0 +1,158 @@
+# tests/test_director.py
+import asyncio
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from phases.scenario import intent_handler
+from phases.scenario.gameflow.director import Director
+from phases.scenario.intent_handler import PREFETCHED_PROGRESSION
+from phases.scenario.intent_router import CATEGORIES
+
+
+class _Engine:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def chat(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.result
+
+
+class _Infos:
+    def build_segments(self, include=None, chapter=1):
+        return [("worldview", "世界観")]
+
+    def get_current_section_goal(self):
+        return "門を抜ける"
+
+
+class _ConvLog:
+    def get_slim(self, caller_name=None):
+        return [{"role": "user", "content": "前の入力"}]
+
+
+PROGRESSION = {
+    "act": "門を調べる",
+    "flow": {"loc": "門", "obj": "通り抜ける", "nps": [], "env": {"t": "夜", "w": "霧", "s": "静か"}, "pts": []},
+    "cmd": [],
+    "cue": "none",
+}
+
+
+@pytest.fixture
+def make_director(data_dir):
+    def make(result, async_engine=None):
+        ctx = SimpleNamespace(engine=_Engine(result), async_engine=async_engine)
+        state = SimpleNamespace(worldview_id="w", session_id="s", chapter=1, section=1)
+        return Director(ctx, state, {}, _ConvLog(), _Infos())
+    return make
+
+
+def _assert_strict(schema: dict):
+    """strict モードの要件：object は全プロパティ required・additionalProperties=false"""
+    if schema.get("type") == "object":
+        assert schema.get("additionalProperties") is False
+        assert set(schema["required"]) == set(schema["properties"])
+    for sub in schema.get("properties", {}).values():
+        _assert_strict(sub)
+    for sub in schema.get("anyOf", []):
+        _assert_strict(sub)
+    if isinstance(schema.get("items"), dict):
+        _assert_strict(schema["items"])
+
+
+def test_combined_schema_is_strict_and_nullable():
+    schema = Director.combined_schema()
+    assert schema["strict"] is True
+    body = schema["schema"]
+    _assert_strict(body)
+    assert body["properties"]["category"]["enum"] == CATEGORIES
+    options = body["properties"]["progression"]["anyOf"]
+    assert {"type": "null"} in options
+    progression = next(o for o in options if o.get("type") == "object")
+    assert "$schema" not in progression
+    assert progression["properties"] == Director.progression_schema["schema"]["properties"]
+
+
+def test_combined_action_returns_and_persists_progression(make_director):
+    director = make_director({"category": "action", "progression": PROGRESSION})
+    assert director.handle_with_intent("門を調べる") == ("action", PROGRESSION)
+    assert director._load_progression_from_disk() == PROGRESSION
+    call = director.ctx.engine.calls[0]
+    assert call["caller_name"] == "Director.combined"
+    assert call["messages"][-1]["role"] == "user"
+
+
+def test_combined_non_action_drops_progression(make_director):
+    director = make_director({"category": "info_request", "progression": PROGRESSION})
+    assert director.handle_with_intent("ここはどこ？") == ("info_request", None)
+    assert director._load_progression_from_disk() is None
+
+
+@pytest.mark.parametrize("result", ["壊れた応答", {"category": "unknown", "progression": None}])
+def test_combined_unusable_response_falls_back_to_other(make_director, result):
+    assert make_director(result).handle_with_intent("？") == ("other", None)
+
+
+
+# ---- 投機実行（speculative モード） ----
+
+class _AsyncEngine:
+    """submit したコルーチンを保持し、テスト側で完了させる AsyncChatEngine の代役"""
+
+    def __init__(self):
+        self.pending = []
+
+    async def chat(self, **kwargs):
+        return PROGRESSION
+
+    def submit(self, coro) -> Future:
+        future = Future()
+        self.pending.append((coro, future))
+        return future
+
+    def complete(self):
+        for coro, future in self.pending:
+            if future.cancelled():
+                coro.close()
+            elif not future.done():
+                future.set_result(asyncio.run(coro))
+
+
+@pytest.fixture
+def speculate(world, monkeypatch):
+    """classify_intent が label を返す状況で classify_speculatively を実行する"""
+    async_engine = _AsyncEngine()
+    monkeypatch.setattr(world.ctx, "_async_engine", async_engine)
+    flags = {}
+    handler = intent_handler.IntentHandler(world.ctx, world.state, flags, _ConvLog())
+
+    def run(label: str):
+        def classify(ctx, text, convlog):
+            if label == "action":
+                async_engine.complete()  # 分類の間に先行実行が終わる
+            return label
+        monkeypatch.setattr(intent_handler, "classify_intent", classify)
+        result = handler.classify_speculatively("扉を押し開ける")
+        async_engine.complete()
+        return result, flags, handler.director, [f for _, f in async_engine.pending]
+
+    return run
+
+
+def test_speculation_is_committed_for_action(speculate):
+    label, flags, director, futures = speculate("action")
+    assert label == "action"
+    assert flags[PREFETCHED_PROGRESSION] == PROGRESSION
+    assert director._load_progression_from_disk() == PROGRESSION
+
+
+def test_speculation_is_discarded_for_other_labels(speculate):
+    label, flags, director, futures = speculate("gm_query")
+    assert label == "gm_query"
+    assert futures[0].cancelled()
+    assert PREFETCHED_PROGRESSION not in flags
+    assert director._load_progression_from_disk() is None
@@ -0,0 +1,101 @@
+# tests/test_informations.py
+import json
+
+import pytest
+
+from infra.path_helper import get_data_path
+from phases.scenario.gameflow.informations import Informations
+
+
+def _write_plan(world, goals):
+    path = get_data_path(f"worlds/{world.wid}/sessions/{world.sid}/chapters/chapter_01/plan.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    plan = {"title": "霧の門", "flow": [{"goal": g, "description": ""} for g in goals]}
+    path.write_text(json.dumps(plan, ensure_ascii=False), encoding="utf-8")
+
+
+# ---- ターンごとのスナップショット ----
+
+def test_snapshot_is_reused_while_nothing_changes(world):
+    first = Informations(world.state, world.ctx).snapshot()
+    assert Informations(world.state, world.ctx).snapshot() is first
+
+
+def test_snapshot_is_rebuilt_when_the_section_moves(world):
+    _write_plan(world, ["門を探す", "門を抜ける"])
+    first = Informations(world.state, world.ctx).snapshot()
+    world.state.section = 2
+    second = Informations(world.state, world.ctx).snapshot()
+    assert second is not first
+    assert second.get_current_section_goal() == "門を抜ける"
+
+
+def test_snapshot_is_rebuilt_when_a_dependency_is_saved(world):
+    first = Informations(world.state, world.ctx).snapshot()
+    world.ctx.nouns_mgr.create_noun(name="霧の門", type="地名", notes="北の果ての門")
+    second = Informations(world.state, world.ctx).snapshot()
+    assert second is not first
+    assert "霧の門" in second.build("nouns")
+
+
+def test_snapshot_sees_character_changes(world):
+    first = Informations(world.state, world.ctx).snapshot()
+    data = world.ctx.character_mgr.load_character_file(world.pcid)
+    data["level"] = 7
+    world.ctx.character_mgr.save_character_file(world.pcid, data)
+    second = Informations(world.state, world.ctx).snapshot()
+    assert second is not first
+    assert "レベル7" in second.build("character")
+    assert "レベル1" in first.build("character")  # 既に配ったスナップショットは変わらない
+
+
+# ---- キー単位のフラグメントキャッシュ ----
+
+@pytest.fixture
+def renders(world, monkeypatch):
+    """組み立て直したキーの記録"""
+    rendered = []
+    original = Informations._render
+
+    def counting(self, key, chapter):
+        rendered.append(key)
+        return original(self, key, chapter)
+
+    monkeypatch.setattr(Informations, "_render", counting)
+    return rendered
+
+
+def test_unchanged_fragments_come_from_the_cache(world, renders):
+    infos = Informations(world.state, world.ctx)
+    first = infos.build_segments()
+    renders.clear()
+    assert Informations(world.state, world.ctx).build_segments() == first
+    assert renders == []
+
+
+def test_only_fragments_depending_on_the_change_are_rebuilt(world, renders):
+    Informations(world.state, world.ctx).build_segments()
+    renders.clear()
+    world.ctx.nouns_mgr.create_noun(name="霧の門", type="地名")
+    segments = dict(Informations(world.state, world.ctx).build_segments())
+    assert renders == ["nouns"]
+    assert "霧の門" in segments["nouns"]
+
+
+def test_section_change_rebuilds_section_dependent_fragments(world, renders):
+    _write_plan(world, ["門を探す", "門を抜ける"])
+    Informations(world.state, world.ctx).build_segments()
+    renders.clear()
+    world.state.section = 2
+    Informations(world.state, world.ctx).build_segments()
+    assert sorted(renders) == ["canon", "nouns", "plan"]
+
+
+def test_plan_rewrite_invalidates_plan_and_retrieval(world, renders):
+    _write_plan(world, ["門を探す"])
+    Informations(world.state, world.ctx).build_segments()
+    renders.clear()
+    _write_plan(world, ["塔に登る（書き換え後）"])
+    plan = dict(Informations(world.state, world.ctx).build_segments())["plan"]
+    assert "塔に登る" in plan
+    assert "worldview" not in renders and "character" not in renders
@@ -0,0 +1,55 @@
+# tests/test_intent_preclassifier.py
+from types import SimpleNamespace
+
+import pytest
+
+from phases.scenario.intent_preclassifier import classify_by_rules
+from phases.scenario.intent_router import INTENT_HISTORY_MESSAGES, classify_intent
+
+
+@pytest.mark.parametrize("text", ["セーブしたい", "セーブ", "ゲームを中断したい", "help"])
+def test_system_requests(text):
+    assert classify_by_rules(text)[0] == "system"
+
+
+@pytest.mark.parametrize("text", ["……", "", "あああ"])
+def test_invalid_inputs(text):
+    assert classify_by_rules(text)[0] == "invalid"
+
+
+@pytest.mark.parametrize("text", [
+    "セーブポイントを探す",
+    "力をセーブして戦う",
+    "ゲームを終わらせる魔王を倒す",
+    "ゴブリンを殴るw",
+    "草w",
+])
+def test_in_game_actions_are_left_to_llm(text):
+    assert classify_by_rules(text) == (None, 0.0)
+
+
+class _Engine:
+    def __init__(self):
+        self.messages = None
+
+    def chat(self, messages, **kwargs):
+        self.messages = messages
+        return {"category": "action"}
+
+
+class _ConvLog:
+    def get_slim(self, caller_name=None):
+        return [{"role": "user", "content": f"m{i}"} for i in range(20)]
+
+
+def test_classify_intent_short_circuits_confident_inputs():
+    engine = _Engine()
+    assert classify_intent(SimpleNamespace(engine=engine), "セーブしたい", _ConvLog()) == "system"
+    assert engine.messages is None
+
+
+def test_classify_intent_sends_ambiguous_inputs_with_recent_history():
+    engine = _Engine()
+    assert classify_intent(SimpleNamespace(engine=engine), "扉を開ける", _ConvLog()) == "action"
+    history = engine.messages[1:-1]
+    assert [m["content"] for m in history] == [f"m{i}" for i in range(20 - INTENT_HISTORY_MESSAGES, 20)]
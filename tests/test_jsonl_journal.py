@@ -0,0 +1,32 @@
+# tests/test_jsonl_journal.py
+from infra.jsonl_journal import JsonlJournal
+
+
+def test_appended_records_are_read_back_in_order(tmp_path):
+    journal = JsonlJournal(tmp_path / "log.jsonl")
+    for i in range(3):
+        journal.append({"n": i})
+    journal.close()
+    assert JsonlJournal(tmp_path / "log.jsonl").read() == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "log.jsonl"
+    journal = JsonlJournal(path)
+    journal.append({"n": 0})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"n": 1')  # 書き込み途中で落ちた行
+    reader = JsonlJournal(path)
+    assert reader.read() == [{"n": 0}]
+    assert reader.line_count == 1
+
+
+def test_rewrite_replaces_the_whole_file(tmp_path):
+    path = tmp_path / "log.jsonl"
+    journal = JsonlJournal(path)
+    journal.append({"n": 0})
+    journal.rewrite([{"n": 9}])
+    journal.append({"n": 10})
+    journal.close()
+    assert JsonlJournal(path).read() == [{"n": 9}, {"n": 10}]
@@ -0,0 +1,59 @@
+# tests/test_nouns_manager.py
+import pytest
+
+from core.nouns_manager import NounsManager
+
+
+@pytest.fixture
+def nouns(data_dir):
+    mgr = NounsManager()
+    mgr.set_worldview_id("w1")
+    mgr.create_noun(name="霧の門", type="地名", tags=["北", "遺跡"], category="場所", fame=10)
+    mgr.create_noun(name="門番ガロ", type="人物", tags=["北"], fame=40)
+    mgr.create_noun(name="Harbor", type="地名", tags=["港"], category="場所", fame=20)
+    return mgr
+
+
+def _names(entries):
+    return [e["name"] for e in entries]
+
+
+def test_filters_match_a_linear_scan(nouns):
+    assert _names(nouns.filter_by_type("地名")) == [e["name"] for e in nouns.entries if e["type"] == "地名"]
+    assert _names(nouns.filter_by_tag("北")) == ["霧の門", "門番ガロ"]
+    assert _names(nouns.filter_by_category("場所")) == ["霧の門", "Harbor"]
+    assert nouns.filter_by_tag("なし") == []
+    assert {t: _names(v) for t, v in nouns.get_grouped_by_type().items()} == {
+        "地名": ["霧の門", "Harbor"], "人物": ["門番ガロ"],
+    }
+
+
+@pytest.mark.parametrize("keyword, expected", [
+    ("門", ["霧の門", "門番ガロ"]),
+    ("霧の", ["霧の門"]),
+    ("harb", ["Harbor"]),   # 大文字小文字は区別しない
+    ("霧門", []),           # 文字が揃っていても連続していなければ一致しない
+    ("", ["霧の門", "門番ガロ", "Harbor"]),
+])
+def test_name_search_is_a_substring_match(nouns, keyword, expected):
+    assert _names(nouns.search_nouns_by_name(keyword)) == expected
+
+
+def test_indexes_follow_updates_and_deletes(nouns):
+    gate = nouns.search_nouns_by_name("霧の門")[0]
+    nouns.rename_noun(gate["id"], "白い門")
+    assert nouns.search_nouns_by_name("霧") == []
+    assert _names(nouns.search_nouns_by_name("白い")) == ["白い門"]
+
+    nouns.delete_noun(gate["id"])
+    assert _names(nouns.filter_by_tag("北")) == ["門番ガロ"]
+    assert _names(nouns.filter_by_type("地名")) == ["Harbor"]
+
+
+def test_fame_order_is_recomputed_after_changes(nouns):
+    assert _names(nouns.sorted_by_fame()) == ["門番ガロ", "Harbor", "霧の門"]
+    nouns.create_noun(name="王都", type="地名", fame=50)
+    assert _names(nouns.sorted_by_fame())[0] == "王都"
+    nouns.sort_index_by_fame()
+    assert _names(nouns.entries) == ["霧の門", "Harbor", "門番ガロ", "王都"]
+    assert _names(nouns.filter_by_type("地名")) == ["霧の門", "Harbor", "王都"]
@@ -0,0 +1,34 @@
+# tests/test_prompt_layout.py
+from phases.scenario.gameflow.informations import STABLE_ORDER, Informations
+from phases.scenario.gameflow.prompt_layout import assemble_messages
+
+
+def _layout(infos, history, turn_input, turn_rules="cue"):
+    return assemble_messages(system_rules="rules", infos=infos, chapter=1, history=history,
+                             turn_input=turn_input, turn_rules=turn_rules)
+
+
+def test_segments_follow_stable_order_whatever_include_says(world):
+    infos = Informations(world.state, world.ctx)
+    keys = [k for k, _ in infos.build_segments(include=["character", "worldview", "plan"])]
+    assert keys == [k for k in STABLE_ORDER if k in ("character", "worldview", "plan")]
+
+
+def test_turn_specific_parts_come_after_the_shared_prefix(world):
+    infos = Informations(world.state, world.ctx)
+    history = [{"role": "user", "content": "h1"}, {"role": "assistant", "content": "h2"}]
+    msgs = _layout(infos, history, "今回の入力")
+
+    assert msgs[0] == {"role": "system", "content": "rules"}
+    assert msgs[-1] == {"role": "user", "content": "今回の入力"}
+    assert msgs[-2] == {"role": "system", "content": "cue"}
+    assert msgs[-4:-2] == history
+
+
+def test_prefix_is_identical_across_turns(world):
+    infos = Informations(world.state, world.ctx)
+    first = _layout(infos, [{"role": "user", "content": "h1"}], "入力1", turn_rules="cue A")
+    second = _layout(infos, [{"role": "user", "content": "h1"}, {"role": "assistant", "content": "h2"}],
+                     "入力2", turn_rules="cue B")
+    prefix = len(first) - 2  # 末尾の turn rules と turn input を除く
+    assert second[:prefix] == first[:prefix]
@@ -0,0 +1,60 @@
+# tests/test_response_cache.py
+import time
+
+from ai.response_cache import ResponseCache
+
+
+def _key(cache: ResponseCache, text: str) -> str:
+    return cache.make_key("m", None, None, [{"role": "user", "content": text}], 100)
+
+
+def test_entries_expire_after_caller_ttl(tmp_path, monkeypatch):
+    cache = ResponseCache({"IntentRouter": 60}, base_dir=tmp_path)
+    key = _key(cache, "a")
+    cache.put(key, "IntentRouter", {"category": "action"})
+    assert cache.get(key, "IntentRouter") == {"category": "action"}
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get(key, "IntentRouter") is None
+    assert not (tmp_path / f"{key}.json").exists()
+
+
+def test_derived_caller_names_share_the_base_ttl(tmp_path):
+    cache = ResponseCache({"Narrator": 60}, base_dir=tmp_path)
+    assert cache.ttl_for("Narrator.action") == 60
+    assert cache.ttl_for("Director") is None
+    assert cache.lookup("Director", "m", None, None, [{"role": "user", "content": "x"}], 100) == (None, None)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResponseCache({"C": 60}, base_dir=tmp_path, max_bytes=10_000)
+    keys = [_key(cache, str(i)) for i in range(3)]
+    cache.put(keys[0], "C", "x" * 10)
+    size = cache._total
+    cache.max_bytes = size * 2 + 10
+    cache.put(keys[1], "C", "x" * 10)
+    assert cache.get(keys[0], "C") == "x" * 10  # 0 を使ったので 1 が最古になる
+    cache.put(keys[2], "C", "x" * 10)
+
+    assert cache.get(keys[1], "C") is None
+    assert cache.get(keys[0], "C") == "x" * 10
+    assert cache.get(keys[2], "C") == "x" * 10
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    cache = ResponseCache({"C": 60}, base_dir=tmp_path)
+    key = _key(cache, "a")
+    cache.put(key, "C", "ok")
+    reopened = ResponseCache({"C": 60}, base_dir=tmp_path)
+    assert reopened.get(key, "C") == "ok"
+
+
+def test_invalid_intent_and_unparsed_schema_results_are_not_stored(tmp_path):
+    cache = ResponseCache({"IntentRouter": 60}, base_dir=tmp_path)
+    key = _key(cache, "a")
+    cache.store(key, "IntentRouter", {"type": "json_schema"}, {"category": "invalid"})
+    cache.store(key, "IntentRouter", {"type": "json_schema"}, "not json")
+    assert cache.get(key, "IntentRouter") is None
+    cache.store(key, "IntentRouter", {"type": "json_schema"}, {"category": "action"})
+    assert cache.get(key, "IntentRouter") == {"category": "action"}
@@ -0,0 +1,42 @@
+# tests/test_response_classifier.py
+import json
+
+import pytest
+
+from phases.scenario.response_classifier import classify_response_local, set_model, train_from_chatlogs
+
+
+@pytest.mark.parametrize("text, label", [
+    ("はい", "yes"), ("はい、お願いします", "yes"), ("オーケー", "yes"),
+    ("いいえ", "no"), ("振らない", "no"), ("ノー", "no"),
+    ("……", "invalid"),
+])
+def test_fixed_replies(text, label):
+    assert classify_response_local(text)[0] == label
+
+
+@pytest.mark.parametrize("text", ["いいです", "結構です", "けっこうです", "いいよ", "大丈夫です"])
+def test_ambiguous_replies_are_left_to_llm(text):
+    assert classify_response_local(text) == (None, 0.0)
+
+
+def _write_chatlogs(base, samples):
+    for i, (text, answer) in enumerate(samples):
+        record = {
+            "caller": "ClassifyResponse",
+            "request": {"messages": [{"role": "system", "content": "分類して"}, {"role": "user", "content": text}]},
+            "response": {"stripped_text": answer},
+        }
+        (base / f"{i:03}_ClassifyResponse_x.json").write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+
+
+def test_trained_model_classifies_replies_outside_the_lexicon(tmp_path):
+    samples = [("いいですとも", "yes"), ("ぜひ振らせて", "yes"), ("今回はパスで", "no"), ("パスします", "no")] * 15
+    _write_chatlogs(tmp_path, samples + [("謎", "???")])
+    try:
+        model = train_from_chatlogs([tmp_path], tmp_path / "model.json")
+        assert model.n_samples == 60  # 読み取れない出力は学習に使わない
+        assert classify_response_local("パスで")[0] == "no"
+        assert classify_response_local("ぜひ")[0] == "yes"
+    finally:
+        set_model(None)
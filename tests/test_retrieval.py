@@ -0,0 +1,79 @@
+# tests/test_retrieval.py
+from phases.scenario import retrieval
+from phases.scenario.retrieval import RetrievalIndex, retrieve_nouns, tokenize
+
+
+def _text(e: dict) -> str:
+    return e.get("text", "")
+
+
+def test_tokenize_uses_character_bigrams():
+    assert tokenize("黒い 森") == ["黒い", "い森"]
+    assert tokenize("A") == ["a"]
+    assert tokenize("  ") == []
+
+
+def test_bm25_prefers_documents_with_more_matches():
+    index = RetrievalIndex([
+        {"id": "once", "text": "黒い森の奥に古い塔がある。周囲は霧に包まれている"},
+        {"id": "twice", "text": "黒い森の奥の黒い森"},
+        {"id": "none", "text": "港町の市場"},
+    ], _text)
+    scores = index.bm25("黒い森")
+    assert "none" not in {index.entries[i]["id"] for i in scores}
+    assert scores[1] > scores[0]
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = RetrievalIndex([
+        {"id": "common", "text": "王都"},
+        {"id": "common2", "text": "王都"},
+        {"id": "rare", "text": "魔剣"},
+    ], _text)
+    scores = index.bm25("王都 魔剣")
+    assert scores[2] > scores[0]
+
+
+def test_search_ranks_by_relevance_and_returns_original_order():
+    entries = [{"id": str(i), "text": f"無関係な項目{i}"} for i in range(5)]
+    entries[1]["text"] = "星見の塔"
+    entries[3]["text"] = "星見の塔の守護者"
+    index = RetrievalIndex(entries, _text)
+    result = index.search("星見の塔", top_k=2)
+    assert [e["id"] for e in result] == ["1", "3"]
+
+
+def test_search_without_matches_falls_back_to_fame():
+    entries = [{"id": "a", "text": "x", "fame": 0}, {"id": "b", "text": "y", "fame": 50}]
+    assert [e["id"] for e in RetrievalIndex(entries, _text).search("zz", top_k=1)] == ["b"]
+
+
+class _Mgr:
+    def __init__(self, entries):
+        self.entries = entries
+        self.index_file = "nouns_index.json"
+        self.stamp = 1
+
+    def index_stamp(self):
+        return self.stamp
+
+
+def test_index_is_reused_until_the_stamp_changes(monkeypatch):
+    monkeypatch.setattr(retrieval, "_indexes", {})
+    mgr = _Mgr([{"id": str(i), "name": f"名前{i}"} for i in range(5)])
+    built = []
+    original = RetrievalIndex.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(1)
+        original(self, *args, **kwargs)
+
+    monkeypatch.setattr(RetrievalIndex, "__init__", counting_init)
+    retrieve_nouns(mgr, "名前1", top_k=2)
+    retrieve_nouns(mgr, "名前2", top_k=2)
+    assert len(built) == 1
+
+    mgr.entries[0]["name"] = "改名"
+    mgr.stamp = 2  # 保存で版数が変わる
+    assert retrieve_nouns(mgr, "改名", top_k=1) == [mgr.entries[0]]
+    assert len(built) == 2
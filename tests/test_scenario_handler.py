@@ -0,0 +1,207 @@
+# tests/test_scenario_handler.py
+import json
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from infra import path_helper
+from phases import scenario_handler
+from phases.scenario import context_window
+from phases.scenario.gameflow import informations
+from phases.scenario.gameflow.intro_handler import IntroHandler
+from phases.scenario_handler import ScenarioHandler
+
+
+class _ConvLog:
+    def __init__(self, fail=False):
+        self.roll_ups = []
+        self.fail = fail
+        self.messages = []
+
+    def get_slim(self, caller_name=None):
+        return list(self.messages)
+
+    def roll_up(self, level):
+        self.roll_ups.append(level)
+        if self.fail:
+            raise RuntimeError("boom")
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    plan_path = tmp_path / "worlds/w/sessions/s/chapters/chapter_01/plan.json"
+    plan_path.parent.mkdir(parents=True)
+    plan_path.write_text(json.dumps({"flow": [{"scene": "exploration"}, {"scene": "combat"}]}), encoding="utf-8")
+    scenario = {"draft": {"chapters": [{"goal": "門を探す"}, {"goal": "門を抜ける"}]}}
+    (tmp_path / "worlds/w/sessions/s/scenario.json").write_text(json.dumps(scenario), encoding="utf-8")
+
+    h = ScenarioHandler(SimpleNamespace(options={}), {"flags": {"worldview_id": "w", "id": "s"}})
+    h.state = SimpleNamespace(chapter=1, section=0, scene=None, save=lambda: None)
+    h.convlog = _ConvLog()
+    return h
+
+
+def test_section_roll_up_runs_from_second_section(handler):
+    handler._step_select_section()
+    assert handler.convlog.roll_ups == []
+    handler._step_select_section()
+    assert handler.convlog.roll_ups == ["section"]
+    assert handler.state.scene == "combat"
+
+
+def test_section_roll_up_failure_is_logged(handler, caplog):
+    handler.convlog = _ConvLog(fail=True)
+    handler.state.section = 1
+    with caplog.at_level("WARNING"):
+        progress, _ = handler._step_select_section()
+    assert progress["step"] == 2000
+    assert "セクション切り替え時の要約に失敗" in caplog.text
+
+
+# ---- 次章プランの先読み ----
+
+def _done(result=None, error=None) -> Future:
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+class _Generator:
+    drafts = []
+
+    def __init__(self, ctx=None, wid=None, sid=None, chapter=None):
+        self.chapter = chapter
+        self.refined = []
+
+    def draft_async(self, history):
+        _Generator.drafts.append((self.chapter, history))
+        return Future()
+
+    def refine(self, draft, history):
+        self.refined.append(history)
+        return {**draft, "refined": True}
+
+    def finalize(self, plan):
+        return {**plan, "final": True}
+
+
+DRAFT = {"title": "門の向こう", "flow": [{"goal": "塔へ"}]}
+
+
+def test_last_section_starts_next_chapter_draft(handler, monkeypatch):
+    monkeypatch.setattr(scenario_handler, "ChapterGenerator", _Generator)
+    _Generator.drafts = []
+    handler.ctx.options["prefetch_chapter"] = True
+    handler.convlog.messages = [{"role": "user", "content": "門を調べる"}]
+    handler._step_select_section()
+    assert handler._chapter_prefetch is None
+    handler._step_select_section()  # 最終セクション
+    assert _Generator.drafts == [(2, handler.convlog.messages)]
+    assert handler._chapter_prefetch["chapter"] == 2
+    assert handler._chapter_prefetch["log_len"] == 1
+
+
+def test_draft_is_used_as_is_when_no_log_arrived(handler):
+    generator = _Generator()
+    handler._chapter_prefetch = {"chapter": 2, "generator": generator, "future": _done(DRAFT), "log_len": 0}
+    assert handler._take_prefetched_plan(2) == {**DRAFT, "final": True}
+    assert generator.refined == []
+    assert handler._chapter_prefetch is None
+
+
+def test_draft_is_refined_with_only_the_later_log(handler):
+    generator = _Generator()
+    handler.convlog.messages = [{"role": "user", "content": "前"}, {"role": "user", "content": "後"}]
+    handler._chapter_prefetch = {"chapter": 2, "generator": generator, "future": _done(DRAFT), "log_len": 1}
+    plan = handler._take_prefetched_plan(2)
+    assert plan["refined"] and plan["final"]
+    assert generator.refined == [[{"role": "user", "content": "後"}]]
+
+
+def test_stale_or_failed_drafts_fall_back_to_generation(handler):
+    pending = Future()
+    handler._chapter_prefetch = {"chapter": 3, "generator": _Generator(), "future": pending, "log_len": 0}
+    assert handler._take_prefetched_plan(2) is None
+    assert pending.cancelled()
+
+    failed = _done(error=RuntimeError("boom"))
+    handler._chapter_prefetch = {"chapter": 2, "generator": _Generator(), "future": failed, "log_len": 0}
+    assert handler._take_prefetched_plan(2) is None
+
+
+# ---- 導入文の先読み ----
+
+class _Infos:
+    def __init__(self, state, ctx):
+        self.state = state
+
+    def snapshot(self):
+        return self
+
+
+class _IntroHandler:
+    started = []
+
+    def __init__(self, ctx, state, convlog, infos, flags=None):
+        self.state = state
+
+    def prefetch(self, label):
+        _IntroHandler.started.append((label, self.state.chapter, self.state.section))
+        return Future()
+
+
+def test_end_section_prefetches_next_section_intro(handler, monkeypatch):
+    monkeypatch.setattr(scenario_handler, "Informations", _Infos)
+    monkeypatch.setattr(scenario_handler, "IntroHandler", _IntroHandler)
+    _IntroHandler.started = []
+    handler.state.section = 1
+    handler._prefetch_next_section_intro()
+    assert _IntroHandler.started == [("section_intro", 1, 2)]
+    assert handler.state.section == 1  # 先読み用の写しだけを進める
+
+    # 章の最終セクションでは次章プラン確定前なので先読みしない
+    handler._intro_prefetch = None
+    handler.state.section = 2
+    handler._prefetch_next_section_intro()
+    assert handler._intro_prefetch is None
+
+
+def test_intro_prefetch_is_taken_only_at_matching_position(handler):
+    future = Future()
+    handler.state.section = 2
+    handler._intro_prefetch = {"label": "section_intro", "chapter": 1, "section": 2, "future": future}
+    assert handler._take_intro_prefetch("section_intro") is future
+    assert handler._intro_prefetch is None
+
+    stale = Future()
+    handler._intro_prefetch = {"label": "section_intro", "chapter": 1, "section": 3, "future": stale}
+    assert handler._take_intro_prefetch("section_intro") is None
+    assert stale.cancelled()
+
+
+def test_intro_handler_uses_prefetched_text_or_falls_back(monkeypatch):
+    intro = IntroHandler(SimpleNamespace(), None, None, None)
+    monkeypatch.setattr(intro, "_handle_intro", lambda kind: f"{kind} を通常生成")
+    assert intro.handle("section_intro", prefetched=_done("  先読みした導入  ")) == "先読みした導入"
+    assert intro.handle("chapter_intro", prefetched=_done(error=RuntimeError("boom"))) == "chapter を通常生成"
+    assert intro.handle("section_intro", prefetched=_done("")) == "section を通常生成"
+
+
+# ---- デバッグ用 stats コマンド ----
+
+def test_stats_command_reports_accumulated_stats(handler, monkeypatch):
+    monkeypatch.setattr(context_window, "_stats", {})
+    monkeypatch.setattr(informations, "_fragment_stats", {"nouns": {"hits": 3, "misses": 1}})
+    context_window.record("IntentHandler.action", 900, 600)
+    handler.debug = True
+    progress, text = handler._intent_router("stats")
+    assert progress is handler.progress_info
+    assert text.startswith("【デバッグ】累計統計:")
+    assert "トークン使用量" in text
+    assert "IntentHandler: 1回 / 900 → 600 tok（-300）" in text
+    assert "nouns: hit=3 / miss=1" in text
@@ -0,0 +1,57 @@
+# tests/test_storage_sqlite.py
+import sqlite3
+
+from core.storage import JsonStorage, SqliteStorage, migrate_json_to_sqlite
+from infra.write_behind import get_write_behind
+
+
+def test_index_round_trip_keeps_order_and_applies_changes(tmp_path):
+    storage = SqliteStorage(tmp_path / "shelves.db")
+    index_file = tmp_path / "worlds" / "w1" / "nouns" / "nouns_index.json"
+    entries = [{"id": "a", "type": "人物", "tags": ["x"]}, {"id": "b", "type": "地名", "tags": []}]
+    storage.save_index(index_file, entries)
+
+    changed = {"id": "a", "type": "人物", "tags": ["y"]}
+    storage.save_index(index_file, entries, changed=[changed, {"id": "c"}], deleted=["b"])
+    assert storage.load_index(index_file) == [changed, {"id": "c"}]
+    storage.close()
+
+
+def test_opening_old_schema_drops_unused_tag_table(tmp_path):
+    db_path = tmp_path / "shelves.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE entries (collection TEXT NOT NULL, id TEXT NOT NULL, position INTEGER NOT NULL,
+                              type TEXT, name TEXT, data TEXT NOT NULL, PRIMARY KEY (collection, id));
+        CREATE INDEX idx_entries_type ON entries(collection, type);
+        CREATE TABLE entry_tags (collection TEXT NOT NULL, id TEXT NOT NULL, tag TEXT NOT NULL,
+                                 PRIMARY KEY (collection, id, tag));
+    """)
+    conn.close()
+
+    storage = SqliteStorage(db_path)
+    index_file = tmp_path / "worlds" / "worldview_index.json"
+    storage.save_index(index_file, [{"id": "w1", "name": "W"}])
+    assert storage.load_index(index_file) == [{"id": "w1", "name": "W"}]
+    tables = {r[0] for r in storage.conn.execute("SELECT name FROM sqlite_master")}
+    assert "entry_tags" not in tables
+    assert "idx_entries_type" not in tables
+    storage.close()
+
+
+def test_migrator_copies_json_indexes_and_characters(world):
+    world.ctx.nouns_mgr.create_noun(name="霧の門", type="地名", tags=["北"])
+    world.ctx.canon_mgr.create_fact("門番", "人物", "門を守る老人", chapter=1)
+    get_write_behind().flush()
+
+    counts = migrate_json_to_sqlite()
+    assert counts == {"collections": 5, "entries": 5, "documents": 1}
+
+    db = SqliteStorage()
+    managers = [world.ctx.worldview_mgr, world.ctx.session_mgr, world.ctx.nouns_mgr,
+                world.ctx.character_mgr, world.ctx.canon_mgr]
+    for mgr in managers:
+        assert db.load_index(mgr.index_file) == JsonStorage().load_index(mgr.index_file)
+    char_path = world.ctx.character_mgr.base_dir / f"{world.pcid}.json"
+    assert db.load_document(char_path)["name"] == "アリア"
+    db.close()
@@ -0,0 +1,58 @@
+# tests/test_storage_stamp.py
+from core.base_manager import BaseManager
+from core.storage import JsonStorage, set_storage
+from infra import path_helper
+from infra.write_behind import get_write_behind
+
+
+def test_switch_after_flush_does_not_reparse(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    set_storage(JsonStorage())
+    mgr = BaseManager("Test", "worlds/index.json")
+    entry = {"id": "a", "name": "A"}
+    mgr._add_entry(entry)
+    mgr._save_index(changed=[entry])
+    get_write_behind().flush()
+    assert mgr.index_file.exists()
+
+    loads = []
+    monkeypatch.setattr(mgr, "_load_index", lambda: loads.append(1) or [])
+    mgr._switch_index()
+    assert loads == []
+    assert mgr.get_entry_by_id("a") is entry
+
+
+def test_external_change_is_reloaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    set_storage(JsonStorage())
+    mgr = BaseManager("Test", "worlds/index.json")
+    mgr._add_entry({"id": "a"})
+    mgr._save_index()
+    get_write_behind().flush()
+
+    mgr.index_file.write_text('[{"id": "b"}, {"id": "c"}]', encoding="utf-8")
+    mgr._switch_index()
+    assert [e["id"] for e in mgr.entries] == ["b", "c"]
+
+
+def test_switching_contexts_back_and_forth_reuses_parsed_indexes(tmp_path, monkeypatch):
+    from core.nouns_manager import NounsManager
+
+    monkeypatch.setattr(path_helper, "get_data_base", lambda: tmp_path)
+    set_storage(JsonStorage())
+    mgr = NounsManager()
+    mgr.set_worldview_id("w1")
+    mgr.create_noun(name="霧の門", type="地名")
+    mgr.set_worldview_id("w2")
+    mgr.create_noun(name="港町", type="地名")
+    get_write_behind().flush()
+
+    loads = []
+    original = mgr._load_index
+    monkeypatch.setattr(mgr, "_load_index", lambda: loads.append(1) or original())
+    mgr.set_worldview_id("w1")
+    assert [n["name"] for n in mgr.entries] == ["霧の門"]
+    assert mgr.filter_by_type("地名")[0]["name"] == "霧の門"
+    mgr.set_worldview_id("w2")
+    assert [n["name"] for n in mgr.entries] == ["港町"]
+    assert loads == []
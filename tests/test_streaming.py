@@ -0,0 +1,47 @@
+# tests/test_streaming.py
+import pytest
+
+from phases.scenario.gameflow.streaming import ThinkFilter, chat_to_ui
+
+
+def _run(deltas):
+    f = ThinkFilter()
+    return "".join(f.feed(d) for d in deltas) + f.close()
+
+
+@pytest.mark.parametrize("deltas, expected", [
+    (["<think>考え中</think>本文"], "本文"),
+    (["前", "<th", "ink>考え", "中</thi", "nk >後"], "前後"),
+    (["a <", "b"], "a <b"),
+    (["本文<think>閉じない"], "本文"),
+    (["<THINK>x</Think>y"], "y"),
+])
+def test_think_filter(deltas, expected):
+    assert _run(deltas) == expected
+
+
+class _UI:
+    def __init__(self):
+        self.printed = []
+
+    def safe_print(self, who, text, append=False):
+        self.printed.append((text, append))
+
+
+class _Engine:
+    def chat_stream(self, **kwargs):
+        yield from ["<think>", "計画", "</think>\n\n", "扉が", "開く。"]
+
+
+class _Ctx:
+    def __init__(self):
+        self.ui = _UI()
+        self.engine = _Engine()
+
+
+def test_chat_to_ui_hides_think():
+    ctx = _Ctx()
+    flags = {}
+    assert chat_to_ui(ctx, flags) == "扉が開く。"
+    assert ctx.ui.printed == [("扉が", False), ("開く。", True)]
+    assert flags
@@ -88,6 +88,10 @@ class MessageConsole_kivyApp(App):
   
         self.auto_scroll_enabled = self.settings.get("auto_scroll", True)# 自動スクロール有効フラグ
 
+        # ストリーミング追記用：直前メッセージの位置と内容
+        self._last_message = None
+        self._last_message_start = 0
+
         self.spinner = GUISpinner(self.spinner_label)
 
         if platform in ("win", "linux", "macosx"):  # PC の場合だけ
@@ -146,15 +150,23 @@ class MessageConsole_kivyApp(App):
         self.message_label.text_size = (self.scroll.width * 0.95, None)
         self.scroll.scroll_y = 0
 
-    def print_message(self, sender: str, message: str):
+    def print_message(self, sender: str, message: str, append: bool = False):
+        if append and self._last_message is not None:
+            # ストリーミング差分：直前のメッセージを組み直して末尾に追記
+            sender, last_text = self._last_message
+            message = last_text + message
+            self.message_label.text = self.message_label.text[:self._last_message_start]
+
         is_player = sender and sender.lower() in ["user", "player"]
         color = self.settings["player_color"] if is_player else self.settings["text_color"]
         prefix = "-- " if is_player else ""
+        self._last_message_start = len(self.message_label.text)
+        self._last_message = (sender, message)
         self.message_label.text += f"[color={self._rgba_to_hex(color)}]{prefix}{message}[/color]\n"
         Clock.schedule_once(self._scroll_to_bottom, 0)
 
-    def safe_print(self, sender, message):
-        Clock.schedule_once(lambda dt: self.print_message(sender, message))
+    def safe_print(self, sender, message, append: bool = False):
+        Clock.schedule_once(lambda dt: self.print_message(sender, message, append))
 
     def _on_enter_text(self, instance):
         value = self.entry.text.strip()
@@ -184,18 +184,22 @@ class MessageConsole_tk:
         menu.add_cascade(label="設定", menu=config_menu)
         config_menu.add_command(label="UI設定...", command=self.open_settings_window)
 
-    def print_message(self, sender: str, message: str):
+    def print_message(self, sender: str, message: str, append: bool = False):
         is_player = sender and sender.lower() in ["user", "player"]
         tag = "player" if is_player else "default"
-        line = f"-- {message}\n" if is_player else f"{message}\n"
 
         self.message_area.configure(state='normal')
-        self.message_area.insert('end', line, tag)
+        if append:
+            # ストリーミング差分：直前のメッセージ末尾（改行の手前）に追記
+            self.message_area.insert('end-2c', message, tag)
+        else:
+            line = f"-- {message}\n" if is_player else f"{message}\n"
+            self.message_area.insert('end', line, tag)
         self.message_area.configure(state='disabled')
         self.message_area.see('end')
 
-    def safe_print(self, sender, message):
-        self.root.after(0, lambda: self.print_message(sender, message))
+    def safe_print(self, sender, message, append: bool = False):
+        self.root.after(0, lambda: self.print_message(sender, message, append))
 
     def wait_for_input(self, on_input_received):
         self.input_callback = on_input_received